@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,23 +54,34 @@ INSTALLED_APPS = [
     'student',
     'teacher',
     'academics',
+    'core',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.StaticAssetMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.TimedSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.QueryContextMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ServerTimingViewMiddleware',
 ]
 
 ROOT_URLCONF = 'EduSync.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Keep the 'django' alias: core/warmup.py and third-party code look
+        # the engine up by name.
+        'NAME': 'django',
+        'BACKEND': 'core.timing.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -84,6 +96,111 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'EduSync.wsgi.application'
 
+# Loads userprofile + institution with the user in one query and handles
+# institution-name logins (see accounts/backends.py).
+AUTHENTICATION_BACKENDS = ['accounts.backends.InstitutionBackend']
+
+# Preload URLs, templates, DB connections and caches when a worker boots
+# (see core/warmup.py). Recommended behind an autoscaler.
+WARMUP_ON_STARTUP = False
+
+# Credits needed to graduate; drives the degree-progress bar on transcripts.
+DEGREE_CREDITS_REQUIRED = 120
+
+# Staff-only per-request profiling (cProfile + tracemalloc + SQL timeline),
+# triggered by the X-EduSync-Profile header or ?__profile=1.
+REQUEST_PROFILER_ENABLED = True
+REQUEST_PROFILER_TOP_ALLOCATIONS = 25
+REQUEST_PROFILER_KEEP = 200
+
+# Statements slower than this are logged as JSON lines with their SQL shape,
+# view and originating source line (core/querylog.py). None disables it.
+# Summarise with: python manage.py slow_query_report
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_LOG = BASE_DIR / 'slow_queries.jsonl'
+
+# Share of responses per role (UserProfile.role, or 'anonymous') that carry a
+# Server-Timing header with the mw/view/db/tpl/session breakdown.
+SERVER_TIMING_SAMPLE_RATES = {
+    'institution_admin': 1.0,
+    'teacher': 0.05,
+    'student': 0.01,
+}
+
+# Per-worker metrics snapshots, merged by the Prometheus endpoint at /metrics
+# (core/metrics.py). Only scrapers from METRICS_ALLOWED_IPS may read it.
+METRICS_ENABLED = True
+METRICS_DIR = BASE_DIR / '.metrics'
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Admission control per worker (core/admission.py). Per role: requests served
+# at once, requests allowed to queue behind them and seconds a queued request
+# waits, as (limit, queue, timeout). Keep the limits below the worker's thread
+# count. Reads from ADMISSION_SHED_READS roles are never queued and get a 503
+# with Retry-After as soon as their pool is full. An empty dict disables it.
+ADMISSION_LIMITS = {
+    'institution_admin': (8, 32, 10.0),
+    'teacher': (6, 16, 5.0),
+    'student': (12, 24, 2.0),
+    'anonymous': (4, 16, 2.0),
+    'none': (2, 4, 2.0),
+}
+ADMISSION_SHED_READS = ['student', 'anonymous']
+ADMISSION_RETRY_AFTER = 5
+ADMISSION_EXEMPT_PATHS = ['/metrics', '/static/']
+
+# The default cache counts hits/misses for the metrics endpoint. It is per
+# worker unless EDUSYNC_MEMCACHED names a memcached server (host:port, needs
+# pymemcache), which every worker and host then shares. publish_results
+# needs the shared one: it pre-renders results pages into this cache from
+# its own process.
+MEMCACHED_LOCATION = os.environ.get('EDUSYNC_MEMCACHED')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.InstrumentedPyMemcacheCache',
+        'LOCATION': MEMCACHED_LOCATION,
+        'KEY_PREFIX': 'edusync',
+    } if MEMCACHED_LOCATION else {
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+    },
+}
+
+# Login rate limits per scope: (burst, tokens refilled per minute). Buckets
+# are kept in the default cache when it is memcached, otherwise in
+# accounts.LoginRateBucket rows; either way every worker shares them.
+LOGIN_RATE_LIMITS = {
+    'ip': (20, 10),
+    'institution': (200, 120),
+    'username': (5, 2),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'jsonl': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'jsonl',
+        },
+    },
+    'loggers': {
+        'edusync.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -92,6 +209,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file, not SQLite's default in-memory test database, so threads
+        # in the concurrency tests get their own connections to the same
+        # data.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -132,3 +253,16 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes content-hashed copies plus .gz/.br variants (brotli is
+# optional); core.middleware.StaticAssetMiddleware serves them with immutable
+# caching when DEBUG is off.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
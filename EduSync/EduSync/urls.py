@@ -26,6 +26,7 @@ urlpatterns = [
     path('student/', include('student.urls')),
     path('teacher/', include('teacher.urls')),
     path('academics/', include('academics.urls')),
+    path('', include('core.urls')),
 ]
 
 if settings.DEBUG:
@@ -1,22 +1,58 @@
 from django.contrib import admin
-from .models import Course, Grade
+from .models import Course, Grade, Enrollment
+from core.paginator import EstimatedCountPaginator
+from institution.admin import InstitutionListFilter
+
+
+class GradeInstitutionFilter(InstitutionListFilter):
+    field_path = 'course__institution'
+
+
+class InstitutionCourseFilter(admin.SimpleListFilter):
+    """
+    Course filter scoped to the institution picked in the institution
+    filter; hidden until one is picked so the sidebar never lists every
+    course in the system.
+    """
+    title = 'course'
+    parameter_name = 'course'
+
+    def lookups(self, request, model_admin):
+        institution = request.GET.get(InstitutionListFilter.parameter_name, '')
+        if not institution.isdigit():
+            return ()
+        return Course.objects.filter(institution_id=institution).order_by('code').values_list('id', 'code')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(course_id=self.value())
+        return queryset
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
     list_display = (
         'code', 'name',
-        'institution', 'credits'
+        'institution', 'credits',
+        'capacity', 'seats_taken'
     )
     list_filter = (
+        InstitutionListFilter,
+    )
+    list_select_related = (
         'institution',
     )
     search_fields = (
-        'code', 'name'
+        '^code', 'name'
+    )
+    autocomplete_fields = (
+        'institution', 'teachers'
     )
-    filter_horizontal = (
-        'teachers',
+    readonly_fields = (
+        'seats_taken',
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Grade)
@@ -26,9 +62,42 @@ class GradeAdmin(admin.ModelAdmin):
         'grade', 'marks'
     )
     list_filter = (
-        'grade', 'course'
+        'grade', GradeInstitutionFilter, InstitutionCourseFilter
+    )
+    # Student.__str__ reads user.get_full_name(), so join through to User.
+    list_select_related = (
+        'student__user', 'course'
     )
     search_fields = (
-        'student__user__username',
-        'course__code'
+        '=student__student_id',
+        '^student__user__username',
+        '^course__code'
+    )
+    autocomplete_fields = (
+        'student', 'course'
+    )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = (
+        'student', 'course',
+        'status', 'requested_at'
+    )
+    list_filter = (
+        'status',
+    )
+    list_select_related = (
+        'student__user', 'course'
+    )
+    search_fields = (
+        '=student__student_id',
+        '^course__code'
+    )
+    autocomplete_fields = (
+        'student', 'course'
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -4,3 +4,31 @@ from django.apps import AppConfig
 class AcademicsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academics'
+
+    def ready(self):
+        from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+        from student.models import Student
+        from teacher.models import Teacher
+        from core import generations
+        from . import facets, standings
+        from .models import Course, Grade
+
+        post_save.connect(standings.grade_changed, sender=Grade, dispatch_uid='academics.standings.grade_saved')
+        post_delete.connect(standings.grade_changed, sender=Grade, dispatch_uid='academics.standings.grade_deleted')
+        pre_save.connect(standings.student_pre_save, sender=Student, dispatch_uid='academics.standings.student_pre_save')
+        post_save.connect(standings.student_changed, sender=Student, dispatch_uid='academics.standings.student_saved')
+        pre_save.connect(facets.course_pre_save, sender=Course, dispatch_uid='academics.facets.course_pre_save')
+        post_save.connect(facets.course_post_save, sender=Course, dispatch_uid='academics.facets.course_post_save')
+        pre_delete.connect(facets.course_pre_delete, sender=Course, dispatch_uid='academics.facets.course_pre_delete')
+        post_delete.connect(facets.course_post_delete, sender=Course, dispatch_uid='academics.facets.course_post_delete')
+        m2m_changed.connect(facets.teachers_changed, sender=Course.teachers.through, dispatch_uid='academics.facets.teachers_changed')
+        pre_delete.connect(facets.teacher_pre_delete, sender=Teacher, dispatch_uid='academics.facets.teacher_pre_delete')
+
+        post_save.connect(generations.course_changed, sender=Course, dispatch_uid='core.generations.course_saved')
+        post_delete.connect(generations.course_changed, sender=Course, dispatch_uid='core.generations.course_deleted')
+        m2m_changed.connect(generations.teachers_changed, sender=Course.teachers.through, dispatch_uid='core.generations.teachers_changed')
+        for model in (Student, Teacher):
+            post_save.connect(generations.roster_changed, sender=model, dispatch_uid=f'core.generations.{model._meta.model_name}_saved')
+            post_delete.connect(generations.roster_changed, sender=model, dispatch_uid=f'core.generations.{model._meta.model_name}_deleted')
+        post_save.connect(generations.grade_changed, sender=Grade, dispatch_uid='core.generations.grade_saved')
+        post_delete.connect(generations.grade_changed, sender=Grade, dispatch_uid='core.generations.grade_deleted')
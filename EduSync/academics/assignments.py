@@ -0,0 +1,83 @@
+"""
+Course-teacher assignments of an institution as one set of pairs.
+
+``sync()`` takes the desired ``{(course_id, teacher_id)}`` set, diffs it
+against the ``Course.teachers`` through table and applies the difference
+with one bulk INSERT and one DELETE, instead of a ``course.teachers.add()``
+or ``remove()`` round trip per course. The through rows are written
+directly, so ``m2m_changed`` is not sent; the teacher facet counts it would
+have adjusted are updated here from the same diff.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from core import generations
+from institution.models import Institution
+from teacher.models import Teacher
+
+from . import facets
+from .models import Course, CourseFacet
+
+Assignment = Course.teachers.through
+
+
+class AssignmentError(Exception):
+    pass
+
+
+def current(institution):
+    """``{(course_id, teacher_id)}`` currently assigned in ``institution``."""
+    return set(
+        Assignment.objects.filter(course__institution=institution).values_list('course_id', 'teacher_id')
+    )
+
+
+def validate(institution, pairs):
+    """Normalise ``pairs`` to a set of int tuples that all belong to ``institution``."""
+    try:
+        pairs = {(int(course_id), int(teacher_id)) for course_id, teacher_id in pairs}
+    except (TypeError, ValueError):
+        raise AssignmentError('Assignments must be [course_id, teacher_id] pairs.')
+    course_ids = {course_id for course_id, _ in pairs}
+    teacher_ids = {teacher_id for _, teacher_id in pairs}
+    if course_ids - set(Course.objects.filter(institution=institution, id__in=course_ids).values_list('id', flat=True)):
+        raise AssignmentError('Unknown course in assignments.')
+    if teacher_ids - set(Teacher.objects.filter(institution=institution, id__in=teacher_ids).values_list('id', flat=True)):
+        raise AssignmentError('Unknown teacher in assignments.')
+    return pairs
+
+
+def sync(institution, pairs, teacher=None):
+    """
+    Make the institution's assignments equal ``pairs``. With ``teacher``,
+    only that teacher's column is compared and rewritten. Returns
+    ``(added, removed)``.
+    """
+    pairs = validate(institution, pairs)
+    with transaction.atomic():
+        # Serialises concurrent saves for the institution so the facet
+        # deltas below match what was actually written.
+        Institution.objects.select_for_update().filter(pk=institution.pk).first()
+        existing = Assignment.objects.filter(course__institution=institution)
+        if teacher is not None:
+            existing = existing.filter(teacher=teacher)
+            pairs = {pair for pair in pairs if pair[1] == teacher.pk}
+        rows = {(course_id, teacher_id): pk for pk, course_id, teacher_id in existing.values_list('id', 'course_id', 'teacher_id')}
+
+        added = pairs - set(rows)
+        removed = set(rows) - pairs
+        if added:
+            Assignment.objects.bulk_create(
+                [Assignment(course_id=course_id, teacher_id=teacher_id) for course_id, teacher_id in added]
+            )
+        if removed:
+            Assignment.objects.filter(id__in=[rows[pair] for pair in removed]).delete()
+
+        deltas = Counter()
+        deltas.update((CourseFacet.TEACHER, str(teacher_id)) for _, teacher_id in added)
+        deltas.subtract((CourseFacet.TEACHER, str(teacher_id)) for _, teacher_id in removed)
+        facets.apply(institution.pk, deltas)
+        if added or removed:
+            generations.bump(institution.pk, generations.COURSES, generations.ROSTER)
+    return len(added), len(removed)
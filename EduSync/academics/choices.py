@@ -0,0 +1,49 @@
+"""
+Cached course choice lists for forms.
+
+Each institution's ``[(id, "CODE - Name"), ...]`` list is cached under its
+``courses`` generation (core/generations.py), so saving or deleting one of
+its courses moves every worker to a fresh key. The search endpoint and the
+``CourseSearchSelect`` widget read from the same cached list, so rendering
+a student or teacher form never queries the course table.
+"""
+from core import generations
+
+from .models import Course
+
+SEARCH_LIMIT = 20
+
+
+def course_choices(institution_id):
+    """``[(id, label), ...]`` of the institution's courses, ordered by code."""
+    return generations.cached(institution_id, (generations.COURSES,), 'course-choices', lambda: [
+        (pk, f'{code} - {name}')
+        for pk, code, name in Course.objects.filter(institution_id=institution_id)
+        .order_by('code').values_list('id', 'code', 'name')
+    ])
+
+
+def labels(institution_id, ids):
+    """``{id: label}`` for those of ``ids`` that are the institution's courses."""
+    wanted = {int(pk) for pk in ids if str(pk).isdigit()}
+    if not wanted:
+        return {}
+    return {pk: label for pk, label in course_choices(institution_id) if pk in wanted}
+
+
+def search(institution_id, term, limit=SEARCH_LIMIT):
+    """Courses whose code or name contains ``term`` (case-insensitive), codes first."""
+    term = term.strip().lower()
+    if not term:
+        return course_choices(institution_id)[:limit]
+    prefix, contains = [], []
+    for pk, label in course_choices(institution_id):
+        lowered = label.lower()
+        if lowered.startswith(term):
+            prefix.append((pk, label))
+        elif term in lowered:
+            contains.append((pk, label))
+        if len(prefix) >= limit:
+            break
+    return (prefix + contains)[:limit]
+
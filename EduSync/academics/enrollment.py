@@ -0,0 +1,131 @@
+"""
+Seat allocation for course enrollment.
+
+Seats are claimed with a single conditional UPDATE
+(``seats_taken = seats_taken + 1 WHERE seats_taken < capacity``) so that
+concurrent registrations can never oversell a course, no matter how many
+workers hit the endpoint at the same time. Students who do not get a seat
+are put on a FIFO waitlist and promoted automatically whenever a seat is
+released or the capacity is raised.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Course, Enrollment
+
+
+def _claim_seat(course_id):
+    """Atomically take one seat. Returns True if a seat was available."""
+    return Course.objects.filter(pk=course_id).filter(
+        Q(capacity__isnull=True) | Q(seats_taken__lt=F('capacity'))
+    ).update(seats_taken=F('seats_taken') + 1) == 1
+
+
+def _release_seat(course_id):
+    Course.objects.filter(pk=course_id, seats_taken__gt=0).update(
+        seats_taken=F('seats_taken') - 1
+    )
+
+
+def waitlist_position(enrollment):
+    """1-based position of a waitlisted enrollment, or None."""
+    if enrollment.status != Enrollment.WAITLISTED:
+        return None
+    ahead = Enrollment.objects.filter(
+        course_id=enrollment.course_id,
+        status=Enrollment.WAITLISTED,
+    ).filter(
+        Q(requested_at__lt=enrollment.requested_at)
+        | Q(requested_at=enrollment.requested_at, id__lt=enrollment.id)
+    ).count()
+    return ahead + 1
+
+
+def register(student, course):
+    """
+    Enroll ``student`` in ``course`` or put them on the waitlist.
+
+    Registering twice is a no-op and returns the existing enrollment.
+    """
+    with transaction.atomic():
+        enrollment, created = Enrollment.objects.get_or_create(
+            student=student,
+            course=course,
+            defaults={'status': Enrollment.WAITLISTED, 'requested_at': timezone.now()},
+        )
+        if not created:
+            if enrollment.status != Enrollment.DROPPED:
+                return enrollment
+            # Re-registering after a drop goes to the back of the queue.
+            reopened = Enrollment.objects.filter(
+                pk=enrollment.pk, status=Enrollment.DROPPED
+            ).update(status=Enrollment.WAITLISTED, requested_at=timezone.now())
+            enrollment.refresh_from_db()
+            if not reopened:
+                return enrollment
+
+        # Only jump straight in when nobody is already queued ahead of us.
+        queued_ahead = Enrollment.objects.filter(
+            course=course,
+            status=Enrollment.WAITLISTED,
+            requested_at__lt=enrollment.requested_at,
+        ).exists()
+        if queued_ahead:
+            # Hand any free seats to the queue in order; we may be in it.
+            if promote_waitlist(course):
+                enrollment.refresh_from_db(fields=['status'])
+        elif _claim_seat(course.pk):
+            Enrollment.objects.filter(pk=enrollment.pk).update(status=Enrollment.ENROLLED)
+            enrollment.status = Enrollment.ENROLLED
+    return enrollment
+
+
+def drop(student, course):
+    """
+    Drop ``student`` from ``course``. A released seat is handed to the
+    head of the waitlist in the same transaction.
+    """
+    with transaction.atomic():
+        released = Enrollment.objects.filter(
+            student=student, course=course, status=Enrollment.ENROLLED
+        ).update(status=Enrollment.DROPPED)
+        if released:
+            _release_seat(course.pk)
+            promote_waitlist(course)
+            return True
+        return Enrollment.objects.filter(
+            student=student, course=course, status=Enrollment.WAITLISTED
+        ).update(status=Enrollment.DROPPED) == 1
+
+
+def promote_waitlist(course):
+    """
+    Move waitlisted students into free seats in FIFO order.
+    Returns the number of students promoted.
+    """
+    promoted = 0
+    with transaction.atomic():
+        # Promoters of one course queue on its row, so each sees the head of
+        # the waitlist only after the previous one has committed; skipping a
+        # locked head would promote a later student first.
+        Course.objects.select_for_update().filter(pk=course.pk).values_list('pk', flat=True).first()
+        while True:
+            head = (
+                Enrollment.objects
+                .filter(course=course, status=Enrollment.WAITLISTED)
+                .order_by('requested_at', 'id')
+                .values_list('pk', flat=True)
+                .first()
+            )
+            if head is None or not _claim_seat(course.pk):
+                break
+            moved = Enrollment.objects.filter(
+                pk=head, status=Enrollment.WAITLISTED
+            ).update(status=Enrollment.ENROLLED)
+            if not moved:
+                # Someone dropped or promoted this row first; give the seat back.
+                _release_seat(course.pk)
+                continue
+            promoted += 1
+    return promoted
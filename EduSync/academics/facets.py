@@ -0,0 +1,166 @@
+"""
+Facet counts for the course catalog.
+
+``CourseFacet`` holds, per institution, how many courses carry each
+department, credit value, duration, tuition band and teacher. The counts
+are adjusted by +1/-1 deltas from model signals when a course is created,
+edited, deleted or has its teachers changed, so rendering the catalog
+sidebar is a single indexed read of that institution's facet rows.
+
+Bulk writes that bypass signals (``bulk_create``, ``QuerySet.update``,
+snapshot restores) should be followed by ``rebuild()``.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Course, CourseFacet
+
+# Lower bounds of the tuition bands; the last band is open-ended.
+TUITION_BANDS = (0, 1000, 5000, 10000, 25000)
+
+FACET_FIELDS = ('institution_id', 'department', 'credits', 'duration_months', 'tuition_fee')
+
+
+def tuition_band(fee):
+    fee = Decimal(fee or 0)
+    lower = TUITION_BANDS[0]
+    for bound in TUITION_BANDS[1:]:
+        if fee < bound:
+            return f'{lower}-{bound}'
+        lower = bound
+    return f'{lower}+'
+
+
+def band_range(value):
+    """``(lower, upper)`` of a tuition band value; upper is None for the last band."""
+    lower, _, upper = value.rstrip('+').partition('-')
+    return Decimal(lower), (Decimal(upper) if upper else None)
+
+
+def _course_facets(values):
+    facets = [
+        (CourseFacet.CREDITS, str(values['credits'])),
+        (CourseFacet.DURATION, str(values['duration_months'])),
+        (CourseFacet.TUITION, tuition_band(values['tuition_fee'])),
+    ]
+    if values['department']:
+        facets.append((CourseFacet.DEPARTMENT, values['department']))
+    return facets
+
+
+def apply(institution_id, deltas):
+    """Add ``{(facet, value): delta}`` to the institution's counts."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        CourseFacet.objects.bulk_create(
+            [
+                CourseFacet(institution_id=institution_id, facet=facet, value=value[:100])
+                for (facet, value), delta in deltas.items() if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        for (facet, value), delta in deltas.items():
+            CourseFacet.objects.filter(
+                institution_id=institution_id, facet=facet, value=value[:100]
+            ).update(count=F('count') + delta)
+        CourseFacet.objects.filter(institution_id=institution_id, count__lte=0).delete()
+
+
+def rebuild(institution_id):
+    """Recount one institution from scratch (GROUP BY over its courses only)."""
+    courses = Course.objects.filter(institution_id=institution_id)
+    counts = Counter()
+    for values in courses.values(*FACET_FIELDS).iterator():
+        counts.update(_course_facets(values))
+    teacher_counts = Course.teachers.through.objects.filter(
+        course__institution_id=institution_id
+    ).values('teacher_id').annotate(n=Count('id'))
+    for row in teacher_counts:
+        counts[(CourseFacet.TEACHER, str(row['teacher_id']))] = row['n']
+
+    with transaction.atomic():
+        CourseFacet.objects.filter(institution_id=institution_id).delete()
+        CourseFacet.objects.bulk_create([
+            CourseFacet(institution_id=institution_id, facet=facet, value=value[:100], count=count)
+            for (facet, value), count in counts.items()
+        ])
+
+
+# Signal receivers ---------------------------------------------------------
+
+def course_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._facet_before = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    if update_fields is not None and not set(update_fields) & set(FACET_FIELDS + ('institution',)):
+        return
+    instance._facet_before = Course.objects.filter(pk=instance.pk).values(*FACET_FIELDS).first()
+
+
+def course_post_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_facet_before', None)
+    if not created and before is None:
+        return
+    after = {field: getattr(instance, field) for field in FACET_FIELDS}
+    if before is not None and before['institution_id'] != after['institution_id']:
+        # Moved between institutions: only happens from the Django admin.
+        rebuild(before['institution_id'])
+        rebuild(after['institution_id'])
+        return
+    deltas = Counter(_course_facets(after))
+    if before is not None:
+        deltas.subtract(_course_facets(before))
+    apply(after['institution_id'], deltas)
+
+
+def course_pre_delete(sender, instance, **kwargs):
+    # The through rows are removed by the cascade without m2m_changed.
+    instance._facet_teacher_ids = list(instance.teachers.values_list('id', flat=True))
+
+
+def course_post_delete(sender, instance, **kwargs):
+    deltas = Counter()
+    deltas.subtract(_course_facets({field: getattr(instance, field) for field in FACET_FIELDS}))
+    deltas.subtract((CourseFacet.TEACHER, str(pk)) for pk in getattr(instance, '_facet_teacher_ids', ()))
+    apply(instance.institution_id, deltas)
+
+
+def teachers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """m2m_changed receiver for ``Course.teachers``, from either side."""
+    if action == 'pre_clear':
+        if reverse:
+            instance._facet_cleared = list(instance.course_set.values_list('id', flat=True))
+        else:
+            instance._facet_cleared = list(instance.teachers.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set, sign = set(getattr(instance, '_facet_cleared', ())), -1
+    elif action == 'post_add':
+        sign = 1
+    elif action == 'post_remove':
+        sign = -1
+    else:
+        return
+    if not pk_set:
+        return
+
+    if reverse:
+        # instance is a Teacher, pk_set are course ids
+        deltas = Counter()
+        for institution_id in Course.objects.filter(pk__in=pk_set).values_list('institution_id', flat=True):
+            deltas[institution_id] += sign
+        for institution_id, delta in deltas.items():
+            apply(institution_id, {(CourseFacet.TEACHER, str(instance.pk)): delta})
+    else:
+        apply(instance.institution_id, {(CourseFacet.TEACHER, str(pk)): sign for pk in pk_set})
+
+
+def teacher_pre_delete(sender, instance, **kwargs):
+    CourseFacet.objects.filter(facet=CourseFacet.TEACHER, value=str(instance.pk)).delete()
@@ -5,7 +5,7 @@ from .models import Course
 class CourseForm(forms.ModelForm):
     class Meta:
         model = Course
-        fields = ["code", "name", "description", "credits", "duration_months", "department", "tuition_fee"]
+        fields = ["code", "name", "description", "credits", "duration_months", "department", "tuition_fee", "capacity"]
         widgets = {
             "code": forms.TextInput(attrs={"class": "form-control"}),
             "name": forms.TextInput(attrs={"class": "form-control"}),
@@ -13,4 +13,5 @@ class CourseForm(forms.ModelForm):
             "description": forms.Textarea(attrs={"rows": 4, "class": "form-control"}),
             "department": forms.TextInput(attrs={"class": "form-control"}),
             "tuition_fee": forms.NumberInput(attrs={"class": "form-control"}),
+            "capacity": forms.NumberInput(attrs={"class": "form-control"}),
         }
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academics.models import Course
+from academics.standings import refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute course and cohort rank/percentile for every graded student. Standings are "
+        "kept current as grades change; run this after bulk imports or restores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--institution', help='Only courses of this institution (name).')
+
+    def handle(self, *args, **options):
+        course_ids = None
+        if options['institution']:
+            course_ids = list(Course.objects.filter(
+                institution__name=options['institution']
+            ).values_list('id', flat=True))
+            if not course_ids:
+                raise CommandError(f"No courses found for {options['institution']!r}")
+
+        start = time.perf_counter()
+        written = refresh(course_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} standings in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0005_course_department_course_tuition_fee'),
+        ('student', '0003_student_address_student_blood_group_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('enrolled', 'Enrolled'), ('waitlisted', 'Waitlisted'), ('dropped', 'Dropped')], default='waitlisted', max_length=20)),
+                ('requested_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'status', 'requested_at'], name='academics_e_course__510b7c_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+    ]
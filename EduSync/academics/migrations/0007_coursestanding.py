@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0006_course_capacity_enrollment'),
+        ('student', '0003_student_address_student_blood_group_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('dense_rank', models.PositiveIntegerField()),
+                ('percentile', models.FloatField()),
+                ('course_size', models.PositiveIntegerField()),
+                ('cohort_rank', models.PositiveIntegerField()),
+                ('cohort_dense_rank', models.PositiveIntegerField()),
+                ('cohort_percentile', models.FloatField()),
+                ('cohort_size', models.PositiveIntegerField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academics.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='student.student')),
+            ],
+            options={
+                'unique_together': {('student', 'course')},
+            },
+        ),
+    ]
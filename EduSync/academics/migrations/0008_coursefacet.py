@@ -0,0 +1,71 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:10
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_facets(apps, schema_editor):
+    from academics.facets import tuition_band
+
+    Course = apps.get_model('academics', 'Course')
+    CourseFacet = apps.get_model('academics', 'CourseFacet')
+    counts = Counter()
+    rows = Course.objects.values_list(
+        'institution_id', 'department', 'credits', 'duration_months', 'tuition_fee'
+    ).iterator(chunk_size=2000)
+    for institution_id, department, credits, duration, fee in rows:
+        counts[(institution_id, 'credits', str(credits))] += 1
+        counts[(institution_id, 'duration', str(duration))] += 1
+        counts[(institution_id, 'tuition', tuition_band(fee))] += 1
+        if department:
+            counts[(institution_id, 'department', department[:100])] += 1
+    teacher_counts = Course.teachers.through.objects.values(
+        'course__institution_id', 'teacher_id'
+    ).annotate(n=Count('id'))
+    for row in teacher_counts:
+        counts[(row['course__institution_id'], 'teacher', str(row['teacher_id']))] = row['n']
+    CourseFacet.objects.bulk_create(
+        [
+            CourseFacet(institution_id=institution_id, facet=facet, value=value, count=n)
+            for (institution_id, facet, value), n in counts.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0007_coursestanding'),
+        ('institution', '0003_news'),
+        ('teacher', '0003_teacher_address_teacher_contract_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('department', 'Department'), ('credits', 'Credits'), ('duration', 'Duration'), ('tuition', 'Tuition'), ('teacher', 'Teacher')], max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['institution', 'department'], name='academics_c_institu_658e1a_idx'),
+        ),
+        migrations.AddField(
+            model_name='coursefacet',
+            name='institution',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='institution.institution'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursefacet',
+            unique_together={('institution', 'facet', 'value')},
+        ),
+        migrations.RunPython(build_facets, migrations.RunPython.noop),
+    ]
@@ -17,10 +17,18 @@ class Course(models.Model):
     duration_months = models.PositiveIntegerField(default=0)
     department = models.CharField(max_length=100, blank=True)
     tuition_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Seat accounting for Enrollment. A null capacity means unlimited seats.
+    # seats_taken is only ever changed through conditional UPDATEs in
+    # academics.enrollment, never through a read-modify-write save().
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    seats_taken = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('institution', 'code')
+        indexes = [
+            models.Index(fields=['institution', 'department']),
+        ]
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -54,3 +62,98 @@ class Grade(models.Model):
 
     def __str__(self):
         return f"{self.student} - {self.course} : {self.grade}"
+
+
+class Enrollment(models.Model):
+    ENROLLED = 'enrolled'
+    WAITLISTED = 'waitlisted'
+    DROPPED = 'dropped'
+    STATUS_CHOICES = [
+        (ENROLLED, 'Enrolled'),
+        (WAITLISTED, 'Waitlisted'),
+        (DROPPED, 'Dropped'),
+    ]
+
+    student = models.ForeignKey(
+        'student.Student', on_delete=models.CASCADE
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=WAITLISTED
+    )
+    # Position in the FIFO waitlist; reset whenever the student re-registers.
+    requested_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'status', 'requested_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.course} ({self.status})"
+
+
+class CourseStanding(models.Model):
+    """
+    Where a student stands in a course, by marks: against everyone graded
+    in the course and against classmates of the same academic_year (cohort).
+    Derived from Grade and maintained by academics.standings; never edited
+    by hand.
+    """
+    student = models.ForeignKey(
+        'student.Student', on_delete=models.CASCADE
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE
+    )
+    rank = models.PositiveIntegerField()
+    dense_rank = models.PositiveIntegerField()
+    percentile = models.FloatField()
+    course_size = models.PositiveIntegerField()
+    cohort_rank = models.PositiveIntegerField()
+    cohort_dense_rank = models.PositiveIntegerField()
+    cohort_percentile = models.FloatField()
+    cohort_size = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('student', 'course')
+
+    def __str__(self):
+        return f"{self.student} - {self.course} : #{self.rank}"
+
+
+class CourseFacet(models.Model):
+    """
+    Number of an institution's courses per facet value, for the catalog
+    sidebar. Maintained incrementally by academics.facets as courses change,
+    so the catalog never has to GROUP BY the course table.
+    """
+    DEPARTMENT = 'department'
+    CREDITS = 'credits'
+    DURATION = 'duration'
+    TUITION = 'tuition'
+    TEACHER = 'teacher'
+    FACET_CHOICES = [
+        (DEPARTMENT, 'Department'),
+        (CREDITS, 'Credits'),
+        (DURATION, 'Duration'),
+        (TUITION, 'Tuition'),
+        (TEACHER, 'Teacher'),
+    ]
+
+    institution = models.ForeignKey(
+        Institution, on_delete=models.CASCADE
+    )
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('institution', 'facet', 'value')
+
+    def __str__(self):
+        return f"{self.institution} {self.facet}={self.value} ({self.count})"
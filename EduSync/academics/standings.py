@@ -0,0 +1,141 @@
+"""
+Rank, dense rank and percentile per (course, student).
+
+Standings are computed with window functions over ``Grade`` ordered by
+marks, partitioned by course and by (course, academic_year) for the cohort
+figures, and upserted into ``CourseStanding``. The percentile is the share
+of the partition scoring at or below the student (CUME_DIST), so the top
+mark is the 100th percentile.
+
+A saved or deleted grade only marks its course dirty; the course is
+recomputed once when the transaction commits, however many of its grades
+changed. A saved student marks their courses dirty only when their
+``academic_year`` (and so their cohort) changed.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Window
+from django.db.models.functions import CumeDist, DenseRank, Rank
+
+from .models import CourseStanding, Grade
+
+CHUNK_SIZE = 2000
+FIELDS = (
+    'rank', 'dense_rank', 'percentile', 'course_size',
+    'cohort_rank', 'cohort_dense_rank', 'cohort_percentile', 'cohort_size',
+)
+
+
+def _ranked(grades):
+    by_marks = F('marks').desc()
+    course = [F('course_id')]
+    cohort = [F('course_id'), F('student__academic_year')]
+    return grades.annotate(
+        rank=Window(Rank(), partition_by=course, order_by=by_marks),
+        dense_rank=Window(DenseRank(), partition_by=course, order_by=by_marks),
+        percentile=Window(CumeDist(), partition_by=course, order_by=F('marks').asc()),
+        course_size=Window(Count('id'), partition_by=course),
+        cohort_rank=Window(Rank(), partition_by=cohort, order_by=by_marks),
+        cohort_dense_rank=Window(DenseRank(), partition_by=cohort, order_by=by_marks),
+        cohort_percentile=Window(CumeDist(), partition_by=cohort, order_by=F('marks').asc()),
+        cohort_size=Window(Count('id'), partition_by=cohort),
+    ).values_list('student_id', 'course_id', *FIELDS)
+
+
+def _standing(row):
+    values = dict(zip(FIELDS, row[2:]))
+    values['percentile'] = round(values['percentile'] * 100, 1)
+    values['cohort_percentile'] = round(values['cohort_percentile'] * 100, 1)
+    return CourseStanding(student_id=row[0], course_id=row[1], **values)
+
+
+def _upsert(rows):
+    CourseStanding.objects.bulk_create(
+        [_standing(row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['student', 'course'],
+        update_fields=list(FIELDS),
+    )
+
+
+def refresh(course_ids=None):
+    """Recompute the given courses (all courses if None). Returns rows written."""
+    grades = Grade.objects.all()
+    standings = CourseStanding.objects.all()
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        if not course_ids:
+            return 0
+        grades = grades.filter(course_id__in=course_ids)
+        standings = standings.filter(course_id__in=course_ids)
+
+    written = 0
+    with transaction.atomic():
+        # Students whose grade was removed no longer stand anywhere.
+        standings.exclude(
+            Exists(Grade.objects.filter(student_id=OuterRef('student_id'), course_id=OuterRef('course_id')))
+        ).delete()
+
+        chunk = []
+        for row in _ranked(grades).order_by('course_id').iterator(chunk_size=CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                _upsert(chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            _upsert(chunk)
+            written += len(chunk)
+    return written
+
+
+# Courses marked dirty by this thread and not refreshed yet.
+_pending = threading.local()
+
+
+def _refresh_pending():
+    course_ids = getattr(_pending, 'course_ids', None)
+    if course_ids:
+        _pending.course_ids = set()
+        refresh(course_ids)
+
+
+def mark_dirty(course_ids):
+    """Recompute these courses once the current transaction commits."""
+    if not transaction.get_connection().in_atomic_block:
+        refresh(course_ids)
+        return
+    if not hasattr(_pending, 'course_ids'):
+        _pending.course_ids = set()
+    _pending.course_ids.update(course_ids)
+    # Every mark queues the same cheap callback: the first to run after the
+    # commit refreshes all courses marked so far, the others find none left.
+    # Marks from a rolled-back block stay pending and are refreshed (with
+    # no change) by the next commit; none are lost.
+    transaction.on_commit(_refresh_pending)
+
+
+def grade_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for ``Grade``."""
+    mark_dirty([instance.course_id])
+
+
+def student_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """pre_save receiver for ``Student``: remember the stored academic_year."""
+    instance._standings_year = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'academic_year' not in update_fields:
+        return
+    instance._standings_year = sender.objects.filter(pk=instance.pk).values_list('academic_year', flat=True).first()
+
+
+def student_changed(sender, instance, created=False, **kwargs):
+    """post_save receiver for ``Student``: a new academic_year moves them to another cohort."""
+    before = getattr(instance, '_standings_year', None)
+    if created or before is None or before == instance.academic_year:
+        return
+    course_ids = list(Grade.objects.filter(student_id=instance.pk).values_list('course_id', flat=True))
+    if course_ids:
+        mark_dirty(course_ids)
@@ -1,3 +1,353 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.signup import register_institution
+from core import generations
+from student.forms import StudentEditForm
+from student.models import Student
+from teacher.models import Teacher
+
+from . import assignments, choices, enrollment, facets, standings, transcript
+from .models import Course, CourseFacet, Enrollment, Grade
+
+
+def create_students(institution, count):
+    students = []
+    for i in range(count):
+        user = User.objects.create_user(f'student{i}', password='pw')
+        students.append(Student.objects.create(user=user, institution=institution, student_id=f'S{i}'))
+    return students
+
+
+def create_teachers(institution, count):
+    return [
+        Teacher.objects.create(
+            user=User.objects.create_user(f'teacher{i}', password='pw'), institution=institution,
+            employee_id=f'E{i}', department='Science', qualification='MSc',
+        )
+        for i in range(count)
+    ]
+
+
+def facet_counts(institution_id):
+    return sorted(CourseFacet.objects.filter(institution_id=institution_id).values_list('facet', 'value', 'count'))
+
+
+class StandingsSignalTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        institution = admin.userprofile.institution
+        self.course = Course.objects.create(institution=institution, code='CS101', name='Intro')
+        user = User.objects.create_user('student0', password='pw')
+        self.student = Student.objects.create(user=user, institution=institution, student_id='S0', academic_year='Year 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(student=self.student, course=self.course, grade='A', marks=90)
+
+    def test_only_a_new_academic_year_reranks(self):
+        with mock.patch.object(standings, 'refresh') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.student.parent_name = 'Jane'
+                self.student.save()
+            refresh.assert_not_called()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.student.academic_year = 'Year 2'
+                self.student.save()
+        refresh.assert_called_once_with({self.course.pk})
+
+    def test_rolled_back_block_does_not_swallow_later_marks(self):
+        with mock.patch.object(standings, 'refresh') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        standings.mark_dirty([1])
+                        raise DatabaseError
+                except DatabaseError:
+                    pass
+                standings.mark_dirty([2])
+                standings.mark_dirty([3])
+        refresh.assert_called_once_with({1, 2, 3})
+
+
+class WaitlistTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        institution = admin.userprofile.institution
+        self.course = Course.objects.create(institution=institution, code='CS101', name='Intro', capacity=1)
+        self.students = create_students(institution, 4)
+
+    def statuses(self):
+        by_student = dict(Enrollment.objects.values_list('student_id', 'status'))
+        return [by_student.get(student.pk) for student in self.students]
+
+    def test_freed_seats_go_to_the_waitlist_in_order(self):
+        for student in self.students:
+            enrollment.register(student, self.course)
+        self.assertEqual(self.statuses(), ['enrolled', 'waitlisted', 'waitlisted', 'waitlisted'])
+        last = Enrollment.objects.get(student=self.students[3])
+        self.assertEqual(enrollment.waitlist_position(last), 3)
+
+        enrollment.drop(self.students[0], self.course)
+        self.assertEqual(self.statuses(), ['dropped', 'enrolled', 'waitlisted', 'waitlisted'])
+
+        Course.objects.filter(pk=self.course.pk).update(capacity=2)
+        self.assertEqual(enrollment.promote_waitlist(self.course), 1)
+        self.assertEqual(self.statuses(), ['dropped', 'enrolled', 'enrolled', 'waitlisted'])
+
+    def test_reregistering_after_a_drop_joins_the_back_of_the_queue(self):
+        for student in self.students[:3]:
+            enrollment.register(student, self.course)
+        enrollment.drop(self.students[1], self.course)
+        enrollment.register(self.students[1], self.course)
+        enrollment.drop(self.students[0], self.course)
+        self.assertEqual(self.statuses()[:3], ['dropped', 'waitlisted', 'enrolled'])
+
+
+class ParallelEnrollmentTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('threads need a file-backed test database')
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        institution = admin.userprofile.institution
+        self.course = Course.objects.create(institution=institution, code='CS101', name='Intro', capacity=1)
+        self.students = create_students(institution, self.workers)
+
+    def test_last_seat_goes_to_exactly_one_student(self):
+        barrier = threading.Barrier(self.workers)
+        results = [None] * self.workers
+
+        def attempt(index):
+            try:
+                barrier.wait()
+                for attempt in range(50):
+                    try:
+                        results[index] = enrollment.register(self.students[index], self.course).status
+                        return
+                    except OperationalError:
+                        # lock timeout: back off and retry like a client would
+                        time.sleep(0.01 * attempt)
+                results[index] = 'locked'
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['enrolled'] + ['waitlisted'] * (self.workers - 1), results)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+        self.assertEqual(Enrollment.objects.filter(status=Enrollment.ENROLLED).count(), 1)
+
+
+class TranscriptTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        institution = admin.userprofile.institution
+        self.student, = create_students(institution, 1)
+        self.cs101 = Course.objects.create(institution=institution, code='CS101', name='Intro', credits=4)
+        self.cs102 = Course.objects.create(institution=institution, code='CS102', name='Systems', credits=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grades = [
+                self.grade(self.cs101, 'A', 2025, 3),
+                self.grade(self.cs102, 'F', 2025, 4),
+            ]
+
+    def grade(self, course, letter, year, month):
+        grade = Grade.objects.create(student=self.student, course=course, grade=letter, marks=50)
+        Grade.objects.filter(pk=grade.pk).update(date_assigned=grade.date_assigned.replace(year=year, month=month, day=1))
+        return grade
+
+    def test_terms_and_totals(self):
+        with self.assertNumQueries(1):
+            result = transcript.build_transcript(self.student.pk)
+        self.assertEqual([term['label'] for term in result['terms']], ['Spring 2025'])
+        self.assertEqual((result['courses'], result['credits_attempted'], result['credits_earned']), (2, 6, 4))
+        self.assertEqual(result['gpa'], 2.67)  # 4 * 4 points over 6 credits
+        self.assertEqual(result['progress'], 3)  # 4 of 120 credits
+
+    def test_grade_change_rebuilds_the_cached_transcript(self):
+        self.assertEqual(transcript.get_transcript(self.student)['gpa'], 2.67)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grades[1].grade = 'A'
+            self.grades[1].save()
+        self.assertEqual(transcript.get_transcript(self.student)['gpa'], 4.0)
+
+    def test_course_change_rebuilds_the_cached_transcript(self):
+        self.assertEqual(transcript.get_transcript(self.student)['credits_attempted'], 6)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cs102.credits = 3
+            self.cs102.save()
+        self.assertEqual(transcript.get_transcript(self.student)['credits_attempted'], 7)
+
+
+class CourseFacetTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        self.teachers = create_teachers(self.institution, 3)
+        self.cs101 = Course.objects.create(
+            institution=self.institution, code='CS101', name='Intro', department='Science',
+            credits=4, duration_months=6, tuition_fee=1200,
+        )
+        self.cs102 = Course.objects.create(
+            institution=self.institution, code='CS102', name='Systems', department='Science', credits=3,
+        )
+        self.cs101.teachers.set(self.teachers[:2])
+        self.cs102.teachers.set(self.teachers[1:])
+
+    def assertMatchesRebuild(self):
+        counts = facet_counts(self.institution.pk)
+        facets.rebuild(self.institution.pk)
+        self.assertEqual(counts, facet_counts(self.institution.pk))
+        return dict(((facet, value), count) for facet, value, count in counts)
+
+    def test_course_edit(self):
+        self.cs101.department = 'Arts'
+        self.cs101.credits = 3
+        self.cs101.tuition_fee = 30000
+        self.cs101.save()
+        counts = self.assertMatchesRebuild()
+        self.assertEqual(counts[(CourseFacet.CREDITS, '3')], 2)
+        self.assertEqual(counts[(CourseFacet.DEPARTMENT, 'Science')], 1)
+        self.assertNotIn((CourseFacet.CREDITS, '4'), counts)
+
+    def test_course_delete(self):
+        self.cs101.delete()
+        counts = self.assertMatchesRebuild()
+        self.assertNotIn((CourseFacet.TEACHER, str(self.teachers[0].pk)), counts)
+        self.assertEqual(counts[(CourseFacet.TEACHER, str(self.teachers[1].pk))], 1)
+
+    def test_teachers_changed_from_the_course_side(self):
+        self.cs101.teachers.add(self.teachers[2])
+        self.assertMatchesRebuild()
+        self.cs101.teachers.remove(self.teachers[0])
+        self.assertMatchesRebuild()
+        self.cs101.teachers.clear()
+        counts = self.assertMatchesRebuild()
+        self.assertEqual(counts[(CourseFacet.TEACHER, str(self.teachers[1].pk))], 1)
+
+    def test_teachers_changed_from_the_teacher_side(self):
+        teacher = self.teachers[0]
+        teacher.course_set.add(self.cs102)
+        self.assertMatchesRebuild()
+        teacher.course_set.remove(self.cs101)
+        self.assertMatchesRebuild()
+        teacher.course_set.clear()
+        counts = self.assertMatchesRebuild()
+        self.assertNotIn((CourseFacet.TEACHER, str(teacher.pk)), counts)
+
+    def test_teacher_delete(self):
+        self.teachers[1].delete()
+        counts = self.assertMatchesRebuild()
+        self.assertNotIn((CourseFacet.TEACHER, str(self.teachers[1].pk)), counts)
+        self.assertEqual(counts[(CourseFacet.TEACHER, str(self.teachers[0].pk))], 1)
+
+
+class AssignmentSyncTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        self.teachers = create_teachers(self.institution, 2)
+        self.courses = [
+            Course.objects.create(institution=self.institution, code=f'CS10{i}', name='Intro') for i in range(3)
+        ]
+        self.courses[0].teachers.set(self.teachers)
+        self.courses[1].teachers.set(self.teachers[:1])
+
+    def pairs(self, *indices):
+        return {(self.courses[c].pk, self.teachers[t].pk) for c, t in indices}
+
+    def assertFacetsMatchRebuild(self):
+        counts = facet_counts(self.institution.pk)
+        facets.rebuild(self.institution.pk)
+        self.assertEqual(counts, facet_counts(self.institution.pk))
+
+    def test_sync_applies_the_difference(self):
+        before = generations.current(self.institution.pk, generations.COURSES, generations.ROSTER)
+        with self.captureOnCommitCallbacks(execute=True):
+            result = assignments.sync(self.institution, self.pairs((0, 0), (2, 0), (2, 1)))
+        self.assertEqual(result, (2, 2))
+        self.assertEqual(assignments.current(self.institution), self.pairs((0, 0), (2, 0), (2, 1)))
+        self.assertFacetsMatchRebuild()
+        self.assertNotEqual(generations.current(self.institution.pk, generations.COURSES, generations.ROSTER), before)
+
+    def test_unchanged_set_writes_nothing(self):
+        self.assertEqual(assignments.sync(self.institution, assignments.current(self.institution)), (0, 0))
+
+    def test_teacher_column_leaves_other_teachers_alone(self):
+        # The second teacher's pairs in the input are ignored.
+        result = assignments.sync(self.institution, self.pairs((1, 0), (2, 0), (1, 1)), teacher=self.teachers[0])
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(assignments.current(self.institution), self.pairs((1, 0), (2, 0), (0, 1)))
+        self.assertFacetsMatchRebuild()
+
+    def test_ids_from_another_institution_are_rejected(self):
+        other = register_institution('Other High', 'other', 'admin@other.edu', 's3cret!pw').userprofile.institution
+        course = Course.objects.create(institution=other, code='CS101', name='Intro')
+        teacher = Teacher.objects.create(
+            user=User.objects.create_user('outsider', password='pw'), institution=other,
+            employee_id='X1', department='Science', qualification='MSc',
+        )
+        for pairs in ({(course.pk, self.teachers[0].pk)}, {(self.courses[0].pk, teacher.pk)}, {('x', 1)}):
+            with self.subTest(pairs=pairs), self.assertRaises(assignments.AssignmentError):
+                assignments.sync(self.institution, pairs)
+        self.assertEqual(assignments.current(self.institution), self.pairs((0, 0), (0, 1), (1, 0)))
+
+
+class CourseChoicesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = self.admin.userprofile.institution
+        self.courses = [
+            Course.objects.create(institution=self.institution, code=code, name=name)
+            for code, name in (('MA101', 'Discrete CS'), ('CS102', 'Systems'), ('CS101', 'Intro'))
+        ]
+        other = register_institution('Other High', 'other', 'admin@other.edu', 's3cret!pw').userprofile.institution
+        Course.objects.create(institution=other, code='CS100', name='Elsewhere')
+
+    def test_form_render_runs_no_course_query(self):
+        student, = create_students(self.institution, 1)
+        student.course = self.courses[1]
+        choices.course_choices(self.institution.pk)  # warm the cache
+        form = StudentEditForm(student=student, institution=self.institution)
+        with CaptureQueriesContext(connection) as queries:
+            html = form.as_p()
+        self.assertIn('CS102 - Systems', html)
+        self.assertNotIn('CS101 - Intro', html)
+        self.assertFalse([q['sql'] for q in queries if 'academics_course' in q['sql']])
+
+    def test_search_puts_code_prefixes_first_and_stays_in_the_institution(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('course_choices'), {'q': 'cs'})
+        self.assertEqual(
+            [r['text'] for r in response.json()['results']],
+            ['CS101 - Intro', 'CS102 - Systems', 'MA101 - Discrete CS'],
+        )
+        self.assertEqual(
+            choices.labels(self.institution.pk, [self.courses[0].pk, 'x', 10 ** 6]),
+            {self.courses[0].pk: 'MA101 - Discrete CS'},
+        )
+
+    def test_saving_a_course_refreshes_the_list(self):
+        self.assertEqual(len(choices.course_choices(self.institution.pk)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.courses[0].code = 'AA101'
+            self.courses[0].save()
+        self.assertEqual(choices.course_choices(self.institution.pk)[0], (self.courses[0].pk, 'AA101 - Discrete CS'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.courses[1].delete()
+        self.assertEqual(len(choices.course_choices(self.institution.pk)), 2)
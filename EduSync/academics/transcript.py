@@ -0,0 +1,109 @@
+"""
+Student transcripts.
+
+The whole transcript comes out of one query: every ``Grade`` row of the
+student, ordered by ``date_assigned``, annotated with window aggregates for
+the running totals (credits attempted / earned, quality points) and with the
+per-term subtotals partitioned by term. Terms are half years: grades assigned
+January-June belong to Spring, July-December to Fall.
+
+The result is cached per student under the institution's ``grades`` and
+``courses`` generations (core/generations.py). Any grade or course change
+bumps one of them once its transaction commits, so every worker rebuilds
+the transcript on its next request. Concurrent misses for the same student
+build it once (single_flight).
+"""
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When, Window
+from django.db.models.functions import ExtractYear
+
+from core import generations
+
+from .models import Grade
+
+GRADE_POINTS = {'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
+NAMESPACES = (generations.GRADES, generations.COURSES)
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _gpa(points, credits):
+    return round(points / credits, 2) if credits else None
+
+
+def build_transcript(student_id):
+    """Terms with their grade rows, term GPA and cumulative totals (uncached)."""
+    points = Case(
+        *[When(grade=grade, then=Value(value)) for grade, value in GRADE_POINTS.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    quality_points = points * F('course__credits')
+    earned = Case(When(grade='F', then=Value(0)), default=F('course__credits'), output_field=IntegerField())
+    term_year = ExtractYear('date_assigned')
+    term_half = Case(When(date_assigned__month__lte=6, then=Value(1)), default=Value(2), output_field=IntegerField())
+    running = [F('date_assigned').asc(), F('id').asc()]
+    term = [term_year, term_half]
+
+    rows = (
+        Grade.objects.filter(student_id=student_id)
+        .annotate(
+            term_year=term_year,
+            term_half=term_half,
+            points=points,
+            credits_earned=earned,
+            cumulative_courses=Window(Count('id'), order_by=running),
+            cumulative_attempted=Window(Sum('course__credits'), order_by=running),
+            cumulative_earned=Window(Sum(earned), order_by=running),
+            cumulative_points=Window(Sum(quality_points), order_by=running),
+            term_attempted=Window(Sum('course__credits'), partition_by=term),
+            term_earned=Window(Sum(earned), partition_by=term),
+            term_points=Window(Sum(quality_points), partition_by=term),
+        )
+        .order_by(*running)
+        .values(
+            'course__code', 'course__name', 'course__credits', 'grade', 'marks', 'date_assigned',
+            'term_year', 'term_half', 'points', 'credits_earned',
+            'cumulative_courses', 'cumulative_attempted', 'cumulative_earned', 'cumulative_points',
+            'term_attempted', 'term_earned', 'term_points',
+        )
+    )
+
+    terms = []
+    for row in rows:
+        row['cumulative_gpa'] = _gpa(row['cumulative_points'], row['cumulative_attempted'])
+        key = (row['term_year'], row['term_half'])
+        if not terms or terms[-1]['key'] != key:
+            terms.append({
+                'key': key,
+                'label': f"{'Spring' if row['term_half'] == 1 else 'Fall'} {row['term_year']}",
+                'credits_attempted': row['term_attempted'],
+                'credits_earned': row['term_earned'],
+                'gpa': _gpa(row['term_points'], row['term_attempted']),
+                'rows': [],
+            })
+        term = terms[-1]
+        term['rows'].append(row)
+        # Cumulative figures as of the end of the term.
+        term['cumulative_gpa'] = row['cumulative_gpa']
+        term['cumulative_earned'] = row['cumulative_earned']
+
+    last = terms[-1]['rows'][-1] if terms else None
+    required = getattr(settings, 'DEGREE_CREDITS_REQUIRED', 0)
+    credits_earned = last['cumulative_earned'] if last else 0
+    return {
+        'terms': terms,
+        'courses': last['cumulative_courses'] if last else 0,
+        'credits_attempted': last['cumulative_attempted'] if last else 0,
+        'credits_earned': credits_earned,
+        'gpa': last['cumulative_gpa'] if last else None,
+        'credits_required': required,
+        'progress': min(100, round(credits_earned * 100 / required)) if required else None,
+    }
+
+
+def get_transcript(student):
+    """The cached transcript of ``student`` (a ``Student``)."""
+    return generations.cached(
+        student.institution_id, NAMESPACES, f'transcript:{student.pk}',
+        lambda: build_transcript(student.pk), CACHE_TIMEOUT,
+    )
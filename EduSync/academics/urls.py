@@ -3,8 +3,13 @@ from . import views
 
 urlpatterns = [
     path('courses/', views.course_list, name='course_list'),
+    path('courses/choices/', views.course_choices, name='course_choices'),
+    path('courses/teachers/', views.course_teacher_matrix, name='course_teacher_matrix'),
+    path('courses/teachers/assignments/', views.course_teacher_assignments, name='course_teacher_assignments'),
     path('courses/add/', views.course_create, name='course_create'),
     path('courses/<int:course_id>/', views.course_detail, name='course_detail'),
     path('courses/<int:course_id>/edit/', views.course_edit, name='course_edit'),
     path('courses/<int:course_id>/delete/', views.course_delete, name='course_delete'),
+    path('courses/<int:course_id>/register/', views.course_register, name='course_register'),
+    path('courses/<int:course_id>/drop/', views.course_drop, name='course_drop'),
 ]
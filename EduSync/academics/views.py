@@ -1,10 +1,24 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.db import IntegrityError
-from .models import Course, Grade
+from django.http import JsonResponse
+from django.core.paginator import Paginator
+from .models import Course, CourseFacet, Grade
 from .forms import CourseForm
+from . import assignments
+from . import choices
+from . import enrollment as enrollment_service
+from . import facets
+from core import generations
 from institution.models import Institution
+from student.models import Student
+from teacher.models import Teacher
+
+COURSES_PER_PAGE = 50
 
 
 def _get_user_institution(user):
@@ -14,14 +28,92 @@ def _get_user_institution(user):
         return None
 
 
+def _facet_sidebar(request, institution):
+    """Facet groups for the catalog sidebar, from the precomputed CourseFacet rows."""
+    groups = {facet: [] for facet, _ in CourseFacet.FACET_CHOICES}
+    for row in CourseFacet.objects.filter(institution=institution).values('facet', 'value', 'count'):
+        groups[row['facet']].append(row)
+
+    teacher_ids = [int(row['value']) for row in groups[CourseFacet.TEACHER]]
+    teacher_names = {
+        t.pk: t.user.get_full_name() or t.user.username
+        for t in Teacher.objects.filter(pk__in=teacher_ids).select_related('user')
+    }
+
+    sort_keys = {
+        CourseFacet.DEPARTMENT: lambda row: row['value'].lower(),
+        CourseFacet.CREDITS: lambda row: int(row['value']),
+        CourseFacet.DURATION: lambda row: int(row['value']),
+        CourseFacet.TUITION: lambda row: facets.band_range(row['value'])[0],
+        CourseFacet.TEACHER: lambda row: row['label'].lower(),
+    }
+    sidebar = []
+    for facet, title in CourseFacet.FACET_CHOICES:
+        selected = request.GET.get(facet)
+        rows = groups[facet]
+        for row in rows:
+            if facet == CourseFacet.TEACHER:
+                row['label'] = teacher_names.get(int(row['value']), row['value'])
+            elif facet == CourseFacet.DURATION:
+                row['label'] = f"{row['value']} months"
+            else:
+                row['label'] = row['value']
+            params = request.GET.copy()
+            params.pop('page', None)
+            row['selected'] = row['value'] == selected
+            if row['selected']:
+                params.pop(facet, None)
+            else:
+                params[facet] = row['value']
+            row['query'] = params.urlencode()
+        rows.sort(key=sort_keys[facet])
+        if rows:
+            sidebar.append({'facet': facet, 'title': title, 'values': rows})
+    return sidebar
+
+
+def _filter_courses(courses, params):
+    try:
+        if params.get(CourseFacet.DEPARTMENT):
+            courses = courses.filter(department=params[CourseFacet.DEPARTMENT])
+        if params.get(CourseFacet.CREDITS):
+            courses = courses.filter(credits=int(params[CourseFacet.CREDITS]))
+        if params.get(CourseFacet.DURATION):
+            courses = courses.filter(duration_months=int(params[CourseFacet.DURATION]))
+        if params.get(CourseFacet.TUITION):
+            lower, upper = facets.band_range(params[CourseFacet.TUITION])
+            courses = courses.filter(tuition_fee__gte=lower)
+            if upper is not None:
+                courses = courses.filter(tuition_fee__lt=upper)
+        if params.get(CourseFacet.TEACHER):
+            courses = courses.filter(teachers=int(params[CourseFacet.TEACHER]))
+    except (ValueError, ArithmeticError):
+        return courses.none()
+    return courses
+
+
 @login_required(login_url='login')
+@generations.cache_page(generations.COURSES, generations.ROSTER)
 def course_list(request):
     institution = _get_user_institution(request.user)
     if institution:
-        courses = Course.objects.filter(institution=institution)
+        courses = _filter_courses(Course.objects.filter(institution=institution), request.GET)
+        sidebar = _facet_sidebar(request, institution)
     else:
         courses = Course.objects.all()
-    context = {'courses': courses, 'institution': institution}
+        sidebar = []
+
+    page = Paginator(courses.order_by('code'), COURSES_PER_PAGE).get_page(request.GET.get('page'))
+    params = request.GET.copy()
+    params.pop('page', None)
+    context = {
+        'courses': page,
+        'page': page,
+        'institution': institution,
+        'facets': sidebar,
+        'filtered': any(request.GET.get(facet) for facet, _ in CourseFacet.FACET_CHOICES),
+        'querystring': params.urlencode(),
+    }
     return render(request, 'academics/course_list.html', context)
 
 
@@ -77,7 +169,12 @@ def course_edit(request, course_id):
     if request.method == 'POST':
         form = CourseForm(request.POST, instance=course)
         if form.is_valid():
-            form.save()
+            # Only write the edited columns so a concurrent seat allocation
+            # is never overwritten with a stale seats_taken value.
+            course = form.save(commit=False)
+            course.save(update_fields=CourseForm.Meta.fields)
+            form.save_m2m()
+            enrollment_service.promote_waitlist(course)
             return redirect('course_list')
     else:
         form = CourseForm(instance=course)
@@ -100,3 +197,120 @@ def course_delete(request, course_id):
 
     course.delete()
     return redirect('course_list')
+
+
+@login_required(login_url='login')
+def course_choices(request):
+    """Search endpoint for CourseSearchSelect: ``?q=`` matched against code and name."""
+    institution = _get_user_institution(request.user)
+    if not institution:
+        return JsonResponse({'error': 'Only institution admins can search courses.'}, status=403)
+    results = choices.search(institution.pk, request.GET.get('q', ''))
+    return JsonResponse({'results': [{'id': pk, 'text': label} for pk, label in results]})
+
+
+def _matrix_pairs(raw):
+    """``[[course_id, teacher_id], ...]`` from a JSON string or decoded value."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raise assignments.AssignmentError('Assignments are not valid JSON.')
+    if not isinstance(raw, list) or not all(isinstance(pair, list) and len(pair) == 2 for pair in raw):
+        raise assignments.AssignmentError('Assignments must be [course_id, teacher_id] pairs.')
+    return raw
+
+
+@login_required(login_url='login')
+def course_teacher_matrix(request):
+    institution = _get_user_institution(request.user)
+    if not institution:
+        return render(request, 'academics/course_teacher_matrix.html', {
+            'error': 'No institution is associated with this account.'
+        })
+
+    if request.method == 'POST':
+        try:
+            added, removed = assignments.sync(institution, _matrix_pairs(request.POST.get('assignments', '')))
+        except assignments.AssignmentError as e:
+            messages.error(request, str(e))
+        else:
+            messages.success(request, f'Assignments saved: {added} added, {removed} removed.')
+        return redirect('course_teacher_matrix')
+
+    courses = Course.objects.filter(institution=institution).only('id', 'code', 'name').order_by('code')
+    teachers = Teacher.objects.filter(institution=institution).select_related('user').order_by('user__first_name', 'user__last_name')
+
+    def rows():
+        # Called by the template only when the cached grid is stale.
+        assigned = assignments.current(institution)
+        return [
+            (course, [(teacher, (course.id, teacher.id) in assigned) for teacher in teachers])
+            for course in courses
+        ]
+
+    return render(request, 'academics/course_teacher_matrix.html', {
+        'institution_id': institution.pk,
+        'has_matrix': courses.exists() and teachers.exists(),
+        'teachers': teachers,
+        'rows': rows,
+    })
+
+
+@login_required(login_url='login')
+def course_teacher_assignments(request):
+    """
+    GET: the institution's assignments as ``{"assignments": [[course_id, teacher_id], ...]}``.
+    POST the same body to replace them; returns how many pairs were added and removed.
+    """
+    institution = _get_user_institution(request.user)
+    if not institution:
+        return JsonResponse({'error': 'Only institution admins can manage assignments.'}, status=403)
+
+    if request.method == 'POST':
+        try:
+            body = json.loads(request.body)
+            pairs = _matrix_pairs(body.get('assignments') if isinstance(body, dict) else None)
+            added, removed = assignments.sync(institution, pairs)
+        except ValueError:
+            return JsonResponse({'error': 'Request body is not valid JSON.'}, status=400)
+        except assignments.AssignmentError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'added': added, 'removed': removed})
+
+    return JsonResponse({'assignments': sorted(assignments.current(institution))})
+
+
+def _get_registering_student(request, course_id):
+    try:
+        student = Student.objects.get(user=request.user)
+    except Student.DoesNotExist:
+        return None, None
+    course = get_object_or_404(Course, id=course_id, institution_id=student.institution_id)
+    return student, course
+
+
+@login_required(login_url='login')
+@require_POST
+def course_register(request, course_id):
+    student, course = _get_registering_student(request, course_id)
+    if student is None:
+        return JsonResponse({'error': 'Only students can register for courses.'}, status=403)
+
+    enrollment = enrollment_service.register(student, course)
+    return JsonResponse({
+        'course': course.code,
+        'status': enrollment.status,
+        'waitlist_position': enrollment_service.waitlist_position(enrollment),
+    })
+
+
+@login_required(login_url='login')
+@require_POST
+def course_drop(request, course_id):
+    student, course = _get_registering_student(request, course_id)
+    if student is None:
+        return JsonResponse({'error': 'Only students can drop courses.'}, status=403)
+
+    dropped = enrollment_service.drop(student, course)
+    return JsonResponse({'course': course.code, 'dropped': dropped})
@@ -0,0 +1,51 @@
+from django import forms
+from django.urls import reverse_lazy
+
+from . import choices
+
+
+class CourseSearchSelect(forms.Widget):
+    """
+    Search-as-you-type course picker. Only the selected courses are rendered,
+    with labels from the cached choice list (academics/choices.py); matches
+    are fetched from the ``course_choices`` endpoint as the user types.
+    Pair it with a ModelChoiceField / ModelMultipleChoiceField, which still
+    validates submitted ids against its queryset.
+    """
+    template_name = 'academics/widgets/course_search.html'
+    search_url = reverse_lazy('course_choices')
+
+    class Media:
+        js = ('js/course_search.js',)
+
+    def __init__(self, institution_id, multiple=False, attrs=None):
+        super().__init__(attrs)
+        self.institution_id = institution_id
+        self.allow_multiple_selected = multiple
+
+    def format_value(self, value):
+        if value is None:
+            return []
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return [str(v) for v in value if v not in (None, '')]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        selected = context['widget']['value']
+        found = choices.labels(self.institution_id, selected)
+        context['widget'].update({
+            'multiple': self.allow_multiple_selected,
+            'search_url': self.search_url,
+            'selected': [(pk, found[int(pk)]) for pk in selected if pk.isdigit() and int(pk) in found],
+        })
+        return context
+
+    def value_from_datadict(self, data, files, name):
+        if self.allow_multiple_selected:
+            return data.getlist(name)
+        return data.get(name)
+
+    def value_omitted_from_data(self, data, files, name):
+        # An empty multi-select posts nothing at all.
+        return not self.allow_multiple_selected and name not in data
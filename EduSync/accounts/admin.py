@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import UserProfile, SignupTable, LoginTable
+from .models import IdentifierSequence, UserProfile, SignupTable, LoginTable
+from core.paginator import EstimatedCountPaginator
+from institution.admin import InstitutionListFilter
 
 @admin.register(SignupTable)
 class SignupTableAdmin(admin.ModelAdmin):
@@ -11,8 +13,21 @@ class LoginTableAdmin(admin.ModelAdmin):
     list_display = ('institution_name', 'signup', 'created_at')
     search_fields = ('institution_name',)
 
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role', 'institution')
-    list_filter = ('role',)
-    search_fields = ('user__username',)
\ No newline at end of file
+    list_filter = ('role', InstitutionListFilter)
+    list_select_related = ('user', 'institution')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(IdentifierSequence)
+class IdentifierSequenceAdmin(admin.ModelAdmin):
+    list_display = ('institution', 'prefix', 'last_value')
+    list_filter = (InstitutionListFilter,)
+    list_select_related = ('institution',)
+    readonly_fields = ('institution', 'prefix')
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+        from .roles import store_role_on_login
+
+        user_logged_in.connect(store_role_on_login, dispatch_uid='accounts.roles.store_role_on_login')
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class InstitutionBackend(ModelBackend):
+    """
+    ModelBackend that loads the user together with ``userprofile`` and its
+    institution in one joined query, both at login and when the session
+    user is fetched on every request, so ``user.userprofile`` never costs
+    another round trip.
+
+    Institution admins sign in with ``institution_name`` + password: the
+    admin is found through ``Institution.admin`` and checked against the
+    hashed ``User.password``.
+    """
+
+    def _users(self):
+        return get_user_model()._default_manager.select_related('userprofile__institution')
+
+    def authenticate(self, request, username=None, password=None, institution_name=None, **kwargs):
+        if password is None:
+            return None
+        if institution_name is not None:
+            lookup = {'institution__name': institution_name, 'userprofile__role': 'institution_admin'}
+        else:
+            if username is None:
+                username = kwargs.get(get_user_model().USERNAME_FIELD)
+            if username is None:
+                return None
+            lookup = {get_user_model().USERNAME_FIELD: username}
+
+        user = self._users().filter(**lookup).first()
+        if user is None:
+            # Run the hasher anyway so response time does not reveal
+            # whether the institution or username exists.
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        user = self._users().filter(pk=user_id).first()
+        return user if user is not None and self.user_can_authenticate(user) else None
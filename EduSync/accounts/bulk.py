@@ -0,0 +1,57 @@
+"""
+Set-based deactivation and deletion of many user accounts at once.
+
+Django's ``delete()`` collects every related object first and sends
+per-object signals, which for thousands of students or teachers means
+thousands of SELECTs and DELETEs while the write lock is held. The
+functions here issue one statement per table per batch instead; callers
+(student/bulk.py, teacher/bulk.py) delete their own rows first and run
+everything inside a single transaction.
+
+The cascade below mirrors every relation to ``User`` in this project. A
+new model pointing at ``User`` must be added to ``delete_users()``.
+"""
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import User
+
+from core.models import RequestProfile
+
+from .models import UserProfile
+
+BATCH_SIZE = 1000
+
+
+def batches(ids, size=BATCH_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def raw_delete(queryset):
+    """DELETE ... WHERE for ``queryset``: no collector, no signals."""
+    return queryset._raw_delete(queryset.db)
+
+
+def deactivate_users(user_ids):
+    """Block login for these accounts; sessions fail on their next request."""
+    changed = 0
+    for batch in batches(user_ids):
+        changed += User.objects.filter(id__in=batch, is_active=True).update(is_active=False)
+    return changed
+
+
+def delete_users(user_ids):
+    """
+    Delete these users and every row that cascades from them. Rows owned by
+    student/teacher records must already be gone. Must run inside the
+    caller's transaction.
+    """
+    deleted = 0
+    for batch in batches(user_ids):
+        raw_delete(UserProfile.objects.filter(user_id__in=batch))
+        raw_delete(LogEntry.objects.filter(user_id__in=batch))
+        raw_delete(User.groups.through.objects.filter(user_id__in=batch))
+        raw_delete(User.user_permissions.through.objects.filter(user_id__in=batch))
+        RequestProfile.objects.filter(user_id__in=batch).update(user=None)
+        deleted += raw_delete(User.objects.filter(id__in=batch))
+    return deleted
@@ -0,0 +1,99 @@
+"""
+Username and roll/employee number allocation.
+
+Numbers come from an ``IdentifierSequence`` row per (institution, prefix).
+A reservation is one conditional UPDATE (``last_value = last_value + n``)
+that row-locks the sequence until the surrounding transaction ends,
+followed by a read of the new value, so concurrent requests always get
+disjoint blocks and nothing is probed with ``exists()``. Bulk callers
+reserve a whole block at once with ``count``.
+
+Generated usernames embed the institution id (``student_7_42``), so they
+are unique across institutions without consulting the user table. A
+restored institution gets a new id, so ``rebase()`` renumbers its
+identifiers and ``reseed()`` moves its sequences past them.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import IdentifierSequence
+
+USERNAME_FORMAT = '{role}_{institution}_{number}'
+ROLL_NO_FORMAT = 'STU{institution}-{number:05d}'
+EMPLOYEE_ID_FORMAT = 'EMP{institution}-{number:04d}'
+
+# Any of the three formats; the prefix is also the sequence's prefix.
+_GENERATED = re.compile(r'(?P<prefix>[a-z]+_|STU|EMP)(?P<institution>\d+)[_-](?P<number>\d+)')
+
+
+def reserve(institution, prefix, count=1):
+    """Reserve ``count`` consecutive numbers; returns them as a range."""
+    sequence = IdentifierSequence.objects.filter(institution=institution, prefix=prefix)
+    with transaction.atomic():
+        if not sequence.update(last_value=F('last_value') + count):
+            IdentifierSequence.objects.bulk_create(
+                [IdentifierSequence(institution=institution, prefix=prefix)], ignore_conflicts=True
+            )
+            sequence.update(last_value=F('last_value') + count)
+        last = sequence.values_list('last_value', flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def usernames(institution, role, count=1):
+    return [
+        USERNAME_FORMAT.format(role=role, institution=institution.pk, number=number)
+        for number in reserve(institution, f'{role}_', count)
+    ]
+
+
+def username(institution, role):
+    return usernames(institution, role)[0]
+
+
+def roll_numbers(institution, count=1):
+    return [
+        ROLL_NO_FORMAT.format(institution=institution.pk, number=number)
+        for number in reserve(institution, 'STU', count)
+    ]
+
+
+def employee_ids(institution, count=1):
+    return [
+        EMPLOYEE_ID_FORMAT.format(institution=institution.pk, number=number)
+        for number in reserve(institution, 'EMP', count)
+    ]
+
+
+def parse(identifier):
+    """``(institution_id, prefix, number)`` of a generated identifier, or None."""
+    match = _GENERATED.fullmatch(identifier or '')
+    if match is None:
+        return None
+    return int(match['institution']), match['prefix'], int(match['number'])
+
+
+def rebase(identifier, old_institution_id, new_institution_id):
+    """
+    ``identifier`` as generated for ``new_institution_id`` if it was generated
+    for ``old_institution_id``, otherwise unchanged.
+    """
+    parsed = parse(identifier)
+    if parsed is None or parsed[0] != old_institution_id:
+        return identifier
+    _, prefix, number = parsed
+    if prefix == 'STU':
+        return ROLL_NO_FORMAT.format(institution=new_institution_id, number=number)
+    if prefix == 'EMP':
+        return EMPLOYEE_ID_FORMAT.format(institution=new_institution_id, number=number)
+    return USERNAME_FORMAT.format(role=prefix[:-1], institution=new_institution_id, number=number)
+
+
+def reseed(institution_id, prefix, last_value, using=None):
+    """Make sure the sequence never hands out ``last_value`` or anything below it again."""
+    manager = IdentifierSequence.objects.db_manager(using)
+    manager.bulk_create(
+        [IdentifierSequence(institution_id=institution_id, prefix=prefix)], ignore_conflicts=True
+    )
+    manager.filter(institution_id=institution_id, prefix=prefix, last_value__lt=last_value).update(last_value=last_value)
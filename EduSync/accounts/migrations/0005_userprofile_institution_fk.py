@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Step 1 of 3: keep the old name column as ``institution_name`` and add the
+    nullable ``institution`` foreign key next to it.
+    """
+
+    dependencies = [
+        ('accounts', '0004_remove_logintable_username_and_more'),
+        ('institution', '0003_news'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='userprofile',
+            old_name='institution',
+            new_name='institution_name',
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='institution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='institution.institution'),
+        ),
+    ]
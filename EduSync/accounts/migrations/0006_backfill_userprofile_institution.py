@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:30
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    """
+    Step 2 of 3: point every profile at its institution by name.
+
+    Runs outside a migration-wide transaction and commits one chunk of rows
+    at a time, so it never holds long locks and can simply be re-run after
+    an interruption: only rows whose foreign key is still empty are visited.
+    Profiles naming an institution that no longer exists stay NULL.
+    """
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    Institution = apps.get_model('institution', 'Institution')
+    db = schema_editor.connection.alias
+
+    pending = UserProfile.objects.using(db).filter(institution__isnull=True).exclude(institution_name='')
+    last_pk = 0
+    while True:
+        rows = list(pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'institution_name')[:CHUNK_SIZE])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        names = {name for _, name in rows}
+        ids = dict(Institution.objects.using(db).filter(name__in=names).values_list('name', 'id'))
+        by_institution = {}
+        for pk, name in rows:
+            if name in ids:
+                by_institution.setdefault(ids[name], []).append(pk)
+        with transaction.atomic(using=db):
+            for institution_id, pks in by_institution.items():
+                UserProfile.objects.using(db).filter(pk__in=pks).update(institution_id=institution_id)
+
+
+def restore_names(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    db = schema_editor.connection.alias
+    profiles = UserProfile.objects.using(db).filter(institution__isnull=False).select_related('institution')
+    for profile in profiles.iterator(chunk_size=CHUNK_SIZE):
+        UserProfile.objects.using(db).filter(pk=profile.pk).update(institution_name=profile.institution.name)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0005_userprofile_institution_fk'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore_names),
+    ]
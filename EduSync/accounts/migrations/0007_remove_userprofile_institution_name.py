@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Step 3 of 3: drop the name column once every lookup uses the key."""
+
+    dependencies = [
+        ('accounts', '0006_backfill_userprofile_institution'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='institution_name',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:50
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+
+def hash_passwords(apps, schema_editor):
+    """Replace any plaintext LoginTable password with a Django password hash."""
+    LoginTable = apps.get_model('accounts', 'LoginTable')
+    db = schema_editor.connection.alias
+    for entry in LoginTable.objects.using(db).only('pk', 'password').iterator(chunk_size=CHUNK_SIZE):
+        try:
+            identify_hasher(entry.password)
+        except ValueError:
+            LoginTable.objects.using(db).filter(pk=entry.pk).update(password=make_password(entry.password))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_remove_userprofile_institution_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_passwords, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_hash_logintable_passwords'),
+        ('institution', '0003_news'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdentifierSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=30)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+                ('institution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='institution.institution')),
+            ],
+            options={
+                'unique_together': {('institution', 'prefix')},
+            },
+        ),
+    ]
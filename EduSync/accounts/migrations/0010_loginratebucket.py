@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_identifiersequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginRateBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=80, unique=True)),
+                ('full_at', models.FloatField()),
+            ],
+        ),
+    ]
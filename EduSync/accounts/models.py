@@ -13,7 +13,7 @@ class SignupTable(models.Model):
         return self.institution_name
 
 class LoginTable(models.Model):
-    """Stores login credentials"""
+    """Stores login credentials (password is a Django password hash)"""
     signup = models.OneToOneField(SignupTable, on_delete=models.CASCADE)
     institution_name = models.CharField(max_length=200, unique=True, null=True, blank=True)
     password = models.CharField(max_length=200)
@@ -31,7 +31,37 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='institution_admin')
     phone = models.CharField(max_length=15, blank=True)
-    institution = models.CharField(max_length=200, blank=True)
+    institution = models.ForeignKey(
+        'institution.Institution', on_delete=models.SET_NULL, null=True, blank=True
+    )
     
     def __str__(self):
         return f"{self.user.username} - {self.role}"
+
+
+class IdentifierSequence(models.Model):
+    """
+    Last number handed out per institution and prefix, for generated
+    usernames and roll/employee numbers (see accounts/identifiers.py).
+    """
+    institution = models.ForeignKey('institution.Institution', on_delete=models.CASCADE)
+    prefix = models.CharField(max_length=30)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('institution', 'prefix')
+
+    def __str__(self):
+        return f"{self.institution} {self.prefix}{self.last_value}"
+
+
+class LoginRateBucket(models.Model):
+    """
+    One login rate-limit bucket (see accounts/ratelimit.py), stored as the
+    time at which it will be full again. Shared by every worker.
+    """
+    key = models.CharField(max_length=80, unique=True)
+    full_at = models.FloatField()
+
+    def __str__(self):
+        return self.key
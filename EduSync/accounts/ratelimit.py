@@ -0,0 +1,197 @@
+"""
+Token-bucket rate limiting for the login endpoints.
+
+Every attempt draws one token from a bucket per scope (client IP,
+institution, username). Buckets refill at the configured rate up to their
+burst size. An attempt is rejected, before ``authenticate()`` runs the
+password hasher, if any of its buckets is empty. Every bucket is read
+first, so under attack a rejection costs one read per bucket and takes
+no write lock; tokens are only drawn when all buckets have one.
+
+Buckets live where every worker and host can see them:
+
+* In the default cache when it is memcached or Redis (``EDUSYNC_MEMCACHED``),
+  which update counters atomically. A bucket is a counter per refill period
+  (``burst / rate``), taken with ``add()`` + ``incr()``, so it allows
+  ``burst`` attempts per period and expires on its own.
+* Otherwise in ``LoginRateBucket`` rows, each holding the time it will be
+  full again (``full_at``, the generic cell rate algorithm). A token is
+  drawn with a single conditional ``UPDATE ... SET full_at = MAX(full_at,
+  now) + interval WHERE full_at <= now + (burst - 1) * interval``, so it is
+  either drawn atomically or matches no row. Rows that are full again are
+  deleted once every ``PRUNE_INTERVAL`` seconds per worker.
+
+All buckets of an attempt are drawn together: when one turns out to be
+empty, the tokens already drawn from the others are returned.
+
+Limits come from ``settings.LOGIN_RATE_LIMITS``::
+
+    {'ip': (burst, refill_per_minute), 'institution': (...), 'username': (...)}
+
+A scope missing from the dict is not limited.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from core import metrics
+from core.cache import has_atomic_incr
+
+from .models import LoginRateBucket
+
+# A refill rate of 0 never refills; model it as one token per ten years.
+NEVER = 10 * 365 * 24 * 3600.0
+# Seconds between deletions of LoginRateBucket rows that are full again.
+PRUNE_INTERVAL = 60.0
+
+_last_prune = 0.0
+
+metrics.describe(
+    'edusync_login_attempts_total', metrics.COUNTER,
+    'Login attempts by endpoint and result (allowed/throttled), with the scope that throttled.',
+)
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket_key(endpoint, scope, value):
+    digest = hashlib.sha1(str(value).lower().encode()).hexdigest()[:20]
+    return f'rl:{endpoint}:{scope}:{digest}'
+
+
+class Throttled:
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def message(self):
+        return f'Too many login attempts. Please try again in {self.retry_after} seconds.'
+
+
+class _Empty(Exception):
+    def __init__(self, throttled):
+        self.throttled = throttled
+
+
+def _interval(per_minute):
+    return 60.0 / per_minute if per_minute else NEVER
+
+
+def _retry_after(seconds, per_minute):
+    return max(math.ceil(seconds), 1) if per_minute else 60
+
+
+class _CacheBuckets:
+    """Counters per refill period in a cache with atomic ``incr()``."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _slot(self, key, burst, per_minute, now):
+        period = burst * _interval(per_minute)
+        slot = int(now // period)
+        return f'{key}:{slot}', (slot + 1) * period - now
+
+    def peek(self, scope, key, burst, per_minute, now):
+        slot_key, remaining = self._slot(key, burst, per_minute, now)
+        if (self.cache.get(slot_key) or 0) >= burst:
+            raise _Empty(Throttled(scope, _retry_after(remaining, per_minute)))
+
+    def draw_all(self, buckets, now):
+        drawn = []
+        try:
+            for scope, key, (burst, per_minute) in buckets:
+                slot_key, remaining = self._slot(key, burst, per_minute, now)
+                self.cache.add(slot_key, 0, math.ceil(remaining) + 1)
+                drawn.append(slot_key)
+                if self.cache.incr(slot_key) > burst:
+                    raise _Empty(Throttled(scope, _retry_after(remaining, per_minute)))
+        except _Empty:
+            for slot_key in drawn:
+                self.cache.decr(slot_key)
+            raise
+
+    def prune(self, now):
+        pass  # entries expire at the end of their period
+
+
+class _DatabaseBuckets:
+    """``LoginRateBucket`` rows, drawn with a conditional UPDATE."""
+
+    def peek(self, scope, key, burst, per_minute, now):
+        limit = now + (burst - 1) * _interval(per_minute)
+        full_at = LoginRateBucket.objects.filter(key=key).values_list('full_at', flat=True).first()
+        if full_at is not None and full_at > limit:
+            raise _Empty(Throttled(scope, _retry_after(full_at - limit, per_minute)))
+
+    def _draw(self, scope, key, burst, per_minute, now):
+        interval = _interval(per_minute)
+        limit = now + (burst - 1) * interval
+        buckets = LoginRateBucket.objects.filter(key=key)
+        if buckets.filter(full_at__lte=limit).update(full_at=Greatest(F('full_at'), Value(now)) + interval):
+            return
+        full_at = buckets.values_list('full_at', flat=True).first()
+        if full_at is None:
+            # A new bucket starts full. Another worker may create it first, so
+            # draw from whichever row exists.
+            LoginRateBucket.objects.bulk_create([LoginRateBucket(key=key, full_at=now)], ignore_conflicts=True)
+            if buckets.filter(full_at__lte=limit).update(full_at=Greatest(F('full_at'), Value(now)) + interval):
+                return
+            full_at = buckets.values_list('full_at', flat=True).get()
+        raise _Empty(Throttled(scope, _retry_after(full_at - limit, per_minute)))
+
+    def draw_all(self, buckets, now):
+        # Raising out of the transaction rolls back the tokens already drawn.
+        with transaction.atomic():
+            for scope, key, (burst, per_minute) in buckets:
+                self._draw(scope, key, burst, per_minute, now)
+
+    def prune(self, now):
+        global _last_prune
+        if now - _last_prune >= PRUNE_INTERVAL:
+            _last_prune = now
+            LoginRateBucket.objects.filter(full_at__lt=now).delete()
+
+
+def _store():
+    cache = caches['default']
+    return _CacheBuckets(cache) if has_atomic_incr(cache) else _DatabaseBuckets()
+
+
+def check(endpoint, **scopes):
+    """
+    Draw a token from every configured bucket for ``scopes`` (e.g.
+    ``ip=..., username=...``). Returns None when the attempt may proceed,
+    or a ``Throttled`` naming the empty bucket; nothing is drawn then.
+    """
+    limits = getattr(settings, 'LOGIN_RATE_LIMITS', {})
+    buckets = [
+        (scope, _bucket_key(endpoint, scope, value), limits[scope])
+        for scope, value in scopes.items()
+        if value and scope in limits
+    ]
+    if not buckets:
+        return None
+
+    store = _store()
+    now = time.time()  # wall clock: buckets are shared across workers
+    try:
+        for scope, key, (burst, per_minute) in buckets:
+            store.peek(scope, key, burst, per_minute, now)
+        store.draw_all(buckets, now)
+    except _Empty as empty:
+        metrics.inc('edusync_login_attempts_total', {'endpoint': endpoint, 'result': 'throttled', 'scope': empty.throttled.scope})
+        return empty.throttled
+
+    store.prune(now)
+    metrics.inc('edusync_login_attempts_total', {'endpoint': endpoint, 'result': 'allowed', 'scope': ''})
+    return None
@@ -0,0 +1,62 @@
+from .models import UserProfile
+
+from django.contrib.auth.models import User
+from django.shortcuts import redirect
+
+ROLE_SESSION_KEY = '_edusync_role'
+ANONYMOUS = 'anonymous'
+NO_PROFILE = 'none'
+
+# Landing page (URL name) for each role after login.
+ROLE_HOME = {
+    'institution_admin': 'dashboard',
+    'teacher': 'teacher_dashboard',
+    'student': 'student_dashboard',
+}
+
+
+def redirect_for_role(role, default='dashboard'):
+    return redirect(ROLE_HOME.get(role, default))
+
+
+def _profile_role(user):
+    """The user's role, from the profile loaded by InstitutionBackend when available."""
+    if User.userprofile.is_cached(user):
+        profile = getattr(user, 'userprofile', None)
+        return profile.role if profile is not None else None
+    return UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+
+
+def get_request_role(request):
+    """
+    The ``UserProfile.role`` of the requesting user without a query on the
+    hot path: the role is stored in the session at login (see
+    ``store_role_on_login``) and memoised on the request.
+    """
+    role = getattr(request, '_edusync_role', None)
+    if role is not None:
+        return role
+
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        role = ANONYMOUS
+    else:
+        session = getattr(request, 'session', None)
+        role = session.get(ROLE_SESSION_KEY) if session is not None else None
+        if role is None:
+            # Sessions created before the role was cached: look it up once.
+            role = _profile_role(user) or NO_PROFILE
+            if session is not None:
+                session[ROLE_SESSION_KEY] = role
+
+    request._edusync_role = role
+    return role
+
+
+def store_role_on_login(sender, request, user, **kwargs):
+    """``user_logged_in`` receiver: remember the role for this session."""
+    if request is None or not hasattr(request, 'session'):
+        return
+    role = _profile_role(user)
+    request.session[ROLE_SESSION_KEY] = role or NO_PROFILE
+    request._edusync_role = role or NO_PROFILE
@@ -0,0 +1,75 @@
+"""
+Institution signup as a single transaction.
+
+All five rows (SignupTable, User, LoginTable, Institution, UserProfile) are
+inserted inside one ``transaction.atomic()`` block with no pre-checks; the
+unique constraints on those tables decide who wins a race. When an insert
+fails the whole tenant is rolled back, and only then are the conflicting
+fields looked up to build per-field error messages.
+"""
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+
+from institution.models import Institution
+
+from .models import LoginTable, SignupTable, UserProfile
+
+FIELD_MESSAGES = {
+    'institution': 'Institution name already registered.',
+    'username': 'Username already exists. Please choose a different username.',
+    'email': 'Email already registered. Please use a different email.',
+}
+
+
+class SignupError(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors.values()))
+
+
+def _conflicts(institution_name, username, email):
+    """Which unique values are taken; only called after a failed insert."""
+    errors = {}
+    if (
+        SignupTable.objects.filter(institution_name=institution_name).exists()
+        or Institution.objects.filter(name=institution_name).exists()
+    ):
+        errors['institution'] = FIELD_MESSAGES['institution']
+    if User.objects.filter(username=username).exists():
+        errors['username'] = FIELD_MESSAGES['username']
+    if (
+        SignupTable.objects.filter(email=email).exists()
+        or Institution.objects.filter(email=email).exists()
+    ):
+        errors['email'] = FIELD_MESSAGES['email']
+    return errors
+
+
+def register_institution(institution_name, username, email, password):
+    """Create the institution and its admin; returns the admin ``User``."""
+    errors = {
+        field: 'This field is required.'
+        for field, value in (
+            ('institution', institution_name), ('username', username),
+            ('email', email), ('password', password),
+        )
+        if not value
+    }
+    if errors:
+        raise SignupError(errors)
+
+    try:
+        with transaction.atomic():
+            signup = SignupTable.objects.create(institution_name=institution_name, email=email)
+            user = User.objects.create_user(username=username, email=email, password=password)
+            LoginTable.objects.create(signup=signup, institution_name=institution_name, password=user.password)
+            institution = Institution.objects.create(name=institution_name, admin=user, email=email)
+            profile = UserProfile.objects.create(user=user, role='institution_admin', institution=institution)
+    except IntegrityError:
+        raise SignupError(
+            _conflicts(institution_name, username, email)
+            or {'institution': 'Could not create the account, please try again.'}
+        )
+
+    user.userprofile = profile
+    return user
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import os
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from institution import views as institution_views
+from institution.models import Institution
+
+from . import ratelimit
+from .models import LoginRateBucket, LoginTable, SignupTable, UserProfile
+from .signup import SignupError, register_institution
+
+
+class SignupViewTests(TestCase):
+    def post(self, **overrides):
+        data = {'institution': 'Lincoln High', 'username': 'lincoln', 'email': 'admin@lincoln.edu', 'password': 's3cret!pw'}
+        data.update(overrides)
+        return self.client.post(reverse('signup'), data)
+
+    def test_creates_tenant_and_logs_in(self):
+        response = self.post()
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        institution = Institution.objects.get(name='Lincoln High')
+        self.assertEqual(institution.admin.userprofile.institution, institution)
+        self.assertTrue(LoginTable.objects.get().password.startswith('pbkdf2_'))
+
+    def test_duplicates_map_to_field_errors(self):
+        self.post()
+        self.client.logout()
+        response = self.post(username='other', email='other@lincoln.edu')
+        self.assertEqual(set(response.context['errors']), {'institution'})
+        response = self.post(institution='Other', email='other@lincoln.edu')
+        self.assertEqual(set(response.context['errors']), {'username'})
+        response = self.post(institution='Other', username='other')
+        self.assertEqual(set(response.context['errors']), {'email'})
+        self.assertEqual(Institution.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_signup_query_count(self):
+        # five inserts between BEGIN/COMMIT (a savepoint here), no pre-checks
+        with self.assertNumQueries(7):
+            register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+
+
+class ParallelSignupTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        # SQLite's feature flag says no, but a file-backed test database
+        # (settings.DATABASES TEST NAME) gives every thread its own connection.
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('threads need a file-backed test database')
+
+    def run_parallel(self, make_args):
+        barrier = threading.Barrier(self.workers)
+        results = [None] * self.workers
+
+        def attempt(index):
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        register_institution(*make_args(index))
+                        results[index] = 'ok'
+                        return
+                    except OperationalError:
+                        # lock timeout or deadlock: retry like a client would
+                        continue
+                results[index] = 'locked'
+            except SignupError as e:
+                results[index] = set(e.errors)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def assertNoPartialTenants(self):
+        institutions = Institution.objects.count()
+        self.assertEqual(SignupTable.objects.count(), institutions)
+        self.assertEqual(LoginTable.objects.count(), institutions)
+        self.assertEqual(UserProfile.objects.count(), institutions)
+        self.assertEqual(User.objects.count(), institutions)
+
+    def test_same_institution_has_one_winner(self):
+        results = self.run_parallel(lambda i: ('Race High', f'admin{i}', f'admin{i}@race.edu', 'pw'))
+        self.assertEqual(results.count('ok'), 1, results)
+        self.assertTrue(all(r == {'institution'} for r in results if r != 'ok'), results)
+        self.assertEqual(Institution.objects.count(), 1)
+        self.assertNoPartialTenants()
+
+    def test_distinct_institutions_all_succeed(self):
+        results = self.run_parallel(lambda i: (f'School {i}', f'admin{i}', f'admin{i}@school.edu', 'pw'))
+        self.assertEqual(results, ['ok'] * self.workers)
+        self.assertEqual(Institution.objects.count(), self.workers)
+        self.assertNoPartialTenants()
+
+
+@override_settings(LOGIN_RATE_LIMITS={'ip': (20, 10), 'username': (5, 2)})
+class LoginRateLimitTests(TestCase):
+    """Credential stuffing against institution_admin_login."""
+    attempts = 200
+
+    def setUp(self):
+        register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.url = reverse('institution_admin_login')
+
+    def attack(self, count, username=lambda i: 'lincoln'):
+        return [
+            self.client.post(self.url, {'username': username(i), 'password': f'guess{i}'}).status_code
+            for i in range(count)
+        ]
+
+    def test_only_the_burst_reaches_the_password_hasher(self):
+        with mock.patch('institution.views.authenticate', return_value=None) as authenticate:
+            statuses = self.attack(self.attempts)
+        self.assertEqual(statuses.count(200), 5)  # the username burst; everything else is a 429
+        self.assertEqual(statuses.count(429), self.attempts - 5)
+        self.assertEqual(authenticate.call_count, 5)
+
+    @override_settings(LOGIN_RATE_LIMITS={'ip': (20, 0), 'username': (5, 0)})
+    def test_ip_bucket_caps_username_spraying(self):
+        statuses = self.attack(60, username=lambda i: f'user{i}')
+        self.assertEqual(statuses.count(200), 20)
+        self.assertEqual(statuses.count(429), 40)
+
+    def test_throttled_attempt_draws_from_no_bucket(self):
+        for _ in range(5):
+            self.assertIsNone(ratelimit.check('test', ip='10.0.0.1', username='lincoln'))
+        throttled = ratelimit.check('test', ip='10.0.0.1', username='lincoln')
+        self.assertEqual(throttled.scope, 'username')
+        self.assertEqual(throttled.retry_after, 30)
+        # The ip bucket still holds 15 tokens.
+        for i in range(15):
+            self.assertIsNone(ratelimit.check('test', ip='10.0.0.1', username=f'user{i}'))
+        self.assertEqual(ratelimit.check('test', ip='10.0.0.1', username='other').scope, 'ip')
+
+    def test_buckets_are_shared_between_workers(self):
+        # Another worker emptied the bucket: the row is all the state there is.
+        for _ in range(5):
+            ratelimit.check('test', username='lincoln')
+        LoginRateBucket.objects.update(full_at=time.time() + 1000)
+        self.assertEqual(ratelimit.check('test', username='lincoln').scope, 'username')
+        LoginRateBucket.objects.update(full_at=0)
+        self.assertIsNone(ratelimit.check('test', username='lincoln'))
+
+    def test_rejection_writes_nothing(self):
+        for _ in range(5):
+            ratelimit.check('test', ip='10.0.0.1', username='lincoln')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNotNone(ratelimit.check('test', ip='10.0.0.1', username='lincoln'))
+        self.assertTrue(all(q['sql'].startswith('SELECT') for q in queries), [q['sql'] for q in queries])
+
+    def test_cache_buckets(self):
+        # LocMem stands in for memcached: same add()/incr()/decr() calls.
+        caches['default'].clear()
+        with mock.patch.object(ratelimit, '_store', lambda: ratelimit._CacheBuckets(caches['default'])):
+            for _ in range(5):
+                self.assertIsNone(ratelimit.check('test', ip='10.0.0.1', username='lincoln'))
+            self.assertEqual(ratelimit.check('test', ip='10.0.0.1', username='lincoln').scope, 'username')
+            for i in range(15):
+                self.assertIsNone(ratelimit.check('test', ip='10.0.0.1', username=f'user{i}'))
+            self.assertEqual(ratelimit.check('test', ip='10.0.0.1', username='other').scope, 'ip')
+        self.assertFalse(LoginRateBucket.objects.exists())
+
+
+@unittest.skipUnless(os.environ.get('EDUSYNC_BENCHMARKS'), 'set EDUSYNC_BENCHMARKS=1 to run benchmarks')
+@override_settings(LOGIN_RATE_LIMITS={'ip': (20, 10), 'username': (5, 2)})
+class LoginRateLimitBenchmark(TestCase):
+    """
+    Credential stuffing against institution_admin_login: password hasher
+    runs and time per attempt, with and without the limiter.
+    """
+    attempts = 200
+
+    def setUp(self):
+        register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.url = reverse('institution_admin_login')
+
+    def attack(self, count):
+        with mock.patch.object(institution_views, 'authenticate', wraps=institution_views.authenticate) as authenticate:
+            wall, cpu = time.perf_counter(), time.process_time()
+            for i in range(count):
+                self.client.post(self.url, {'username': 'lincoln', 'password': f'guess{i}'})
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        return authenticate.call_count, wall / count, cpu / count
+
+    def test_cpu_under_attack(self):
+        with override_settings(LOGIN_RATE_LIMITS={}):
+            hashed, wall, cpu = self.attack(10)
+        print(f"\nunthrottled: {hashed}/10 attempts hashed, {wall * 1000:.1f}ms wall, {cpu * 1000:.1f}ms CPU per attempt")
+        hashed, wall, cpu = self.attack(self.attempts)
+        print(f"rate limited: {hashed}/{self.attempts} attempts hashed, {wall * 1000:.2f}ms wall, {cpu * 1000:.2f}ms CPU per attempt")
+        self.assertEqual(hashed, 5)
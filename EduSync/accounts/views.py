@@ -1,10 +1,10 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.models import User
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import never_cache
-from .models import UserProfile, LoginTable, SignupTable
-from institution.models import Institution
+from . import ratelimit
+from .roles import get_request_role, redirect_for_role
+from .signup import SignupError, register_institution
 from django.contrib import messages
 
 @never_cache
@@ -17,63 +17,32 @@ def landing_view(request):
 @require_http_methods(["GET", "POST"])
 def login_view(request):
     if request.user.is_authenticated:
-        try:
-            profile = UserProfile.objects.get(user=request.user)
-            if profile.role == 'institution_admin':
-                return redirect('dashboard')
-            elif profile.role == 'teacher':
-                return redirect('teacher_dashboard')
-            elif profile.role == 'student':
-                return redirect('student_dashboard')
-        except UserProfile.DoesNotExist:
-            return redirect('dashboard')
+        return redirect_for_role(get_request_role(request), default='dashboard')
 
     if request.method == 'POST':
 
         institution_name = request.POST.get('institution_name')
         password = request.POST.get('password')
-        
-        # Check if institution exists in SignupTable first
-        try:
-            signup = SignupTable.objects.get(institution_name=institution_name)
-        except SignupTable.DoesNotExist:
-            return render(request, 'login.html', {'error': '❌ Institution does not exist. Please sign up first.'})
-        
-        # Check if LoginTable entry exists, if not create it
-        try:
-            login_entry = LoginTable.objects.get(institution_name=institution_name)
-        except LoginTable.DoesNotExist:
-            # Create LoginTable entry if it doesn't exist
-            login_entry = LoginTable.objects.create(
-                signup=signup,
-                institution_name=institution_name,
-                password=password
-            )
-        
-        # Verify password
-        if login_entry.password != password:
-            return render(request, 'login.html', {'error': '❌ Invalid password. Please try again.'})
-        
-        # Get the associated User
-        user = User.objects.filter(userprofile__institution=signup.institution_name, userprofile__role='institution_admin').first()
+
+        # Throttle before authenticate() runs the password hasher
+        throttled = ratelimit.check('institution_login', ip=ratelimit.client_ip(request), institution=institution_name)
+        if throttled:
+            response = render(request, 'login.html', {'error': f'❌ {throttled.message}'}, status=429)
+            response['Retry-After'] = str(throttled.retry_after)
+            return response
+
+        # InstitutionBackend: one joined query for the admin, profile and
+        # institution, then the password hash check.
+        user = authenticate(request, institution_name=institution_name, password=password)
         if user is None:
-            return render(request, 'login.html', {'error': '❌ User account not found.'})
+            return render(request, 'login.html', {'error': '❌ Invalid institution name or password. Please try again.'})
 
         login(request, user)
 
-        # Role-based redirect with success message
-        try:
-            profile = UserProfile.objects.get(user=user)
-            messages.success(request, f"✅ Welcome back, {user.first_name}!")
-            if profile.role == 'institution_admin':
-                return redirect('dashboard')
-            elif profile.role == 'teacher':
-                return redirect('teacher_dashboard')
-            elif profile.role == 'student':
-                return redirect('student_dashboard')
-        except UserProfile.DoesNotExist:
-            return redirect('landing')
-    
+        # Role-based redirect with success message (profile already loaded)
+        messages.success(request, f"✅ Welcome back, {user.first_name}!")
+        return redirect_for_role(get_request_role(request), default='landing')
+
     return render(request, 'login.html')
 
 @never_cache
@@ -84,57 +53,30 @@ def signup_view(request):
 
     if request.method == 'POST':
 
-        institution_name = request.POST.get('institution')
-        username = request.POST.get('username')
-        email = request.POST.get('email')
-        password = request.POST.get('password')
-        
-        # Check if institution name already exists
-        if Institution.objects.filter(name=institution_name).exists():
-            return render(request, 'signup.html', {'error': 'Institution already exists'})
-        
-        if SignupTable.objects.filter(institution_name=institution_name).exists():
-            return render(request, 'signup.html', {'error': 'Institution name already registered'})
-        
-        # Check if username already exists
-        if User.objects.filter(username=username).exists():
-            return render(request, 'signup.html', {'error': '❌ Username already exists. Please choose a different username.'})
-        
-        # Check if email already exists
-        if User.objects.filter(email=email).exists():
-            return render(request, 'signup.html', {'error': '❌ Email already registered. Please use a different email.'})
-        
+        values = {
+            'institution': (request.POST.get('institution') or '').strip(),
+            'username': (request.POST.get('username') or '').strip(),
+            'email': (request.POST.get('email') or '').strip(),
+        }
+
+        # One transaction; uniqueness is enforced by the database constraints
         try:
-            # Create SignupTable entry (institution details)
-            signup = SignupTable.objects.create(
-                institution_name=institution_name,
-                email=email
+            user = register_institution(
+                values['institution'], values['username'], values['email'], request.POST.get('password'),
             )
-            
-            # Create LoginTable entry (login credentials)
-            LoginTable.objects.create(
-                signup=signup,
-                institution_name=institution_name,
-                password=password
-            )
-            
-            # Create user
-            user = User.objects.create_user(username=username, email=email, password=password)
-            
-            # Create UserProfile as institution admin
-            UserProfile.objects.create(user=user, role='institution_admin', institution=institution_name)
-            
-            # Create Institution
-            Institution.objects.create(name=institution_name, admin=user, email=email)
-            
-            login(request, user)
-            
-            # Render with success message and redirect
-            messages.success(request, "✅ Account created successfully! Welcome to EduSync.")
-            return redirect('dashboard')
-        except Exception as e:
-            return render(request, 'signup.html', {'error': f'❌ Error creating account: {str(e)}'})
-    
+        except SignupError as e:
+            return render(request, 'signup.html', {
+                'error': f'❌ {e}',
+                'errors': e.errors,
+                'values': values,
+            })
+
+        login(request, user)
+
+        # Render with success message and redirect
+        messages.success(request, "✅ Account created successfully! Welcome to EduSync.")
+        return redirect('dashboard')
+
     return render(request, 'signup.html')
 
 def logout_view(request):
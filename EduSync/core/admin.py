@@ -0,0 +1,76 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'request_id', 'method', 'path', 'view_name',
+        'status_code', 'duration_ms', 'query_count', 'user', 'created_at'
+    )
+    list_filter = ('method', 'status_code')
+    search_fields = ('request_id', 'path', 'view_name')
+    list_select_related = ('user',)
+    exclude = ('profile_data', 'sql_timeline', 'allocations', 'stats_summary')
+    readonly_fields = (
+        'request_id', 'method', 'path', 'view_name', 'user', 'status_code',
+        'duration_ms', 'query_count', 'created_at',
+        'download', 'sql_timeline_table', 'allocation_table', 'stats_text',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='core_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        response = HttpResponse(bytes(profile.profile_data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{profile.request_id}.prof"'
+        return response
+
+    @admin.display(description='cProfile dump')
+    def download(self, obj):
+        url = reverse('admin:core_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}.prof</a> (open with pstats or snakeviz)', url, obj.request_id)
+
+    @admin.display(description='SQL timeline')
+    def sql_timeline_table(self, obj):
+        rows = format_html_join(
+            '',
+            '<tr><td>{}</td><td>{}</td><td><code>{}</code></td></tr>',
+            ((q['start_ms'], q['duration_ms'], q['sql']) for q in obj.sql_timeline),
+        )
+        return format_html(
+            '<table><tr><th>start (ms)</th><th>duration (ms)</th><th>SQL</th></tr>{}</table>', rows
+        )
+
+    @admin.display(description='Top allocations')
+    def allocation_table(self, obj):
+        rows = format_html_join(
+            '',
+            '<tr><td><code>{}</code></td><td>{}</td><td>{}</td></tr>',
+            ((a['location'], a['size_kb'], a['count']) for a in obj.allocations),
+        )
+        return format_html(
+            '<table><tr><th>location</th><th>KiB</th><th>blocks</th></tr>{}</table>', rows
+        )
+
+    @admin.display(description='Profile (cumulative)')
+    def stats_text(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', obj.stats_summary)
@@ -0,0 +1,95 @@
+"""
+Admission control per role.
+
+Every role (``UserProfile.role``, ``'anonymous'`` or ``'none'``) gets its own
+pool of concurrent requests per worker, sized by ``settings.ADMISSION_LIMITS``
+as ``(limit, queue, timeout)``. A request that finds its pool full waits in
+a bounded queue for up to ``timeout`` seconds; if the queue is full too, or
+the wait times out, it is answered with a 503 and ``Retry-After`` before any
+view or template runs. Reads (GET/HEAD) of the roles in
+``settings.ADMISSION_SHED_READS`` are never queued, so a crowd of students
+refreshing their dashboards is shed at once and cannot tie up worker
+threads. Because each role only uses its own pool, admins and their writes
+keep their slots however many students are waiting.
+
+Pools live in the worker process and block the calling thread, so size the
+limits against the worker's thread count. Queue depth, waits and shed
+requests are exported through core.metrics.
+"""
+import threading
+from time import perf_counter
+
+from django.conf import settings
+
+from . import metrics
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Why a request was shed.
+LOW_PRIORITY = 'low_priority'
+QUEUE_FULL = 'queue_full'
+TIMEOUT = 'timeout'
+
+metrics.describe('edusync_admission_in_flight', metrics.GAUGE, 'Admitted requests being served, by role.')
+metrics.describe('edusync_admission_queue_depth', metrics.GAUGE, 'Requests waiting for a slot, by role.')
+metrics.describe('edusync_admission_wait_seconds', metrics.HISTOGRAM, 'Time queued requests waited for a slot, by role.')
+metrics.describe('edusync_admission_shed_total', metrics.COUNTER, 'Requests answered 503 by role and reason.')
+
+
+class Pool:
+    def __init__(self, role, limit, queue, timeout):
+        self.role = role
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, wait=True):
+        """
+        Take a slot, queueing for it if ``wait``. Returns None once admitted,
+        otherwise why the request was shed.
+        """
+        labels = {'role': self.role}
+        with self.condition:
+            # Queued requests go first; a newcomer never overtakes them.
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                metrics.gauge_add('edusync_admission_in_flight', labels)
+                return None
+            if not wait:
+                return LOW_PRIORITY
+            if self.waiting >= self.queue:
+                return QUEUE_FULL
+
+            self.waiting += 1
+            metrics.gauge_add('edusync_admission_queue_depth', labels)
+            start = perf_counter()
+            try:
+                admitted = self.condition.wait_for(lambda: self.active < self.limit, self.timeout)
+            finally:
+                self.waiting -= 1
+                metrics.gauge_add('edusync_admission_queue_depth', labels, -1)
+            metrics.observe('edusync_admission_wait_seconds', labels, perf_counter() - start)
+            if not admitted:
+                return TIMEOUT
+            self.active += 1
+            metrics.gauge_add('edusync_admission_in_flight', labels)
+            return None
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            metrics.gauge_add('edusync_admission_in_flight', {'role': self.role}, -1)
+            self.condition.notify()
+
+
+def build_pools():
+    """``{role: Pool}`` from ``settings.ADMISSION_LIMITS``."""
+    limits = getattr(settings, 'ADMISSION_LIMITS', {})
+    return {role: Pool(role, *config) for role, config in limits.items()}
+
+
+def is_low_priority(request, role):
+    return request.method in SAFE_METHODS and role in getattr(settings, 'ADMISSION_SHED_READS', ())
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import querylog
+
+        connection_created.connect(querylog.install, dispatch_uid='core.querylog.install')
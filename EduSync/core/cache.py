@@ -0,0 +1,96 @@
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache, PyMemcacheCache
+from django.core.cache.backends.redis import RedisCache
+
+from . import metrics
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Counts hits and misses into ``edusync_cache_requests_total``. get_many()
+    and get_or_set() go through get() in the base backend, so they count too.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        hit = value is not _missing
+        metrics.inc('edusync_cache_requests_total', {'cache': self._metrics_name, 'result': 'hit' if hit else 'miss'})
+        return value if hit else default
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._metrics_name = name or 'default'
+
+
+class InstrumentedPyMemcacheCache(InstrumentedCacheMixin, PyMemcacheCache):
+    """Memcached through pymemcache, shared by every worker and host."""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._metrics_name = params.get('KEY_PREFIX') or 'default'
+
+
+def is_process_local(backend):
+    """True when ``backend`` is private to this process (values never reach other workers)."""
+    return isinstance(backend, (LocMemCache, DummyCache))
+
+
+def has_atomic_incr(backend):
+    """True when ``backend`` is shared and its ``incr()`` is one atomic server-side operation."""
+    return isinstance(backend, (BaseMemcachedCache, RedisCache))
+
+
+metrics.describe(
+    'edusync_cache_single_flight_total', metrics.COUNTER,
+    'Cache misses filled through single_flight() by result (computed/waited/timeout).',
+)
+
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 5.0
+POLL_INTERVAL = 0.05
+
+
+def single_flight(key, compute, timeout, wait=WAIT_TIMEOUT, using=None):
+    """
+    The cached value of ``key``, or ``compute()`` stored under it.
+
+    Of concurrent misses on the same key only the one that wins the
+    ``cache.add()`` lock computes; the others poll for its value for up to
+    ``wait`` seconds, and compute it themselves only if it never arrives
+    (the leader crashed or is slower than ``wait``). The lock expires on
+    its own after ``LOCK_TIMEOUT`` seconds.
+    """
+    backend = caches[using or 'default']
+    value = backend.get(key, _missing)
+    if value is not _missing:
+        return value
+
+    lock = f'{key}:lock'
+    if backend.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            backend.set(key, value, timeout)
+        finally:
+            backend.delete(lock)
+        metrics.inc('edusync_cache_single_flight_total', {'result': 'computed'})
+        return value
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = backend.get(key, _missing)
+        if value is not _missing:
+            metrics.inc('edusync_cache_single_flight_total', {'result': 'waited'})
+            return value
+    metrics.inc('edusync_cache_single_flight_total', {'result': 'timeout'})
+    value = compute()
+    backend.set(key, value, timeout)
+    return value
@@ -0,0 +1,201 @@
+"""
+Per-institution cache generations.
+
+Every institution has a generation counter, and one more per namespace
+(``courses``, ``roster``, ``grades``, ``news``). Cache keys built by
+``make_key()`` embed the current values, so a write invalidates everything
+cached for that institution and namespace by bumping one counter, with no
+list of keys to track or delete. Entries under superseded generations are
+never read again and simply expire.
+
+The counters are ``CacheGeneration`` rows, not cache entries, so a bump in
+one worker is seen by every other worker even when each keeps its cached
+values in its own LocMemCache. Building a key costs one indexed query.
+
+Writes bump through model signals (wired in academics.apps, and in
+institution.apps for news) or explicitly from set-based code that sends
+none (bulk deletes, assignment sync, rollover). Bumps run on commit, so a
+reader cannot cache pre-commit data under the new generation.
+
+Helpers:
+
+* ``cached(institution_id, namespaces, name, compute)`` for any value,
+  filled single-flight (core/cache.py) so a bump does not stampede;
+* ``@cache_page(*namespaces)`` for whole GET responses of admin views;
+* ``{% cachegen %}`` (core/templatetags/generations.py) for template fragments.
+
+Lookups are counted per namespace in
+``edusync_generation_cache_requests_total`` for hit ratios.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
+
+from . import metrics
+from .cache import single_flight
+from .models import CacheGeneration
+
+COURSES = 'courses'
+ROSTER = 'roster'
+GRADES = 'grades'
+NEWS = 'news'
+NAMESPACES = (COURSES, ROSTER, GRADES, NEWS)
+
+DEFAULT_TIMEOUT = 60 * 60
+
+metrics.describe(
+    'edusync_generation_cache_requests_total', metrics.COUNTER,
+    'Generation-keyed cache lookups by namespace and result (hit/miss).',
+)
+metrics.describe(
+    'edusync_generation_bumps_total', metrics.COUNTER,
+    'Generation counter bumps by namespace.',
+)
+
+_missing = object()
+
+
+def _seed(institution_id, namespaces):
+    # Seed from the clock: a counter that is recreated (restored database,
+    # rolled-back transaction) must not repeat values whose keys may still
+    # be cached.
+    CacheGeneration.objects.bulk_create(
+        [CacheGeneration(institution_id=institution_id, namespace=ns, value=time.time_ns()) for ns in namespaces],
+        ignore_conflicts=True,
+    )
+
+
+def _generations(institution_id, namespaces):
+    """Current counters for the institution and ``namespaces``, in order."""
+    names = ('*',) + tuple(namespaces)
+    counters = CacheGeneration.objects.filter(institution_id=institution_id, namespace__in=names)
+    found = dict(counters.values_list('namespace', 'value'))
+    if len(found) < len(names):
+        _seed(institution_id, [ns for ns in names if ns not in found])
+        found = dict(counters.values_list('namespace', 'value'))
+    return [found[ns] for ns in names]
+
+
+def current(institution_id, *namespaces):
+    """The current counters, e.g. to notice a bump without reading any cached value."""
+    return tuple(_generations(institution_id, sorted(namespaces)))
+
+
+def make_key(institution_id, namespaces, *parts):
+    namespaces = sorted(namespaces)
+    generations = _generations(institution_id, namespaces)
+    stamp = '.'.join(str(g) for g in generations)
+    return f"gen:{institution_id}:{'+'.join(namespaces) or '*'}:{stamp}:" + ':'.join(str(p) for p in parts)
+
+
+def _bump_now(institution_id, namespaces):
+    counters = CacheGeneration.objects.filter(institution_id=institution_id, namespace__in=namespaces)
+    if counters.update(value=F('value') + 1) < len(namespaces):
+        _seed(institution_id, namespaces)
+    for namespace in namespaces:
+        metrics.inc('edusync_generation_bumps_total', {'namespace': namespace})
+
+
+def bump(institution_id, *namespaces):
+    """
+    Invalidate ``namespaces`` of an institution once the current
+    transaction commits; with no namespaces, everything it has cached.
+    """
+    if institution_id is None:
+        return
+    namespaces = namespaces or ('*',)
+    transaction.on_commit(lambda: _bump_now(institution_id, namespaces))
+
+
+def _count(namespaces, hit):
+    metrics.inc('edusync_generation_cache_requests_total', {
+        'namespace': '+'.join(sorted(namespaces)), 'result': 'hit' if hit else 'miss',
+    })
+
+
+def get(key, namespaces):
+    value = cache.get(key, _missing)
+    _count(namespaces, value is not _missing)
+    return None if value is _missing else value
+
+
+def cached(institution_id, namespaces, name, compute, timeout=DEFAULT_TIMEOUT):
+    """``compute()``, cached until one of ``namespaces`` is bumped."""
+    key = make_key(institution_id, namespaces, name)
+    value = get(key, namespaces)
+    if value is None:
+        value = single_flight(key, compute, timeout)
+    return value
+
+
+def _request_institution_id(request):
+    try:
+        return request.user.userprofile.institution_id
+    except AttributeError:  # anonymous, or no profile
+        return None
+
+
+def cache_page(*namespaces, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache a view's GET responses per institution, user and URL until one of
+    ``namespaces`` is bumped. Pages carrying flash messages are never
+    cached. The key includes the CSRF cookie so cached forms keep a valid
+    token after the user logs in again.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            institution_id = _request_institution_id(request)
+            if request.method != 'GET' or institution_id is None or len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            variant = hashlib.md5(
+                f"{request.get_full_path()}|{request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')}".encode()
+            ).hexdigest()
+            key = make_key(institution_id, namespaces, 'view', view.__name__, request.user.pk, variant)
+            hit = get(key, namespaces)
+            if hit is not None:
+                content, content_type = hit
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, (response.content, response['Content-Type']), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+# Signal receivers (connected in academics.apps) -------------------------
+
+def course_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for ``Course``."""
+    bump(instance.institution_id, COURSES)
+
+
+def roster_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for ``Student`` and ``Teacher``."""
+    bump(instance.institution_id, ROSTER)
+
+
+def grade_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for ``Grade``."""
+    bump(instance.course.institution_id, GRADES)
+
+
+def news_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver for ``News``."""
+    bump(instance.institution_id, NEWS)
+
+
+def teachers_changed(sender, instance, action, **kwargs):
+    """m2m_changed receiver for ``Course.teachers``; both lists show assignments."""
+    if action.startswith('post_'):
+        bump(instance.institution_id, COURSES, ROSTER)
@@ -0,0 +1,76 @@
+import json
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Aggregate the slow query log (including rotated files) by SQL shape."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help='Log file (default: settings.SLOW_QUERY_LOG).')
+        parser.add_argument('--top', type=int, default=20, help='Number of shapes to show.')
+        parser.add_argument(
+            '--sort', choices=('total', 'count', 'max', 'mean'), default='total',
+            help='Ordering of the report.',
+        )
+
+    def handle(self, *args, **options):
+        path = os.fspath(options['log'] or settings.SLOW_QUERY_LOG)
+        files = self._log_files(path)
+        if not files:
+            raise CommandError(f"No slow query log found at {path}")
+
+        shapes = defaultdict(lambda: {'count': 0, 'total': 0.0, 'max': 0.0, 'origins': Counter(), 'views': Counter()})
+        skipped = 0
+        for filename in files:
+            with open(filename, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    entry = shapes[record['shape']]
+                    entry['count'] += 1
+                    entry['total'] += record['duration_ms']
+                    entry['max'] = max(entry['max'], record['duration_ms'])
+                    if record.get('origin'):
+                        entry['origins'][f"{record['origin']}:{record.get('line')}"] += 1
+                    if record.get('view'):
+                        entry['views'][record['view']] += 1
+
+        for entry in shapes.values():
+            entry['mean'] = entry['total'] / entry['count']
+
+        ordered = sorted(shapes.items(), key=lambda item: item[1][options['sort']], reverse=True)
+        self.stdout.write(
+            f"{len(shapes)} shapes from {sum(e['count'] for e in shapes.values())} slow statements "
+            f"in {len(files)} file(s)" + (f", {skipped} unreadable line(s)" if skipped else '')
+        )
+        for shape, entry in ordered[:options['top']]:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"count={entry['count']}  total={entry['total']:.1f}ms  "
+                f"mean={entry['mean']:.1f}ms  max={entry['max']:.1f}ms"
+            ))
+            self.stdout.write(f"  {shape[:500]}")
+            for origin, count in entry['origins'].most_common(3):
+                self.stdout.write(f"    from {origin} ({count})")
+            for view, count in entry['views'].most_common(3):
+                self.stdout.write(f"    view {view} ({count})")
+
+    @staticmethod
+    def _log_files(path):
+        """The active log plus its RotatingFileHandler backups, oldest first."""
+        files = []
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            files.append(f"{path}.{index}")
+            index += 1
+        files.reverse()
+        if os.path.exists(path):
+            files.append(path)
+        return files
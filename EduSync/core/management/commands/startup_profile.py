@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter so nothing is already imported or cached.
+BOOT_SCRIPT = """
+import json
+from time import perf_counter
+
+start = perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+phases = {'settings': perf_counter() - start}
+
+start = perf_counter()
+django.setup()
+phases['django.setup'] = perf_counter() - start
+
+from core.warmup import warmup
+phases.update(warmup())
+print(json.dumps(phases))
+"""
+
+
+class Command(BaseCommand):
+    help = "Report import time per app and boot/warmup time per phase for a cold worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Number of third-party packages to list besides the installed apps.',
+        )
+
+    def handle(self, *args, **options):
+        settings_module = os.environ.get('DJANGO_SETTINGS_MODULE', 'EduSync.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            cwd=os.fspath(settings.BASE_DIR),
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Cold boot failed:\n{result.stderr[-2000:]}")
+
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        imports = self._import_times(result.stderr)
+
+        app_packages = [entry.split('.')[0] for entry in settings.INSTALLED_APPS]
+        project_apps = [name for name in dict.fromkeys(app_packages) if name != 'django']
+        project_apps.append(settings_module.split('.')[0])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Import time per app (self time of all modules)'))
+        for name in dict.fromkeys(project_apps):
+            self.stdout.write(f"  {name:<28} {imports.pop(name, 0.0) * 1000:8.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Largest other packages'))
+        others = sorted(imports.items(), key=lambda item: item[1], reverse=True)
+        for name, seconds in others[:options['top']]:
+            self.stdout.write(f"  {name:<28} {seconds * 1000:8.1f} ms")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Boot phases'))
+        total = 0.0
+        for phase, seconds in phases.items():
+            total += seconds
+            self.stdout.write(f"  {phase:<28} {seconds * 1000:8.1f} ms")
+        self.stdout.write(f"  {'total':<28} {total * 1000:8.1f} ms")
+
+    @staticmethod
+    def _import_times(stderr):
+        """Sum ``-X importtime`` self times by top-level package, in seconds."""
+        totals = defaultdict(float)
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            try:
+                self_us, _, module = line[len('import time:'):].split('|', 2)
+                totals[module.strip().split('.')[0]] += int(self_us) / 1_000_000
+            except ValueError:
+                continue
+        return totals
@@ -0,0 +1,358 @@
+"""
+Process-local metrics with a file-backed store shared by all workers.
+
+Every worker keeps counters, gauges and histograms in memory and flushes a
+snapshot to ``settings.METRICS_DIR/<pid>-<start time>.json`` at most once per
+``METRICS_FLUSH_INTERVAL`` seconds (and at exit). The process start time
+tells a worker apart from a later one that reuses its pid. The /metrics
+endpoint merges the snapshots of all workers on the host and renders the
+Prometheus text format.
+
+Snapshots of exited workers are folded into ``aggregate.json`` and removed,
+so counters and histograms never go backwards while the directory only
+holds one file per live worker. Their gauges are dropped.
+
+Other modules record through ``inc()``, ``observe()`` and ``gauge_add()``
+after declaring the metric with ``describe()``.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' snapshots are kept, not folded
+    fcntl = None
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+AGGREGATE = 'aggregate.json'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_descriptions = {}
+
+
+def describe(name, kind, help_text, buckets=DEFAULT_BUCKETS):
+    _descriptions[name] = (kind, help_text, tuple(buckets))
+
+
+describe('edusync_http_requests_in_flight', GAUGE, 'Requests currently being served.')
+describe('edusync_http_request_duration_seconds', HISTOGRAM, 'Request latency by URL name and role.')
+describe('edusync_http_responses_total', COUNTER, 'Responses by URL name and status class.')
+describe('edusync_db_queries_total', COUNTER, 'Database queries issued by URL name.')
+describe('edusync_db_query_duration_seconds_total', COUNTER, 'Time spent in the database by URL name.')
+describe('edusync_cache_requests_total', COUNTER, 'Cache lookups by cache and result (hit/miss).')
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def _start_time(pid):
+    """Start time of ``pid`` in clock ticks since boot, or None without /proc."""
+    try:
+        with open(f'/proc/{pid}/stat') as handle:
+            return int(handle.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_identity = (None, None)
+
+
+def identity():
+    """``(pid, start time)`` of this process, looked up again after a fork."""
+    global _identity
+    pid = os.getpid()
+    if _identity[0] != pid:
+        _identity = (pid, _start_time(pid) or time.time_ns())
+    return _identity
+
+
+def _filename(pid, started):
+    return f'{pid}-{started}.json'
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+        self.histograms = {}
+        self.last_flush = 0.0
+
+    def inc(self, name, labels=None, value=1):
+        with self.lock:
+            self.counters[_key(name, labels)] += value
+
+    def gauge_add(self, name, labels=None, delta=1):
+        with self.lock:
+            self.gauges[_key(name, labels)] += delta
+
+    def observe(self, name, labels=None, value=0.0):
+        buckets = _descriptions.get(name, (None, None, DEFAULT_BUCKETS))[2]
+        key = _key(name, labels)
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                # one slot per bucket, then +Inf, sum
+                series = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            pid, started = identity()
+            return {
+                'pid': pid,
+                'started': started,
+                'counters': [[n, list(l), v] for (n, l), v in self.counters.items()],
+                'gauges': [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                'histograms': [[n, list(l), list(v)] for (n, l), v in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+            return
+        self.last_flush = now
+        directory = os.fspath(settings.METRICS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        _write(os.path.join(directory, _filename(*identity())), self.snapshot())
+
+
+registry = Registry()
+inc = registry.inc
+gauge_add = registry.gauge_add
+observe = registry.observe
+
+
+def maybe_flush():
+    try:
+        registry.flush()
+    except OSError:
+        pass  # metrics must never break a request
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        registry.flush(force=True)
+    except Exception:
+        pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _alive(pid, started):
+    if not _pid_alive(pid):
+        return False
+    current = _start_time(pid)
+    return current is None or current == started
+
+
+@contextmanager
+def _locked(directory):
+    """Serialise readers of the snapshot directory; yields False when locking is unavailable."""
+    if fcntl is None:
+        yield False
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _merge(snapshots):
+    counters = defaultdict(float)
+    gauges = defaultdict(float)
+    histograms = {}
+    for snap, alive in snapshots:
+        for name, labels, value in snap['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        if alive:
+            for name, labels, value in snap['gauges']:
+                gauges[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, values in snap['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = list(values)
+    return counters, gauges, histograms
+
+
+def _write(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _fold(directory, aggregate, dead):
+    """
+    Add the counters and histograms of exited workers (``{filename: snapshot}``)
+    to the aggregate and remove their files. The aggregate lists the files
+    it already holds, so a crash before the removal cannot count them twice.
+    """
+    counters, _, histograms = _merge([(aggregate, False)] + [(snap, False) for snap in dead.values()])
+    folded = [name for name in aggregate.get('folded', []) if os.path.exists(os.path.join(directory, name))]
+    _write(os.path.join(directory, AGGREGATE), {
+        'pid': None,
+        'counters': [[n, list(l), v] for (n, l), v in counters.items()],
+        'gauges': [],
+        'histograms': [[n, list(l), v] for (n, l), v in histograms.items()],
+        'folded': folded + list(dead),
+    })
+    for name in dead:
+        _remove(os.path.join(directory, name))
+        _remove(os.path.join(directory, f'{name}.tmp'))
+
+
+def _read(directory):
+    """``[(snapshot, alive)]`` of the other workers, folding exited ones when possible."""
+    own = _filename(*identity())
+    snapshots = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json') or filename == own:
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as handle:
+                snapshots[filename] = json.load(handle)
+        except (OSError, ValueError):
+            continue
+
+    aggregate = snapshots.pop(AGGREGATE, {'pid': None, 'counters': [], 'gauges': [], 'histograms': []})
+    folded = set(aggregate.get('folded', ()))
+    live, dead = [(aggregate, False)], {}
+    for filename, snap in snapshots.items():
+        if _alive(snap['pid'], snap.get('started')):
+            live.append((snap, True))
+        elif filename in folded:
+            _remove(os.path.join(directory, filename))  # already in the aggregate
+        else:
+            dead[filename] = snap
+    return live, dead, aggregate
+
+
+def collect():
+    """Merge the live registry with every other worker's last snapshot."""
+    snapshots = [(registry.snapshot(), True)]
+    directory = os.fspath(settings.METRICS_DIR)
+    if os.path.isdir(directory):
+        with _locked(directory) as locked:
+            live, dead, aggregate = _read(directory)
+            snapshots.extend(live)
+            snapshots.extend((snap, False) for snap in dead.values())
+            if locked and dead:
+                try:
+                    _fold(directory, aggregate, dead)
+                except OSError:
+                    pass  # folded on the next scrape
+    return _merge(snapshots)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs, extra=()):
+    pairs = list(pairs) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer() and not math.isinf(value):
+        return str(int(value))
+    return repr(value)
+
+
+# Hit-ratio gauges derived at render time: {gauge: (source counter, help)}.
+HIT_RATIOS = {
+    'edusync_cache_hit_ratio': (
+        'edusync_cache_requests_total', 'Cache hit ratio derived from edusync_cache_requests_total.',
+    ),
+    'edusync_generation_cache_hit_ratio': (
+        'edusync_generation_cache_requests_total',
+        'Hit ratio per namespace derived from edusync_generation_cache_requests_total.',
+    ),
+}
+
+
+def _cache_hit_ratios(counters, source='edusync_cache_requests_total'):
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for (name, labels), value in counters.items():
+        if name != source:
+            continue
+        labels = dict(labels)
+        result = labels.pop('result', '')
+        key = tuple(sorted(labels.items()))
+        totals[key][0 if result == 'hit' else 1] += value
+    return {key: hits / (hits + misses) for key, (hits, misses) in totals.items() if hits + misses}
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    counters, gauges, histograms = collect()
+    families = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        families[name].append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), value in sorted(gauges.items()):
+        families[name].append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), series in sorted(histograms.items()):
+        buckets = _descriptions.get(name, (None, None, DEFAULT_BUCKETS))[2]
+        cumulative = 0
+        for bound, count in zip(list(buckets) + ['+Inf'], series[:-1]):
+            cumulative += count
+            families[name].append(f'{name}_bucket{_labels(labels, [("le", bound)])} {_number(cumulative)}')
+        families[name].append(f'{name}_sum{_labels(labels)} {_number(series[-1])}')
+        families[name].append(f'{name}_count{_labels(labels)} {_number(cumulative)}')
+
+    for ratio_name, (source, _) in HIT_RATIOS.items():
+        for labels, ratio in sorted(_cache_hit_ratios(counters, source).items()):
+            families[ratio_name].append(f'{ratio_name}{_labels(labels)} {ratio:.4f}')
+
+    lines = []
+    for name in sorted(families):
+        if name in HIT_RATIOS:
+            kind, help_text = GAUGE, HIT_RATIOS[name][1]
+        else:
+            kind, help_text, _ = _descriptions.get(name, ('untyped', '', ()))
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(families[name])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,316 @@
+import mimetypes
+import os
+import posixpath
+import random
+from time import perf_counter
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from accounts.roles import get_request_role
+
+from . import admission
+from . import metrics
+from . import timing
+from .querylog import QueryStats, current_query_stats, current_view
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=300'
+
+
+def accepted_codings(header):
+    """``{coding: qvalue}`` from an Accept-Encoding header; malformed q counts as 0."""
+    codings = {}
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+class StaticAssetMiddleware:
+    """
+    Serves files from STATIC_ROOT before the rest of the stack runs.
+
+    Content-hashed names from the staticfiles manifest never change, so they
+    are sent with an ``immutable`` one-year Cache-Control and repeat visits
+    cost no asset bytes. Precompressed ``.br``/``.gz`` siblings written by
+    ``core.storage.CompressedManifestStaticFilesStorage`` are picked according
+    by their Accept-Encoding q-values (``q=0`` refuses a coding). In DEBUG, runserver's own static handler is used.
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = os.fspath(settings.STATIC_ROOT)
+        self.immutable = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, path):
+        name = posixpath.normpath(unquote(path)).lstrip('/')
+        if name.startswith('..') or name.endswith(('.gz', '.br')):
+            return None
+        fullpath = os.path.join(self.root, name)
+        if not os.path.isfile(fullpath):
+            return None
+
+        content_type, _ = mimetypes.guess_type(name)
+        accepted = accepted_codings(request.headers.get('Accept-Encoding', ''))
+        encoding, best = None, 0.0
+        for candidate, suffix in self.encodings:
+            # Ties go to the earlier (smaller) encoding.
+            quality = accepted.get(candidate, accepted.get('*', 0.0))
+            if quality > best and os.path.isfile(fullpath + suffix):
+                encoding, best = candidate, quality
+        if encoding:
+            fullpath += dict(self.encodings)[encoding]
+
+        stat = os.stat(fullpath)
+        if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(fullpath, 'rb'),
+                filename=posixpath.basename(name),
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Content-Length'] = stat.st_size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if name in self.immutable else DEFAULT_CACHE_CONTROL
+        )
+        return response
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles one request on demand for staff users.
+
+    Send ``X-EduSync-Profile: 1`` or add ``?__profile=1`` to the URL; the
+    response carries ``X-Profile-Id`` and the capture shows up under
+    /admin/core/requestprofile/. Requests without the flag only pay for a
+    dict lookup and a substring check.
+    """
+
+    header = 'HTTP_X_EDUSYNC_PROFILE'
+    query_flag = '__profile='
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            (self.header in request.META or self.query_flag in request.META.get('QUERY_STRING', ''))
+            and request.user.is_staff
+        ):
+            from .profiling import profile_request
+            return profile_request(request, self.get_response)
+        return self.get_response(request)
+
+
+class QueryContextMiddleware:
+    """Exposes the resolved view name to the slow query log (core.querylog)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set('')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
+
+
+class MetricsMiddleware:
+    """
+    Records latency per URL name and role, DB query counts/time and
+    in-flight requests into core.metrics. Place it as early as possible so
+    the timing covers the rest of the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        metrics.gauge_add('edusync_http_requests_in_flight')
+        start = perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            duration = perf_counter() - start
+            current_query_stats.reset(token)
+            metrics.gauge_add('edusync_http_requests_in_flight', delta=-1)
+            match = getattr(request, 'resolver_match', None)
+            url_name = (match.view_name if match else None) or 'unresolved'
+            metrics.observe(
+                'edusync_http_request_duration_seconds',
+                {'url_name': url_name, 'role': get_request_role(request)},
+                duration,
+            )
+            metrics.inc('edusync_http_responses_total', {'url_name': url_name, 'status': f'{status // 100}xx'})
+            metrics.inc('edusync_db_queries_total', {'url_name': url_name}, stats.count)
+            metrics.inc('edusync_db_query_duration_seconds_total', {'url_name': url_name}, stats.duration)
+            metrics.maybe_flush()
+
+
+class AdmissionControlMiddleware:
+    """
+    Caps concurrent requests per role and sheds the excess with a cheap 503
+    (core/admission.py). Needs the session and user, so it goes right after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.pools = admission.build_pools()
+        if not self.pools:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.exempt = tuple(getattr(settings, 'ADMISSION_EXEMPT_PATHS', ()))
+        self.retry_after = str(getattr(settings, 'ADMISSION_RETRY_AFTER', 5))
+
+    def __call__(self, request):
+        if self.exempt and request.path.startswith(self.exempt):
+            return self.get_response(request)
+        role = get_request_role(request)
+        pool = self.pools.get(role)
+        if pool is None:
+            return self.get_response(request)
+
+        reason = pool.acquire(wait=not admission.is_low_priority(request, role))
+        if reason is not None:
+            metrics.inc('edusync_admission_shed_total', {'role': role, 'reason': reason})
+            return self.shed()
+        try:
+            return self.get_response(request)
+        finally:
+            pool.release()
+
+    def shed(self):
+        response = HttpResponse(
+            'EduSync is busy right now. Please try again shortly.',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = self.retry_after
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a ``Server-Timing`` header splitting the request into middleware,
+    view, ORM (with query count), template render and session save, so the
+    breakdown shows up in the browser's network panel.
+
+    Whether a response carries the header is sampled per role through
+    ``settings.SERVER_TIMING_SAMPLE_RATES``. Needs ServerTimingViewMiddleware
+    at the end of MIDDLEWARE and the core.timing template backend.
+    """
+
+    def __init__(self, get_response):
+        self.rates = getattr(settings, 'SERVER_TIMING_SAMPLE_RATES', {})
+        if not any(self.rates.values()):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_timing = timing.RequestTiming()
+        timing_token = timing.current_timing.set(request_timing)
+        stats = current_query_stats.get()
+        stats_token = None
+        if stats is None:
+            stats = QueryStats()
+            stats_token = current_query_stats.set(stats)
+        count_before, time_before = stats.count, stats.duration
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.current_timing.reset(timing_token)
+            if stats_token is not None:
+                current_query_stats.reset(stats_token)
+
+        if self.sampled(request):
+            response['Server-Timing'] = request_timing.header(
+                perf_counter() - request_timing.started,
+                stats.count - count_before,
+                stats.duration - time_before,
+            )
+        return response
+
+    def sampled(self, request):
+        rate = self.rates.get(get_request_role(request), 0.0)
+        return rate >= 1 or random.random() < rate
+
+
+class ServerTimingViewMiddleware:
+    """Innermost middleware: times URL resolution, the view and response rendering."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            timing.add('view', perf_counter() - start)
+
+
+class TimedSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware that reports the session save to Server-Timing. It also
+    resolves the request's role before saving, so a role looked up for an
+    older session is stored with it; MetricsMiddleware and
+    ServerTimingMiddleware only ask once the session has been saved.
+    """
+
+    def process_response(self, request, response):
+        if hasattr(request, 'user'):
+            get_request_role(request)
+        start = perf_counter()
+        try:
+            return super().process_response(request, response)
+        finally:
+            timing.add('session', perf_counter() - start)
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('institution', '0004_news_institution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=20)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+                ('institution', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='institution.institution')),
+            ],
+            options={
+                'unique_together': {('institution', 'namespace')},
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """One request captured by core.middleware.RequestProfilerMiddleware."""
+    request_id = models.CharField(max_length=32, unique=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    status_code = models.PositiveSmallIntegerField(null=True)
+    duration_ms = models.FloatField(default=0)
+    query_count = models.PositiveIntegerField(default=0)
+    # [{"start_ms", "duration_ms", "sql", "many"}, ...] in execution order
+    sql_timeline = models.JSONField(default=list)
+    # [{"location", "size_kb", "count"}, ...] largest allocations first
+    allocations = models.JSONField(default=list)
+    stats_summary = models.TextField(blank=True)
+    # marshal-encoded cProfile stats, the same format as pstats.dump_stats()
+    profile_data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.request_id} {self.method} {self.path}"
+
+
+class CacheGeneration(models.Model):
+    """
+    Generation counter of one institution and cache namespace (see
+    core/generations.py). Kept in the database so every worker sees a bump,
+    whatever cache backend holds the cached values themselves.
+    """
+    # No database constraint: a bump may still land after its institution
+    # was deleted.
+    institution = models.ForeignKey(
+        'institution.Institution', on_delete=models.CASCADE, db_constraint=False
+    )
+    namespace = models.CharField(max_length=20)
+    value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('institution', 'namespace')
+
+    def __str__(self):
+        return f"{self.institution_id}:{self.namespace}={self.value}"
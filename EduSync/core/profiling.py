@@ -0,0 +1,133 @@
+"""
+On-demand profiling of a single request.
+
+Used by ``core.middleware.RequestProfilerMiddleware`` when a staff user asks
+for it. The request runs under cProfile and tracemalloc while every SQL
+statement is timed through ``connection.execute_wrapper``; the result is
+saved as a ``RequestProfile`` row that can be browsed under /admin/.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .models import RequestProfile
+
+# tracemalloc is process-wide: a request that stopped it would break the
+# take_snapshot() of another one still running. Profiled requests take turns.
+_tracing_lock = threading.Lock()
+
+
+class SQLTimeline:
+    """``execute_wrapper`` that records each statement relative to a start time."""
+
+    def __init__(self, started):
+        self.started = started
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = perf_counter()
+            self.entries.append({
+                'start_ms': round((start - self.started) * 1000, 3),
+                'duration_ms': round((end - start) * 1000, 3),
+                'sql': sql,
+                'many': many,
+                'alias': context['connection'].alias,
+            })
+
+
+def _allocation_top(snapshot, limit):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, cProfile.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    top = []
+    for stat in snapshot.statistics('lineno')[:limit]:
+        frame = stat.traceback[0]
+        top.append({
+            'location': f"{frame.filename}:{frame.lineno}",
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        })
+    return top
+
+
+def _stats_summary(profiler, limit=40):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def profile_request(request, get_response):
+    """Run ``get_response(request)`` under the profilers and store the result."""
+    request_id = uuid.uuid4().hex
+    top_n = getattr(settings, 'REQUEST_PROFILER_TOP_ALLOCATIONS', 25)
+
+    with _tracing_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        timeline = SQLTimeline(perf_counter())
+        profiler = cProfile.Profile()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timeline))
+            start = perf_counter()
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+                duration = perf_counter() - start
+                try:
+                    snapshot = tracemalloc.take_snapshot()
+                finally:
+                    if started_tracing:
+                        tracemalloc.stop()
+
+    profiler.create_stats()
+    # Serialise before summarising: pstats.Stats() empties profiler.stats.
+    profile_data = marshal.dumps(profiler.stats)
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    RequestProfile.objects.create(
+        request_id=request_id,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view_name=(match.view_name if match else '')[:200],
+        user=user if user is not None and user.is_authenticated else None,
+        status_code=response.status_code,
+        duration_ms=round(duration * 1000, 3),
+        query_count=len(timeline.entries),
+        sql_timeline=timeline.entries,
+        allocations=_allocation_top(snapshot, top_n),
+        stats_summary=_stats_summary(profiler),
+        profile_data=profile_data,
+    )
+    _trim_old_profiles()
+
+    response['X-Profile-Id'] = request_id
+    return response
+
+
+def _trim_old_profiles():
+    keep = getattr(settings, 'REQUEST_PROFILER_KEEP', 200)
+    stale = list(
+        RequestProfile.objects.order_by('-created_at').values_list('pk', flat=True)[keep:keep + 100]
+    )
+    if stale:
+        RequestProfile.objects.filter(pk__in=stale).delete()
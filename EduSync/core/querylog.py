@@ -0,0 +1,134 @@
+"""
+Database instrumentation and the slow query log.
+
+``QueryInstrumentation`` is installed as an ``execute_wrapper`` on every
+database connection (see ``CoreConfig.ready``). It adds each statement to the
+current request's ``QueryStats`` (used by metrics), and statements slower than
+``settings.SLOW_QUERY_THRESHOLD_MS`` are written as one JSON object per line
+to the ``edusync.slow_queries`` logger, which settings.LOGGING sends to a
+rotating file. Each record names the view and the first EduSync source
+frame that issued the query; ``manage.py slow_query_report`` aggregates the
+log by SQL shape.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('edusync.slow_queries')
+
+# Set by core.middleware.QueryContextMiddleware for the current request.
+current_view = contextvars.ContextVar('current_view', default='')
+# Set by whoever wants per-request query totals (e.g. MetricsMiddleware).
+current_query_stats = contextvars.ContextVar('current_query_stats', default=None)
+
+# Modules that wrap requests, templates and cache lookups. A query issued
+# through them is attributed to the code that called them instead.
+_CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+INSTRUMENTATION = frozenset(
+    os.path.join(_CORE_DIR, name)
+    for name in (
+        'admission.py', 'cache.py', 'generations.py', 'metrics.py',
+        'middleware.py', 'profiling.py', 'querylog.py', 'timing.py',
+    )
+)
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_VALUES_RE = re.compile(r'\bVALUES\s*(?:\([^()]*\)\s*,?\s*)+', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse literals, IN lists and multi-row VALUES so similar statements share a shape."""
+    shape = _STRING_RE.sub('?', sql)
+    shape = _NUMBER_RE.sub('?', shape)
+    shape = _IN_LIST_RE.sub('IN (...)', shape)
+    shape = _VALUES_RE.sub('VALUES (...) ', shape)
+    return _SPACE_RE.sub(' ', shape).strip()
+
+
+def params_hash(params):
+    if params is None:
+        return ''
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+
+
+def find_origin(base_dir, skip=INSTRUMENTATION):
+    """
+    ``(relative/path.py:function, lineno)`` of the innermost project frame
+    outside the instrumentation modules in ``skip``.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and filename not in skip
+            and 'site-packages' not in filename
+        ):
+            relative = os.path.relpath(filename, base_dir).replace(os.sep, '/')
+            return f"{relative}:{frame.f_code.co_name}", frame.f_lineno
+        frame = frame.f_back
+    return '', None
+
+
+class QueryInstrumentation:
+    def __init__(self, threshold_ms):
+        self.threshold = None if threshold_ms is None else threshold_ms / 1000
+        self.base_dir = os.fspath(settings.BASE_DIR) + os.sep
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            stats = current_query_stats.get()
+            if stats is not None:
+                stats.count += 1
+                stats.duration += duration
+            if self.threshold is not None and duration >= self.threshold:
+                self.record(sql, params, many, duration, context)
+
+    def record(self, sql, params, many, duration, context):
+        origin, line = find_origin(self.base_dir)
+        logger.warning(json.dumps({
+            'ts': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'shape': normalize_sql(sql),
+            'sql': sql,
+            'params_hash': params_hash(params),
+            'many': many,
+            'alias': context['connection'].alias,
+            'view': current_view.get(),
+            'origin': origin,
+            'line': line,
+        }))
+
+
+def install(sender, connection, **kwargs):
+    """``connection_created`` receiver that attaches QueryInstrumentation."""
+    if not any(isinstance(w, QueryInstrumentation) for w in connection.execute_wrappers):
+        # Outermost position, so execute_wrapper() context managers that
+        # were already active keep popping their own wrapper on exit.
+        connection.execute_wrappers.insert(
+            0, QueryInstrumentation(getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None))
+        )
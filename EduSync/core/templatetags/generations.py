@@ -0,0 +1,59 @@
+import hashlib
+
+from django import template
+from django.core.cache import cache
+
+from core import generations
+
+register = template.Library()
+
+
+class CacheGenerationNode(template.Node):
+    def __init__(self, nodelist, timeout, name, institution, namespaces, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.institution = institution
+        self.namespaces = namespaces
+        self.vary_on = vary_on
+
+    def render(self, context):
+        institution_id = self.institution.resolve(context)
+        if not institution_id:
+            return self.nodelist.render(context)
+        namespaces = tuple(ns.strip() for ns in self.namespaces.resolve(context).split(',') if ns.strip())
+        vary = hashlib.md5(':'.join(str(v.resolve(context)) for v in self.vary_on).encode()).hexdigest()
+        key = generations.make_key(institution_id, namespaces, 'fragment', self.name, vary)
+        value = generations.get(key, namespaces)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, self.timeout.resolve(context))
+        return value
+
+
+@register.tag('cachegen')
+def do_cachegen(parser, token):
+    """
+    Cache a template fragment until one of the institution's namespaces is
+    bumped (see core/generations.py)::
+
+        {% load generations %}
+        {% cachegen 3600 course_matrix institution_id "courses,roster" [var1 var2 ...] %}
+            ...
+        {% endcachegen %}
+    """
+    nodelist = parser.parse(('endcachegen',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if len(bits) < 5:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a timeout, a fragment name, an institution and namespaces."
+        )
+    return CacheGenerationNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        parser.compile_filter(bits[3]),
+        parser.compile_filter(bits[4]),
+        [parser.compile_filter(bit) for bit in bits[5:]],
+    )
@@ -0,0 +1,437 @@
+import json
+import marshal
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from accounts.roles import ROLE_SESSION_KEY
+from accounts.signup import register_institution
+
+from . import admission, generations, metrics, profiling, querylog, warmup
+from .cache import single_flight
+from .middleware import DEFAULT_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, StaticAssetMiddleware
+from .paginator import EstimatedCountPaginator
+from .models import CacheGeneration, RequestProfile
+
+
+class GenerationCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_bump_invalidates_only_its_namespace_and_institution(self):
+        get = lambda inst, ns: generations.cached(inst, ns, 'value', self.compute)
+        self.assertEqual(get(1, ('courses',)), 1)
+        self.assertEqual(get(1, ('roster',)), 2)
+        self.assertEqual(get(2, ('courses',)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            generations.bump(1, 'courses')
+        self.assertEqual(get(1, ('courses',)), 4)
+        self.assertEqual(get(1, ('roster',)), 2)
+        self.assertEqual(get(2, ('courses',)), 3)
+
+    def test_institution_bump_invalidates_every_namespace(self):
+        generations.cached(1, ('courses', 'roster'), 'value', self.compute)
+        with self.captureOnCommitCallbacks(execute=True):
+            generations.bump(1)
+        self.assertEqual(generations.cached(1, ('roster', 'courses'), 'value', self.compute), 2)
+
+    def test_bump_waits_for_commit(self):
+        generations.cached(1, ('grades',), 'value', self.compute)
+        with self.captureOnCommitCallbacks(execute=False):
+            generations.bump(1, 'grades')
+            self.assertEqual(generations.cached(1, ('grades',), 'value', self.compute), 1)
+
+    def test_bump_from_another_worker_is_seen(self):
+        generations.cached(1, ('roster',), 'value', self.compute)
+        # Another worker's bump only reaches the shared counter table.
+        CacheGeneration.objects.filter(institution_id=1, namespace='roster').update(value=F('value') + 1)
+        self.assertEqual(generations.cached(1, ('roster',), 'value', self.compute), 2)
+
+    def test_fragment_tag(self):
+        template = Template('{% load generations %}{% cachegen 60 frag inst "roster" %}{{ value }}{% endcachegen %}')
+        self.assertEqual(template.render(Context({'inst': 1, 'value': 'a'})), 'a')
+        self.assertEqual(template.render(Context({'inst': 1, 'value': 'b'})), 'a')
+        with self.captureOnCommitCallbacks(execute=True):
+            generations.bump(1, 'roster')
+        self.assertEqual(template.render(Context({'inst': 1, 'value': 'b'})), 'b')
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(single_flight('k', compute, 60))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(values, ['value'] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_lock_falls_back_to_computing(self):
+        cache.add('k:lock', 1, 60)
+        self.assertEqual(single_flight('k', lambda: 'value', 60, wait=0.1), 'value')
+        self.assertEqual(cache.get('k'), 'value')
+
+
+class AdmissionControlTests(SimpleTestCase):
+    def test_reads_are_shed_instead_of_queued(self):
+        pool = admission.Pool('student', 1, 5, 1.0)
+        self.assertIsNone(pool.acquire())
+        self.assertEqual(pool.acquire(wait=False), admission.LOW_PRIORITY)
+        pool.release()
+        self.assertIsNone(pool.acquire(wait=False))
+
+    def test_queue_is_bounded_and_waits_time_out(self):
+        pool = admission.Pool('teacher', 1, 0, 1.0)
+        pool.acquire()
+        self.assertEqual(pool.acquire(), admission.QUEUE_FULL)
+        pool.queue = 1
+        pool.timeout = 0.05
+        self.assertEqual(pool.acquire(), admission.TIMEOUT)
+        self.assertEqual(pool.waiting, 0)
+
+    def test_queued_request_is_admitted_when_a_slot_frees(self):
+        pool = admission.Pool('institution_admin', 1, 1, 5.0)
+        pool.acquire()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(pool.acquire()))
+        waiter.start()
+        while not pool.waiting:
+            time.sleep(0.01)
+        pool.release()
+        waiter.join()
+        self.assertEqual(results, [None])
+        self.assertEqual(pool.active, 1)
+
+    @override_settings(ADMISSION_LIMITS={'anonymous': (0, 0, 0)}, ADMISSION_RETRY_AFTER=7)
+    def test_full_pool_answers_503_with_retry_after(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class WarmupTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_templates_are_compiled(self):
+        self.assertGreater(warmup._load_templates(), 0)
+
+    def test_no_step_fails(self):
+        with self.assertNoLogs('core.warmup', 'ERROR'):
+            warmup.warmup()
+
+
+class MetricsStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.enterContext(override_settings(METRICS_DIR=self.dir))
+
+    def write_snapshot(self, pid, started, value):
+        with open(os.path.join(self.dir, f'{pid}-{started}.json'), 'w') as handle:
+            json.dump({
+                'pid': pid, 'started': started,
+                'counters': [['edusync_test_total', [], value]],
+                'gauges': [['edusync_test_in_flight', [], 1]],
+                'histograms': [],
+            }, handle)
+
+    def totals(self):
+        counters, gauges, _ = metrics.collect()
+        return counters[('edusync_test_total', ())], gauges[('edusync_test_in_flight', ())]
+
+    def test_exited_worker_is_folded_into_the_aggregate(self):
+        self.write_snapshot(2 ** 30, 1, 3)  # above pid_max: never alive
+        self.assertEqual(self.totals(), (3, 0))
+        self.assertEqual(sorted(n for n in os.listdir(self.dir) if n.endswith('.json')), [metrics.AGGREGATE])
+        self.write_snapshot(2 ** 30 + 1, 1, 2)
+        self.assertEqual(self.totals(), (5, 0))
+
+    def test_folded_snapshot_left_behind_is_not_counted_twice(self):
+        self.write_snapshot(2 ** 30, 1, 3)
+        metrics.collect()
+        self.write_snapshot(2 ** 30, 1, 3)  # as if the removal never happened
+        self.assertEqual(self.totals(), (3, 0))
+
+    @unittest.skipUnless(os.path.exists('/proc/self/stat'), 'needs /proc')
+    def test_reused_pid_is_a_different_worker(self):
+        pid, started = metrics.identity()
+        self.write_snapshot(pid, started - 1, 4)
+        self.assertEqual(self.totals(), (4, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.dir, f'{pid}-{started - 1}.json')))
+
+
+class RequestRoleTests(TestCase):
+    @override_settings(ADMISSION_LIMITS={})
+    def test_role_looked_up_for_an_older_session_is_saved(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.client.force_login(admin)
+        session = self.client.session
+        session.pop(ROLE_SESSION_KEY, None)
+        session.save()
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(self.client.session[ROLE_SESSION_KEY], 'institution_admin')
+
+
+class SlowQueryLogTests(TestCase):
+    def test_normalize_collapses_literals_in_lists_and_values(self):
+        self.assertEqual(
+            querylog.normalize_sql("SELECT * FROM t WHERE name = 'O''Brien' AND id IN (%s, %s, %s) LIMIT 21"),
+            'SELECT * FROM t WHERE name = ? AND id IN (...) LIMIT ?',
+        )
+        self.assertEqual(
+            querylog.normalize_sql('INSERT INTO t (a, b)\n VALUES (%s, %s), (%s, %s)'),
+            querylog.normalize_sql('INSERT INTO t (a, b) VALUES (%s, %s)'),
+        )
+
+    def test_origin_skips_instrumentation_frames(self):
+        instrumentation = querylog.QueryInstrumentation(0)
+        with connection.execute_wrapper(instrumentation), self.assertLogs('edusync.slow_queries') as logs:
+            generations.current(1, generations.COURSES)
+        records = [json.loads(line.split(':', 2)[2]) for line in logs.output]
+        self.assertEqual(
+            {(r['origin'], r['line'] is not None) for r in records},
+            {('core/tests.py:test_origin_skips_instrumentation_frames', True)},
+        )
+
+    def test_report_groups_rotated_logs_by_shape(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'slow.jsonl')
+        records = [
+            {'shape': 'SELECT ? FROM a', 'duration_ms': 300.0, 'origin': 'student/views.py:index', 'line': 10, 'view': 'student:index'},
+            {'shape': 'SELECT ? FROM a', 'duration_ms': 500.0, 'origin': 'student/views.py:index', 'line': 10, 'view': 'student:index'},
+            {'shape': 'SELECT ? FROM b', 'duration_ms': 250.0},
+        ]
+        with open(f'{path}.1', 'w') as log:
+            log.write(json.dumps(records[0]) + '\n')
+        with open(path, 'w') as log:
+            log.write(''.join(json.dumps(r) + '\n' for r in records[1:]) + 'not json\n')
+
+        out = StringIO()
+        call_command('slow_query_report', log=path, no_color=True, stdout=out)
+        report = out.getvalue()
+        self.assertIn('2 shapes from 3 slow statements in 2 file(s), 1 unreadable line(s)', report)
+        self.assertIn('count=2  total=800.0ms  mean=400.0ms  max=500.0ms', report)
+        self.assertLess(report.index('FROM a'), report.index('FROM b'))
+        self.assertIn('from student/views.py:index:10 (2)', report)
+        self.assertIn('view student:index (2)', report)
+
+
+@override_settings(ADMISSION_LIMITS={})
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser('ops', 'ops@example.com', 'pw')
+
+    def test_staff_request_is_captured_and_browsable(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:index'), HTTP_X_EDUSYNC_PROFILE='1')
+        profile = RequestProfile.objects.get(request_id=response['X-Profile-Id'])
+        self.assertEqual((profile.method, profile.path, profile.status_code), ('GET', '/admin/', 200))
+        self.assertEqual(profile.query_count, len(profile.sql_timeline))
+        self.assertGreater(profile.query_count, 0)
+        self.assertTrue(profile.allocations)
+        self.assertIn('cumulative', profile.stats_summary)
+
+        page = self.client.get(reverse('admin:core_requestprofile_change', args=[profile.pk]))
+        self.assertContains(page, 'SQL timeline')
+        self.assertContains(page, f'{profile.request_id}.prof')
+        download = self.client.get(reverse('admin:core_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(marshal.loads(download.content), marshal.loads(bytes(profile.profile_data)))
+
+    def test_only_staff_can_ask_for_a_profile(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('dashboard') + '?__profile=1')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+class ConcurrentProfilingTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('threads need a file-backed test database')
+
+    def test_overlapping_profiles_do_not_stop_each_others_tracing(self):
+        factory = RequestFactory()
+        errors = []
+
+        def view(seconds):
+            def get_response(request):
+                time.sleep(seconds)
+                return HttpResponse()
+            return get_response
+
+        def profile(seconds):
+            try:
+                profiling.profile_request(factory.get('/'), view(seconds))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        # The first one finishes (and would stop tracemalloc) while the
+        # second one is still running.
+        threads = [threading.Thread(target=profile, args=(0.2,)), threading.Thread(target=profile, args=(0.3,))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads[1].start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+
+class StaticAssetMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = os.path.join(directory.name, 'static')
+        os.mkdir(self.root)
+        for name, body in (
+            ('app.3f2a.css', b'plain'), ('app.3f2a.css.gz', b'gzip'), ('app.3f2a.css.br', b'brotli'),
+            ('logo.png', b'png'),
+        ):
+            with open(os.path.join(self.root, name), 'wb') as handle:
+                handle.write(body)
+        with open(os.path.join(directory.name, 'secret.txt'), 'w') as handle:
+            handle.write('secret')
+        with override_settings(DEBUG=False, STATIC_ROOT=self.root):
+            self.middleware = StaticAssetMiddleware(lambda request: HttpResponse('app'))
+        self.middleware.immutable = {'app.3f2a.css'}
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = self.middleware(self.factory.get(path, headers=headers))
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_hashed_names_are_immutable(self):
+        response = self.get('/static/app.3f2a.css')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(self.get('/static/logo.png')['Cache-Control'], DEFAULT_CACHE_CONTROL)
+
+    def test_variant_follows_accept_encoding_qvalues(self):
+        for accept, expected in (
+            ('', b'plain'),
+            ('gzip, deflate, br', b'brotli'),
+            ('gzip', b'gzip'),
+            ('gzip;q=0', b'plain'),
+            ('br;q=0, gzip', b'gzip'),
+            ('br;q=0.5, gzip;q=0.8', b'gzip'),
+            ('*', b'brotli'),
+            ('*;q=0.1, br;q=0', b'gzip'),
+        ):
+            with self.subTest(accept=accept):
+                response = self.get('/static/app.3f2a.css', accept_encoding=accept)
+                self.assertEqual(self.body(response), expected)
+                self.assertEqual(response.get('Content-Encoding'), {b'plain': None, b'gzip': 'gzip', b'brotli': 'br'}[expected])
+
+    def test_unmodified_asset_is_a_304(self):
+        last_modified = self.get('/static/logo.png')['Last-Modified']
+        response = self.get('/static/logo.png', if_modified_since=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], DEFAULT_CACHE_CONTROL)
+
+    def test_paths_outside_the_root_fall_through(self):
+        for path in ('/static/../secret.txt', '/static/%2e%2e/secret.txt', '/static/app.3f2a.css.gz'):
+            with self.subTest(path=path):
+                self.assertIsNone(self.middleware.serve(self.factory.get('/'), path[len('/static/'):]))
+        self.assertEqual(self.get('/static/missing.css').content, b'app')
+
+
+@override_settings(ADMISSION_LIMITS={})
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.client.force_login(admin)
+
+    def segments(self, response):
+        return re.findall(r'(?:^|, )(\w+);dur=', response['Server-Timing'])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATES={'institution_admin': 1.0})
+    def test_header_breaks_the_request_down(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(self.segments(response), ['mw', 'view', 'db', 'tpl', 'session', 'total'])
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="ORM, \d+ queries"')
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATES={'institution_admin': 0.25, 'teacher': 1.0})
+    def test_header_is_sampled_per_role(self):
+        with mock.patch('core.middleware.random.random', side_effect=[0.1, 0.5, 0.24, 0.9]):
+            sampled = ['Server-Timing' in self.client.get(reverse('dashboard')) for _ in range(4)]
+        self.assertEqual(sampled, [True, False, True, False])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATES={'institution_admin': 0.0, 'teacher': 1.0})
+    def test_role_without_a_rate_gets_no_header(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard')))
+
+
+class SmallCapPaginator(EstimatedCountPaginator):
+    count_cap = 3
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        CacheGeneration.objects.bulk_create(
+            [CacheGeneration(institution_id=i % 2, namespace=f'ns{i}') for i in range(10)]
+        )
+
+    def count(self, queryset):
+        with self.assertNumQueries(1) as queries:
+            count = SmallCapPaginator(queryset, 2).count
+        return count, queries.captured_queries[0]['sql']
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'MAX(rowid) estimate is SQLite only')
+    def test_unfiltered_count_is_the_rowid_estimate(self):
+        CacheGeneration.objects.filter(namespace__in=['ns0', 'ns1']).delete()
+        count, sql = self.count(CacheGeneration.objects.order_by('pk'))
+        self.assertEqual(count, CacheGeneration.objects.order_by('-pk').values_list('pk', flat=True)[0])
+        self.assertIn('MAX(rowid)', sql)
+
+    def test_small_table_is_counted_exactly(self):
+        # Below the cap the estimate is not trusted.
+        CacheGeneration.objects.exclude(namespace__in=['ns0', 'ns1']).delete()
+        self.assertEqual(SmallCapPaginator(CacheGeneration.objects.order_by('pk'), 2).count, 2)
+
+    def test_filtered_count_stops_at_the_cap(self):
+        count, sql = self.count(CacheGeneration.objects.filter(institution_id=0).order_by('pk'))
+        self.assertEqual(count, 4)  # 5 match; the cap is 3
+        self.assertIn('LIMIT 4', sql)
+        self.assertNotIn('ORDER BY', sql)
+        self.assertEqual(self.count(CacheGeneration.objects.filter(namespace='ns1').order_by('pk'))[0], 1)
@@ -0,0 +1,77 @@
+"""
+Per-request timing breakdown for the ``Server-Timing`` response header.
+
+``ServerTimingMiddleware`` opens a ``RequestTiming`` for the request; the
+pieces below add to it while it is active:
+
+* ``ServerTimingViewMiddleware`` (last in MIDDLEWARE) times the view,
+* ``DjangoTemplates`` times every top-level template render,
+* ``TimedSessionMiddleware`` times the session save,
+* ``core.querylog.QueryInstrumentation`` counts ORM queries and their time.
+"""
+import contextvars
+from time import perf_counter
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates
+from django.template.backends.django import Template as BaseTemplate
+from django.template.backends.django import reraise
+
+current_timing = contextvars.ContextVar('current_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = perf_counter()
+        self.durations = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self, total, query_count=0, query_time=0.0):
+        """Render the ``Server-Timing`` value; ``mw`` is whatever is left over."""
+        view = self.durations.get('view', 0.0)
+        session = self.durations.get('session', 0.0)
+        entries = [
+            ('mw', max(total - view - session, 0.0), 'Middleware'),
+            ('view', view, 'View (incl. ORM and templates)'),
+        ]
+        if query_count:
+            entries.append(('db', query_time, f'ORM, {query_count} queries'))
+        if 'tpl' in self.durations:
+            entries.append(('tpl', self.durations['tpl'], 'Template render'))
+        if 'session' in self.durations:
+            entries.append(('session', session, 'Session save'))
+        entries.append(('total', total, 'Total'))
+        return ', '.join(f'{name};dur={seconds * 1000:.2f};desc="{desc}"' for name, seconds, desc in entries)
+
+
+def add(name, seconds):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        timing = current_timing.get()
+        if timing is None:
+            return super().render(context, request)
+        start = perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timing.add('tpl', perf_counter() - start)
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """The stock Django backend, with render time reported to Server-Timing."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,121 @@
+"""
+Worker warmup.
+
+A fresh worker otherwise pays on its first requests for building the URL
+resolver, compiling templates into the cached loader, opening database
+connections and filling per-process caches. ``warmup()`` does all of that
+up front; it is called from ``wsgi.py``/``asgi.py`` when
+``settings.WARMUP_ON_STARTUP`` is enabled and is also what
+``manage.py startup_profile`` times.
+
+Apps can add their own cache priming with ``@warmup.register``.
+"""
+import logging
+import os
+from time import perf_counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_hooks = []
+
+
+def register(func):
+    """Register a callable to run during the ``caches`` warmup step."""
+    _hooks.append(func)
+    return func
+
+
+def _django_engine():
+    """The project's Django template engine, whatever its alias."""
+    from django.template import engines
+    from django.template.backends.django import DjangoTemplates
+
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            return engine
+    raise LookupError('No Django template engine is configured.')
+
+
+def project_template_names():
+    """Relative names of every template that ships with EduSync itself."""
+    from django.template.utils import get_app_template_dirs
+
+    base_dir = os.fspath(settings.BASE_DIR)
+    engine = _django_engine()
+    dirs = list(engine.engine.dirs) + list(get_app_template_dirs('templates'))
+
+    names = set()
+    for template_dir in dirs:
+        template_dir = os.fspath(template_dir)
+        if not template_dir.startswith(base_dir):
+            continue  # Django's own admin/auth templates load on demand
+        for root, _, files in os.walk(template_dir):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    names.add(os.path.relpath(path, template_dir).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def _resolve_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Touching reverse_dict populates the resolver and every included URLconf.
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'reverse_dict'):
+            pattern.reverse_dict
+
+
+def _load_templates():
+    """Compile every project template into the cached loader. Returns the count."""
+    engine = _django_engine()
+    names = project_template_names()
+    for name in names:
+        engine.get_template(name)
+    return len(names)
+
+
+def _connect_databases():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def _prime_caches():
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    ContentType.objects.get_for_models(*apps.get_models())
+    # Loads the staticfiles manifest so {% static %} never hits the disk.
+    getattr(staticfiles_storage, 'hashed_files', None)
+
+    for hook in _hooks:
+        hook()
+
+
+STEPS = (
+    ('urls', _resolve_urls),
+    ('templates', _load_templates),
+    ('database', _connect_databases),
+    ('caches', _prime_caches),
+)
+
+
+def warmup():
+    """Run every warmup step and return ``{step: seconds}``."""
+    timings = {}
+    for label, step in STEPS:
+        start = perf_counter()
+        try:
+            step()
+        except Exception:
+            # A failed warmup must never stop a worker from booting.
+            logger.exception('Warmup step %r failed', label)
+        timings[label] = perf_counter() - start
+    return timings
@@ -60,7 +60,7 @@ def create_institution():
         user=admin_user,
         defaults={
             'role': 'institution_admin',
-            'institution': inst_name,
+            'institution': institution,
             'phone': "0987654321"
         }
     )
@@ -89,7 +89,7 @@ def create_teachers(institution):
             user=user,
             defaults={
                 'role': 'teacher',
-                'institution': institution.name,
+                'institution': institution,
                 'phone': f"555000{i}"
             }
         )
@@ -167,7 +167,7 @@ def create_students(institution, courses):
             user=user,
             defaults={
                 'role': 'student',
-                'institution': institution.name,
+                'institution': institution,
                 'phone': f"999000{i}"
             }
         )
@@ -1,7 +1,34 @@
 from django.contrib import admin
-from .models import Institution
+from .models import Institution, News
+
+
+class InstitutionListFilter(admin.SimpleListFilter):
+    """
+    Sidebar filter by institution. Subclasses set ``field_path`` to the
+    lookup that reaches Institution from the filtered model.
+    """
+    title = 'institution'
+    parameter_name = 'institution'
+    field_path = 'institution'
+
+    def lookups(self, request, model_admin):
+        return Institution.objects.order_by('name').values_list('id', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f'{self.field_path}__id': self.value()})
+        return queryset
+
 
 @admin.register(Institution)
 class InstitutionAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'phone')
     search_fields = ('name', 'email')
+
+
+@admin.register(News)
+class NewsAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'institution', 'created_at')
+    list_filter = (InstitutionListFilter,)
+    list_select_related = ('institution',)
+    search_fields = ('content',)
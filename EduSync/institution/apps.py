@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class InstitutionConfig(AppConfig):
     name = 'institution'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from core import generations
+        from .models import News
+
+        post_save.connect(generations.news_changed, sender=News, dispatch_uid='core.generations.news_saved')
+        post_delete.connect(generations.news_changed, sender=News, dispatch_uid='core.generations.news_deleted')
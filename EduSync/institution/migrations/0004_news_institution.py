@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institution', '0003_news'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='institution',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='news', to='institution.institution'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['institution', 'created_at'], name='institution_institu_367f1b_idx'),
+        ),
+    ]
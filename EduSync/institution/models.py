@@ -14,8 +14,16 @@ class Institution(models.Model):
         return self.name
 
 class News(models.Model):
+    # Null only for items posted before news was scoped per institution;
+    # those are shown nowhere until assigned in the Django admin.
+    institution = models.ForeignKey(Institution, on_delete=models.CASCADE, null=True, blank=True, related_name='news')
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['institution', 'created_at']),
+        ]
+
     def __str__(self):
         return self.content[:30]
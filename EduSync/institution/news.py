@@ -0,0 +1,70 @@
+"""
+Per-institution news.
+
+Dashboards show the latest ``WINDOW`` items of the institution, read with
+one query on the (institution, created_at) index. The rendered ticker
+(institution/includes/news_ticker.html) is cached with ``{% cachegen %}``
+under the institution's ``news`` generation, so it is rendered without a
+query until news is added, edited or deleted.
+
+Open dashboards get new items from ``events()``, a server-sent-events
+stream served by the ASGI app. Each connection checks the ``news``
+generation counter every ``POLL_INTERVAL`` seconds and only queries after
+a bump. It ends after ``STREAM_DURATION`` seconds; the browser then
+reconnects and resumes from the last item it received (``Last-Event-ID``).
+Edits and deletions show up on the next page load.
+"""
+import asyncio
+import json
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+
+from core import generations
+
+from .models import News
+
+WINDOW = 20
+MANAGE_WINDOW = 100
+
+POLL_INTERVAL = 2.0
+KEEPALIVE_INTERVAL = 15.0
+STREAM_DURATION = 5 * 60
+RETRY_MS = 3000
+
+
+def recent(institution, window=WINDOW):
+    """The latest ``window`` news items of ``institution`` (lazy)."""
+    return News.objects.filter(institution=institution).order_by('-created_at')[:window]
+
+
+def _event(item):
+    data = json.dumps({'id': item.pk, 'content': item.content})
+    return f'id: {item.pk}\nevent: news\ndata: {data}\n\n'
+
+
+async def _after(institution_id, last_id):
+    items = News.objects.filter(institution_id=institution_id, id__gt=last_id).order_by('-created_at')[:WINDOW]
+    return [item async for item in items][::-1]
+
+
+async def events(institution_id, last_id):
+    """SSE frames for news of ``institution_id`` newer than ``last_id``."""
+    yield f'retry: {RETRY_MS}\n\n'
+    stamp = None
+    deadline = monotonic() + STREAM_DURATION
+    last_sent = monotonic()
+    while True:
+        current = await sync_to_async(generations.current)(institution_id, generations.NEWS)
+        if current != stamp:
+            stamp = current
+            for item in await _after(institution_id, last_id):
+                last_id = item.pk
+                last_sent = monotonic()
+                yield _event(item)
+        if monotonic() >= deadline:
+            return
+        if monotonic() - last_sent >= KEEPALIVE_INTERVAL:
+            last_sent = monotonic()
+            yield ': keepalive\n\n'
+        await asyncio.sleep(POLL_INTERVAL)
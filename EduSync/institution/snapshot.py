@@ -0,0 +1,329 @@
+"""
+Streaming per-institution snapshots.
+
+``export_snapshot`` writes one institution and everything that belongs to it
+as gzip-compressed JSON lines, one row per line, sections in dependency
+order. Rows are read with ``.iterator()`` so memory stays flat regardless of
+tenant size.
+
+``restore_snapshot`` reads the archive back section by section, remaps every
+primary and foreign key to the rows it creates, and inserts with chunked
+``bulk_create`` inside one transaction with constraint checks deferred to
+the end (the same approach ``loaddata`` takes). Course facets and standings
+are rebuilt for the restored institution afterwards.
+
+Generated usernames, roll numbers and employee ids embed the institution
+id (accounts/identifiers.py). The restored institution gets a new id, so
+they are rebased onto it as they are loaded, and its identifier sequences
+are moved past the highest restored number. The institution is therefore
+loaded right after its admin user, before the users that need rebasing.
+"""
+import datetime
+import gzip
+import json
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from accounts import identifiers
+from accounts.models import IdentifierSequence, LoginTable, SignupTable, UserProfile
+from academics import facets, standings
+from academics.models import Course, Enrollment, Grade
+from student.models import RolloverBatch, RolloverRun, Student
+from teacher.models import Teacher
+
+from .models import Institution, News
+
+FORMAT = 'edusync-institution'
+VERSION = 3
+CHUNK_SIZE = 5000
+
+COURSE_TEACHERS = 'academics.course_teachers'
+
+# Models in the order they are first loaded. Users come in three sections:
+# the admin before the institution, teachers and students after it.
+RESTORE_ORDER = (
+    'auth.user',
+    'accounts.signuptable',
+    'accounts.logintable',
+    'institution.institution',
+    'accounts.identifiersequence',
+    'institution.news',
+    'accounts.userprofile',
+    'teacher.teacher',
+    'academics.course',
+    COURSE_TEACHERS,
+    'student.student',
+    'student.rolloverrun',
+    'student.rolloverbatch',
+    'academics.grade',
+    'academics.enrollment',
+)
+
+# Fields holding identifiers generated by accounts/identifiers.py.
+IDENTIFIER_FIELDS = {
+    'auth.user': 'username',
+    'teacher.teacher': 'employee_id',
+    'student.student': 'student_id',
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _Encoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder truncates datetimes to milliseconds; keep microseconds
+    # so restored rows compare equal to the originals.
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _sections(institution):
+    """``(label, queryset)`` pairs in load order."""
+    admin_users = User.objects.filter(pk=institution.admin_id)
+    teacher_users = User.objects.filter(teacher__institution=institution)
+    student_users = User.objects.filter(student__institution=institution)
+    through = Course.teachers.through
+    return [
+        ('auth.user', admin_users),
+        ('accounts.signuptable', SignupTable.objects.filter(institution_name=institution.name)),
+        ('accounts.logintable', LoginTable.objects.filter(signup__institution_name=institution.name)),
+        ('institution.institution', Institution.objects.filter(pk=institution.pk)),
+        ('accounts.identifiersequence', IdentifierSequence.objects.filter(institution=institution)),
+        ('institution.news', News.objects.filter(institution=institution)),
+        ('auth.user', teacher_users),
+        ('auth.user', student_users),
+        ('accounts.userprofile', UserProfile.objects.filter(institution=institution)),
+        ('teacher.teacher', Teacher.objects.filter(institution=institution)),
+        ('academics.course', Course.objects.filter(institution=institution)),
+        (COURSE_TEACHERS, through.objects.filter(course__institution=institution)),
+        ('student.student', Student.objects.filter(institution=institution)),
+        ('student.rolloverrun', RolloverRun.objects.filter(institution=institution)),
+        ('student.rolloverbatch', RolloverBatch.objects.filter(run__institution=institution)),
+        ('academics.grade', Grade.objects.filter(course__institution=institution)),
+        ('academics.enrollment', Enrollment.objects.filter(course__institution=institution)),
+    ]
+
+
+def _model(label):
+    if label == COURSE_TEACHERS:
+        return Course.teachers.through
+    return apps.get_model(label)
+
+
+def _columns(model):
+    """Concrete non-pk fields, by attname (``course_id`` rather than ``course``)."""
+    return [f for f in model._meta.concrete_fields if not f.primary_key]
+
+
+def export_snapshot(institution, path, progress=None):
+    """Write ``institution`` to ``path``; returns ``{label: rows}``."""
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8') as archive:
+        archive.write(json.dumps({
+            'format': FORMAT,
+            'version': VERSION,
+            'institution': institution.name,
+            'exported_at': timezone.now(),
+        }, cls=_Encoder) + '\n')
+        for label, queryset in _sections(institution):
+            model = _model(label)
+            attnames = [f.attname for f in _columns(model)]
+            rows = queryset.order_by('pk').values_list('pk', *attnames).iterator(chunk_size=CHUNK_SIZE)
+            for row in rows:
+                archive.write(json.dumps(
+                    {'model': label, 'pk': row[0], 'fields': dict(zip(attnames, row[1:]))},
+                    cls=_Encoder,
+                ) + '\n')
+                counts[label] = counts.get(label, 0) + 1
+            if progress:
+                progress(label, counts.get(label, 0))
+        archive.write(json.dumps({'end': True, 'counts': counts}) + '\n')
+    return counts
+
+
+@contextmanager
+def _raw_timestamps(models):
+    """
+    bulk_create() runs pre_save(add=True), which would stamp auto_now /
+    auto_now_add fields with the current time. Switch them off so restored
+    rows keep their original timestamps.
+    """
+    switched = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            for attr in ('auto_now', 'auto_now_add'):
+                if getattr(field, attr, False):
+                    setattr(field, attr, False)
+                    switched.append((field, attr))
+    try:
+        yield
+    finally:
+        for field, attr in switched:
+            setattr(field, attr, True)
+
+
+class _Loader:
+    def __init__(self, using, progress=None):
+        self.using = using
+        self.connection = connections[using]
+        self.progress = progress
+        self.pk_map = {}
+        self.counts = {}
+        self.label = None
+        self.pending = []
+        self.sequences = {}  # {prefix: highest number restored}
+
+    def add(self, label, old_pk, fields):
+        if label != self.label:
+            self.flush()
+            self.label = label
+        self.pending.append((old_pk, fields))
+        if len(self.pending) >= CHUNK_SIZE:
+            self.flush()
+
+    def _build(self, model, fields):
+        obj = model()
+        for field in _columns(model):
+            if field.attname not in fields:
+                continue
+            value = fields[field.attname]
+            if field.is_relation and value is not None:
+                target = field.related_model._meta.label_lower
+                try:
+                    value = self.pk_map[target][value]
+                except KeyError:
+                    if not field.null:
+                        raise SnapshotError(
+                            f"{model._meta.label_lower}.{field.attname}={value} points outside the snapshot"
+                        )
+                    value = None
+            elif value is not None:
+                value = field.to_python(value)
+            setattr(obj, field.attname, value)
+        label = model._meta.label_lower
+        if label in IDENTIFIER_FIELDS:
+            self._rebase(obj, IDENTIFIER_FIELDS[label])
+        elif label == 'student.rolloverbatch':
+            obj.previous = self._remap_previous(obj.previous)
+        return obj
+
+    def _rebase(self, obj, attname):
+        institutions = self.pk_map.get('institution.institution')
+        if not institutions:
+            return  # the admin: chosen at signup, never generated
+        (old_id, new_id), = institutions.items()
+        value = identifiers.rebase(getattr(obj, attname), old_id, new_id)
+        setattr(obj, attname, value)
+        parsed = identifiers.parse(value)
+        if parsed is not None and parsed[0] == new_id:
+            _, prefix, number = parsed
+            self.sequences[prefix] = max(self.sequences.get(prefix, 0), number)
+
+    def _remap_previous(self, previous):
+        students = self.pk_map.get('student.student', {})
+        courses = self.pk_map.get('academics.course', {})
+        return [
+            {
+                **group,
+                'course_id': courses.get(group['course_id']),
+                'ids': [students[pk] for pk in group['ids'] if pk in students],
+            }
+            for group in previous
+        ]
+
+    def flush(self):
+        if not self.pending:
+            return
+        label, model = self.label, _model(self.label)
+        objs = [self._build(model, fields) for _, fields in self.pending]
+        mapping = self.pk_map.setdefault(label, {})
+        if self.connection.features.can_return_rows_from_bulk_insert:
+            created = model.objects.using(self.using).bulk_create(objs, batch_size=CHUNK_SIZE)
+            for (old_pk, _), obj in zip(self.pending, created):
+                mapping[old_pk] = obj.pk
+        elif label in self.NATURAL_KEYS:
+            model.objects.using(self.using).bulk_create(objs, batch_size=CHUNK_SIZE)
+            self._map_by_natural_key(label, model, objs, mapping)
+        elif label in self.REFERENCED:
+            for (old_pk, _), obj in zip(self.pending, objs):
+                obj.save(using=self.using, force_insert=True)
+                mapping[old_pk] = obj.pk
+        else:
+            model.objects.using(self.using).bulk_create(objs, batch_size=CHUNK_SIZE)
+        self.counts[label] = self.counts.get(label, 0) + len(objs)
+        if self.progress:
+            self.progress(label, self.counts[label])
+        self.pending = []
+
+    # Fallback for backends that cannot return ids from bulk inserts.
+    NATURAL_KEYS = {
+        'auth.user': 'username',
+        'accounts.signuptable': 'institution_name',
+        'institution.institution': 'name',
+        'teacher.teacher': 'employee_id',
+        'academics.course': 'code',
+        'student.student': 'student_id',
+    }
+
+    # Referenced, but without a natural key: inserted one by one (few rows).
+    REFERENCED = {'student.rolloverrun'}
+
+    def _map_by_natural_key(self, label, model, objs, mapping):
+        key = self.NATURAL_KEYS[label]
+        attname = model._meta.get_field(key).attname
+        # Keys as inserted: identifiers may have been rebased.
+        by_key = {getattr(obj, attname): old_pk for (old_pk, _), obj in zip(self.pending, objs)}
+        queryset = model.objects.using(self.using).filter(**{f'{key}__in': list(by_key)})
+        if label == 'academics.course':
+            queryset = queryset.filter(institution_id=self.pk_map['institution.institution'].get(
+                self.pending[0][1]['institution_id']))
+        for new_pk, value in queryset.values_list('pk', key):
+            mapping[by_key[value]] = new_pk
+
+
+def restore_snapshot(path, using=None, progress=None):
+    """Load an archive written by ``export_snapshot``; returns ``{label: rows}``."""
+    using = using or router.db_for_write(Institution)
+    connection = connections[using]
+    loader = _Loader(using, progress)
+    models = [_model(label) for label in RESTORE_ORDER]
+
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        header = json.loads(archive.readline() or '{}')
+        if header.get('format') != FORMAT or header.get('version') != VERSION:
+            raise SnapshotError(f"{path} is not an {FORMAT} v{VERSION} archive")
+
+        footer = None
+        with transaction.atomic(using=using), _raw_timestamps(models):
+            with connection.constraint_checks_disabled():
+                for line in archive:
+                    record = json.loads(line)
+                    if record.get('end'):
+                        footer = record
+                        break
+                    loader.add(record['model'], record.get('pk'), record['fields'])
+                loader.flush()
+                for institution_id in loader.pk_map.get('institution.institution', {}).values():
+                    for prefix, last_value in loader.sequences.items():
+                        identifiers.reseed(institution_id, prefix, last_value, using=using)
+            if footer is None:
+                raise SnapshotError(f"{path} is truncated (no end marker)")
+            if footer['counts'] != loader.counts:
+                raise SnapshotError(f"Row counts differ from the archive: {footer['counts']} != {loader.counts}")
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in models]
+            )
+
+    # Derived tables are not part of the archive; bulk_create sent no signals.
+    for institution_id in loader.pk_map.get('institution.institution', {}).values():
+        facets.rebuild(institution_id)
+    standings.refresh(loader.pk_map.get('academics.course', {}).values())
+    return loader.counts
@@ -1,3 +1,149 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts import identifiers
+from accounts.models import SignupTable, UserProfile
+from accounts.signup import register_institution
+from academics import enrollment, standings
+from academics.models import Course, CourseStanding, Enrollment, Grade
+from student.models import RolloverBatch, RolloverRun, Student
+from teacher.models import Teacher
+
+from . import news
+from .models import Institution, News
+from .snapshot import export_snapshot, restore_snapshot
+
+
+class InstitutionNewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = self.admin.userprofile.institution
+        other = register_institution('Other High', 'other', 'admin@other.edu', 's3cret!pw')
+        self.other_news = News.objects.create(institution=other.userprofile.institution, content='Other tenant')
+        self.client.force_login(self.admin)
+
+    def test_dashboards_only_show_own_news(self):
+        News.objects.create(institution=self.institution, content='Sports day')
+        for name in ('dashboard', 'institution_admin_dashboard'):
+            response = self.client.get(reverse(name))
+            self.assertContains(response, 'Sports day')
+            self.assertNotContains(response, 'Other tenant')
+
+    def test_cannot_edit_or_delete_other_institutions_news(self):
+        self.client.post(reverse('institution_admin_dashboard'), {'news': 'Hijacked', 'news_id': self.other_news.pk})
+        self.client.get(reverse('delete_news', args=[self.other_news.pk]))
+        self.other_news.refresh_from_db()
+        self.assertEqual(self.other_news.content, 'Other tenant')
+
+    def test_ticker_is_cached_until_news_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            News.objects.create(institution=self.institution, content='Sports day')
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('dashboard'))
+        self.assertFalse([q for q in queries if 'institution_news' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('institution_admin_dashboard'), {'news': 'Exams moved'})
+        self.assertContains(self.client.get(reverse('dashboard')), 'Exams moved')
+
+    def test_stream_is_disabled_without_asgi(self):
+        self.assertEqual(self.client.get(reverse('news_stream')).status_code, 204)
+
+    async def test_stream_sends_items_after_last_event_id(self):
+        seen = await News.objects.acreate(institution_id=self.institution.pk, content='Old')
+        await News.objects.acreate(institution_id=self.institution.pk, content='New')
+        await self.async_client.aforce_login(self.admin)
+        with mock.patch.object(news, 'STREAM_DURATION', 0):
+            response = await self.async_client.get(reverse('news_stream'), headers={'Last-Event-ID': str(seen.pk)})
+            body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        payloads = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+        self.assertEqual([p['content'] for p in payloads], ['New'])
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        user = User.objects.create_user(identifiers.username(self.institution, 'teacher'), password='pw')
+        UserProfile.objects.create(user=user, role='teacher', institution=self.institution)
+        teacher = Teacher.objects.create(
+            user=user, institution=self.institution, employee_id=identifiers.employee_ids(self.institution)[0],
+            department='Science', qualification='MSc',
+        )
+        course = Course.objects.create(institution=self.institution, code='CS101', name='Intro', capacity=1)
+        course.teachers.add(teacher)
+        students = []
+        for roll_number, year, marks in zip(identifiers.roll_numbers(self.institution, 2), ('Year 1', 'Year 2'), (90, 70)):
+            user = User.objects.create_user(identifiers.username(self.institution, 'student'), password='pw')
+            UserProfile.objects.create(user=user, role='student', institution=self.institution)
+            student = Student.objects.create(
+                user=user, institution=self.institution, student_id=roll_number, academic_year=year,
+            )
+            Grade.objects.create(student=student, course=course, grade='A' if marks >= 80 else 'C', marks=marks)
+            enrollment.register(student, course)
+            students.append(student)
+        standings.refresh([course.pk])
+        News.objects.create(institution=self.institution, content='Sports day')
+        run = RolloverRun.objects.create(institution=self.institution, rules={'promote': {}, 'graduate': [], 'courses': {}})
+        RolloverBatch.objects.create(run=run, previous=[
+            {'academic_year': 'Year 1', 'status': 'active', 'course_id': None, 'ids': [students[0].pk]},
+        ])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'lincoln.jsonl.gz')
+
+    def restore_next_to_the_source(self):
+        export_snapshot(self.institution, self.path)
+        # Free the details chosen at signup; the generated identifiers stay taken.
+        SignupTable.objects.all().delete()
+        Institution.objects.update(name='Lincoln (old)', email='old@lincoln.edu')
+        User.objects.filter(username='lincoln').update(username='lincoln-old')
+        restore_snapshot(self.path)
+        return Institution.objects.get(name='Lincoln High')
+
+    def test_restore_next_to_the_source_rebases_identifiers(self):
+        restored = self.restore_next_to_the_source()
+        student = Student.objects.select_related('user').get(institution=restored, academic_year='Year 1')
+        self.assertEqual(student.user.username, f'student_{restored.pk}_1')
+        self.assertEqual(student.student_id, f'STU{restored.pk}-00001')
+        self.assertEqual(identifiers.username(restored, 'student'), f'student_{restored.pk}_3')
+        teacher = Teacher.objects.select_related('user').get(institution=restored)
+        self.assertEqual(teacher.user.username, f'teacher_{restored.pk}_1')
+        self.assertEqual(teacher.employee_id, f'EMP{restored.pk}-0001')
+        self.assertEqual(list(restored.news.values_list('content', flat=True)), ['Sports day'])
+        batch = RolloverBatch.objects.get(run__institution=restored)
+        self.assertEqual(batch.previous[0]['ids'], [student.pk])
 
-# Create your tests here.
+    def test_academic_records_are_attached_to_the_restored_rows(self):
+        restored = self.restore_next_to_the_source()
+        course = Course.objects.get(institution=restored)
+        students = {s.academic_year: s for s in Student.objects.filter(institution=restored)}
+        self.assertEqual(list(course.teachers.all()), [Teacher.objects.get(institution=restored)])
+        self.assertEqual(
+            sorted(Grade.objects.filter(course=course).values_list('student_id', 'grade', 'marks')),
+            sorted([(students['Year 1'].pk, 'A', 90.0), (students['Year 2'].pk, 'C', 70.0)]),
+        )
+        self.assertEqual(
+            dict(Enrollment.objects.filter(course=course).values_list('student_id', 'status')),
+            {students['Year 1'].pk: Enrollment.ENROLLED, students['Year 2'].pk: Enrollment.WAITLISTED},
+        )
+        self.assertEqual(
+            dict(CourseStanding.objects.filter(course=course).values_list('student_id', 'rank')),
+            {students['Year 1'].pk: 1, students['Year 2'].pk: 2},
+        )
+        # The source institution keeps its own rows.
+        self.assertEqual(Grade.objects.exclude(course=course).count(), 2)
+        self.assertEqual(CourseStanding.objects.exclude(course=course).count(), 2)
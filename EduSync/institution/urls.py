@@ -8,4 +8,5 @@ urlpatterns = [
     path('admin/login/', views.institution_admin_login, name='institution_admin_login'),
     path('admin/dashboard/', views.institution_admin_dashboard, name='institution_admin_dashboard'),
     path('news/delete/<int:news_id>/', views.delete_news, name='delete_news'),
+    path('news/stream/', views.news_stream, name='news_stream'),
 ]
@@ -2,9 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.cache import never_cache
 
+from . import news
 from .models import Institution, News
+from accounts import ratelimit
+from accounts.models import UserProfile
 from academics.models import Course
 from teacher.models import Teacher
 from student.models import Student
@@ -27,7 +32,7 @@ def dashboard_view(request):
     except Institution.DoesNotExist:
         institution = None
 
-    news_list = News.objects.order_by("-created_at")
+    news_list = news.recent(institution) if institution else News.objects.none()
     courses = Course.objects.filter(institution=institution) if institution else Course.objects.none()
     teachers = Teacher.objects.filter(institution=institution) if institution else Teacher.objects.none()
 
@@ -69,6 +74,18 @@ def _handle_portal_login(request, role):
     name = " ".join((request.POST.get('name') or "").split())
     code = (request.POST.get('code') or "").strip()
 
+    # ⏱️ Throttle before any lookup or password hashing
+    profile = getattr(request.user, 'userprofile', None)
+    throttled = ratelimit.check(
+        f'{role}_portal',
+        ip=ratelimit.client_ip(request),
+        institution=profile.institution_id if profile else None,
+        username=code,
+    )
+    if throttled:
+        messages.error(request, throttled.message)
+        return redirect(f'{role}_portal_login')
+
     try:
         institution = Institution.objects.get(admin=request.user)
     except Institution.DoesNotExist:
@@ -132,6 +149,13 @@ def institution_admin_login(request):
         username = request.POST.get("username")
         password = request.POST.get("password")
 
+        # ⏱️ Throttle before authenticate() runs the password hasher
+        throttled = ratelimit.check('admin_login', ip=ratelimit.client_ip(request), username=username)
+        if throttled:
+            response = render(request, 'institution/admin_login.html', {'error': f"❌ {throttled.message}"}, status=429)
+            response['Retry-After'] = str(throttled.retry_after)
+            return response
+
         user = authenticate(request, username=username, password=password)
 
         if user is None:
@@ -154,37 +178,40 @@ def institution_admin_login(request):
 @never_cache
 @login_required(login_url='institution_admin_login')
 def institution_admin_dashboard(request):
+    institution = Institution.objects.filter(admin=request.user).first()
+    own_news = News.objects.filter(institution=institution)
     edit_news = None
 
     # EDIT MODE
     edit_id = request.GET.get("edit")
     if edit_id:
-        edit_news = News.objects.filter(id=edit_id).first()
+        edit_news = own_news.filter(id=edit_id).first()
 
     # CREATE / UPDATE
     if request.method == "POST":
         news_text = request.POST.get("news")
         news_id = request.POST.get("news_id")
 
-        if news_text:
+        if news_text and institution:
             if news_id:
                 # UPDATE
-                news = News.objects.get(id=news_id)
-                news.content = news_text
-                news.save()
+                item = own_news.filter(id=news_id).first()
+                if item:
+                    item.content = news_text
+                    item.save()
             else:
                 # CREATE
-                News.objects.create(content=news_text)
+                News.objects.create(institution=institution, content=news_text)
 
         return redirect("institution_admin_dashboard")
 
-    news_list = News.objects.order_by("-created_at")
-
     return render(
         request,
         "institution/admin_dashboard.html",
         {
-            "news_list": news_list,
+            "institution": institution,
+            "news_list": news.recent(institution) if institution else News.objects.none(),
+            "manage_news": news.recent(institution, news.MANAGE_WINDOW) if institution else News.objects.none(),
             "edit_news": edit_news,
             "show_dashboard_nav": True,
             "admin_dashboard_mode": True
@@ -194,5 +221,29 @@ def institution_admin_dashboard(request):
 
 @login_required
 def delete_news(request, news_id):
-    News.objects.filter(id=news_id).delete()
+    News.objects.filter(id=news_id, institution__admin=request.user).delete()
     return redirect('institution_admin_dashboard')
+
+
+@login_required(login_url='login')
+async def news_stream(request):
+    """Server-sent events with the user's institution's new news items (ASGI only)."""
+    if not isinstance(request, ASGIRequest):
+        # A sync worker would be held for the whole stream; 204 tells
+        # EventSource not to reconnect.
+        return HttpResponse(status=204)
+    user = await request.auser()
+    institution_id = await (
+        UserProfile.objects.filter(user_id=user.pk).values_list('institution_id', flat=True).afirst()
+    )
+    if institution_id is None:
+        return HttpResponse(status=204)
+
+    after = request.headers.get('Last-Event-ID') or request.GET.get('after') or '0'
+    response = StreamingHttpResponse(
+        news.events(institution_id, int(after) if after.isdigit() else 0),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
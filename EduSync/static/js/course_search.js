@@ -0,0 +1,58 @@
+// Search-as-you-type course picker (academics.widgets.CourseSearchSelect).
+document.addEventListener("DOMContentLoaded", () => {
+    document.querySelectorAll(".course-search").forEach((box) => {
+        const input = box.querySelector(".course-search-input");
+        const results = box.querySelector(".course-search-results");
+        const selected = box.querySelector(".course-search-selected");
+        const multiple = box.hasAttribute("data-multiple");
+        let timer = null;
+
+        const chip = (id, text) => {
+            const span = document.createElement("span");
+            span.className = "badge bg-secondary course-search-chip";
+            const hidden = document.createElement("input");
+            hidden.type = "hidden";
+            hidden.name = box.dataset.name;
+            hidden.value = id;
+            const remove = document.createElement("button");
+            remove.type = "button";
+            remove.className = "btn-close btn-close-white ms-1 course-search-remove";
+            remove.setAttribute("aria-label", "Remove");
+            span.append(hidden, text, remove);
+            return span;
+        };
+
+        const pick = (id, text) => {
+            if (!multiple) selected.innerHTML = "";
+            if (!selected.querySelector(`input[value="${id}"]`)) selected.append(chip(id, text));
+            results.innerHTML = "";
+            input.value = "";
+        };
+
+        selected.addEventListener("click", (e) => {
+            if (e.target.classList.contains("course-search-remove")) e.target.parentElement.remove();
+        });
+
+        input.addEventListener("input", () => {
+            clearTimeout(timer);
+            timer = setTimeout(async () => {
+                const response = await fetch(`${box.dataset.url}?q=${encodeURIComponent(input.value)}`);
+                if (!response.ok) return;
+                const data = await response.json();
+                results.innerHTML = "";
+                data.results.forEach((course) => {
+                    const item = document.createElement("button");
+                    item.type = "button";
+                    item.className = "list-group-item list-group-item-action py-1";
+                    item.textContent = course.text;
+                    item.onclick = () => pick(course.id, course.text);
+                    results.append(item);
+                });
+            }, 200);
+        });
+
+        document.addEventListener("click", (e) => {
+            if (!box.contains(e.target)) results.innerHTML = "";
+        });
+    });
+});
@@ -0,0 +1,19 @@
+// Add click ripple effect
+document.querySelectorAll('.btn-panel').forEach(button => {
+  button.addEventListener('click', function (e) {
+    const ripple = document.createElement('span');
+    ripple.style.position = 'absolute';
+    ripple.style.borderRadius = '50%';
+    ripple.style.background = 'rgba(255, 255, 255, 0.5)';
+    ripple.style.width = ripple.style.height = '100px';
+    ripple.style.marginLeft = '-50px';
+    ripple.style.marginTop = '-50px';
+    ripple.style.left = e.clientX - this.getBoundingClientRect().left + 'px';
+    ripple.style.top = e.clientY - this.getBoundingClientRect().top + 'px';
+    ripple.style.animation = 'ripple 0.6s ease-out';
+
+    this.appendChild(ripple);
+
+    setTimeout(() => ripple.remove(), 600);
+  });
+});
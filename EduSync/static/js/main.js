@@ -0,0 +1,48 @@
+// 🌙 PREMIUM THEME TOGGLE
+const icons = {
+    light: `<svg class="theme-icon" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M12 3v1m0 16v1m9-9h-1M4 12H3m15.364 6.364l-.707-.707M6.343 6.343l-.707-.707m12.728 0l-.707.707M6.343 17.657l-.707.707M16 12a4 4 0 11-8 0 4 4 0 018 0z"></path></svg>`,
+    dark: `<svg class="theme-icon" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M20.354 15.354A9 9 0 018.646 3.646 9.003 9.003 0 0012 21a9.003 9.003 0 008.354-5.646z"></path></svg>`
+};
+
+function setTheme(theme) {
+    document.documentElement.setAttribute("data-bs-theme", theme);
+    localStorage.setItem("theme", theme);
+    const btn = document.getElementById("themeToggle");
+    if (btn) btn.innerHTML = theme === 'dark' ? icons.light : icons.dark;
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+    const saved = localStorage.getItem("theme") || "light";
+    setTheme(saved);
+
+    const btn = document.getElementById("themeToggle");
+    if (btn) {
+        btn.onclick = () => {
+            const current = document.documentElement.getAttribute("data-bs-theme");
+            const next = current === "dark" ? "light" : "dark";
+            setTheme(next);
+        };
+    }
+});
+
+(function () {
+    const saved = localStorage.getItem("theme") || "light";
+    document.documentElement.setAttribute("data-bs-theme", saved);
+})();
+
+// 📱 Mobile Menu
+function toggleMobileMenu() {
+    const navLinks = document.querySelector('.nav-links');
+    if (navLinks) {
+        navLinks.classList.toggle('active');
+    }
+}
+
+// Close mobile menu on click outside
+document.addEventListener('click', (e) => {
+    const navLinks = document.querySelector('.nav-links');
+    const mobileBtn = document.querySelector('.mobile-menu-btn');
+    if (navLinks && navLinks.classList.contains('active') && !navLinks.contains(e.target) && e.target !== mobileBtn) {
+        navLinks.classList.remove('active');
+    }
+});
@@ -0,0 +1,18 @@
+// Live news ticker (institution/includes/news_ticker.html): items pushed over
+// server-sent events are added without reloading the dashboard.
+document.addEventListener("DOMContentLoaded", () => {
+    const ticker = document.getElementById("news-ticker");
+    if (!ticker || !window.EventSource) {
+        return;
+    }
+    const marquee = ticker.querySelector("marquee");
+    const source = new EventSource(`${ticker.dataset.stream}?after=${ticker.dataset.after}`);
+
+    source.addEventListener("news", (event) => {
+        const item = JSON.parse(event.data);
+        const span = document.createElement("span");
+        span.textContent = `🔔 ${item.content}` + " ".repeat(5);
+        marquee.prepend(span);
+        ticker.hidden = false;
+    });
+});
@@ -1,8 +1,23 @@
 from django.contrib import admin
-from .models import Student
+from .models import RolloverRun, Student
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ('student_id', 'user', 'institution', 'status', 'gpa')
     list_filter = ('status', 'institution')
     search_fields = ('student_id', 'user__username')
+    list_select_related = ('user', 'institution')
+
+    def get_queryset(self, request):
+        # __str__ uses user.get_full_name(); also used by autocomplete results.
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(RolloverRun)
+class RolloverRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'institution', 'students_changed', 'created_at', 'completed_at', 'undone_at')
+    list_select_related = ('institution',)
+    readonly_fields = ('institution', 'rules', 'students_changed', 'created_at', 'completed_at', 'undone_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,89 @@
+"""
+Bulk actions on an institution's students (student_list).
+
+``deactivate()`` is the soft option: status becomes ``inactive`` and the
+accounts can no longer log in, with grades and standings kept.
+``delete()`` removes the students for good with set-based DELETEs, one per
+table per batch of ids, all in one transaction (see accounts/bulk.py).
+
+Raw deletes send no signals, so the derived data the Grade and Enrollment
+receivers normally maintain is fixed up here: seats are released and
+handed to waitlists and standings of the affected courses recomputed on
+commit. The ``grades`` generation bump drops cached transcripts.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, When
+
+from accounts.bulk import batches, deactivate_users, delete_users, raw_delete
+from academics import standings
+from academics.enrollment import promote_waitlist
+from academics.models import Course, CourseStanding, Enrollment, Grade
+from core import generations
+
+from .models import Student
+
+
+def deactivate(students):
+    """Mark ``students`` inactive and disable their logins. Returns the count changed."""
+    with transaction.atomic():
+        # Read before the UPDATE: a scope filtered on status matches nothing after it.
+        rows = list(students.filter(status='active').values_list('id', 'user_id', 'institution_id'))
+        changed = 0
+        for batch in batches(rows):
+            changed += Student.objects.filter(id__in=[pk for pk, _, _ in batch]).update(status='inactive')
+        deactivate_users(user_id for _, user_id, _ in rows)
+        if changed:
+            generations.bump(rows[0][2], generations.ROSTER)
+    return changed
+
+
+def delete(students):
+    """Delete ``students``, their accounts and everything that cascades from them."""
+    with transaction.atomic():
+        institution_id = _institution_id(students)
+        rows = list(students.select_for_update().values_list('id', 'user_id'))
+        graded_courses = set()
+        released = Counter()
+        for batch in batches(rows):
+            ids = [pk for pk, _ in batch]
+            graded_courses.update(
+                Grade.objects.filter(student_id__in=ids).values_list('course_id', flat=True).distinct()
+            )
+            released.update(dict(
+                Enrollment.objects.filter(student_id__in=ids, status=Enrollment.ENROLLED)
+                .values('course_id').annotate(seats=Count('id')).values_list('course_id', 'seats')
+            ))
+            raw_delete(Grade.objects.filter(student_id__in=ids))
+            raw_delete(Enrollment.objects.filter(student_id__in=ids))
+            raw_delete(CourseStanding.objects.filter(student_id__in=ids))
+            raw_delete(Student.objects.filter(id__in=ids))
+        delete_users(user_id for _, user_id in rows)
+
+        _release_seats(released)
+        for course in Course.objects.filter(pk__in=released):
+            promote_waitlist(course)
+        if graded_courses:
+            standings.mark_dirty(graded_courses)
+        if rows:
+            generations.bump(institution_id, generations.ROSTER, generations.GRADES)
+    return len(rows)
+
+
+def _institution_id(students):
+    return students.values_list('institution_id', flat=True).first()
+
+
+def _release_seats(released):
+    """Give back ``{course_id: seats}`` in one UPDATE."""
+    if not released:
+        return
+    by_count = {}
+    for course_id, seats in released.items():
+        by_count.setdefault(seats, []).append(course_id)
+    Course.objects.filter(pk__in=released).update(seats_taken=Case(
+        *[When(pk__in=course_ids, then=F('seats_taken') - seats) for seats, course_ids in by_count.items()],
+        default=F('seats_taken'),
+        output_field=PositiveIntegerField(),
+    ))
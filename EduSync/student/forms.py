@@ -1,12 +1,17 @@
 from django import forms
 from academics.models import Course
+from academics.widgets import CourseSearchSelect
 
 
 from .models import Student
 
 class StudentCreateForm(forms.Form):
     name = forms.CharField(max_length=150, label="Student Name")
-    student_id = forms.CharField(max_length=20, label="Roll No.")
+    # Left blank, the next roll number is assigned (accounts/identifiers.py).
+    student_id = forms.CharField(
+        max_length=20, label="Roll No.", required=False,
+        widget=forms.TextInput(attrs={'placeholder': 'Assigned automatically if blank'}),
+    )
     academic_year = forms.CharField(max_length=20, required=False)
     gender = forms.ChoiceField(choices=Student.GENDER_CHOICES)
     date_of_birth = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
@@ -20,12 +25,7 @@ class StudentCreateForm(forms.Form):
         super().__init__(*args, **kwargs)
         if institution is not None:
             self.fields["course"].queryset = Course.objects.filter(institution=institution)
-
-    def clean_student_id(self):
-        student_id = self.cleaned_data.get('student_id')
-        if Student.objects.filter(student_id=student_id).exists():
-            raise forms.ValidationError("A student with this Roll No. already exists.")
-        return student_id
+            self.fields["course"].widget = CourseSearchSelect(institution.pk)
 
 
 class StudentEditForm(forms.Form):
@@ -45,6 +45,7 @@ class StudentEditForm(forms.Form):
         self.student = student
         if institution is not None:
             self.fields["course"].queryset = Course.objects.filter(institution=institution)
+            self.fields["course"].widget = CourseSearchSelect(institution.pk)
         if student is not None:
             self.fields["name"].initial = student.user.get_full_name() or student.user.username
             self.fields["student_id"].initial = student.student_id
@@ -55,10 +56,4 @@ class StudentEditForm(forms.Form):
             self.fields["parent_name"].initial = student.parent_name
             self.fields["parent_phone"].initial = student.parent_phone
             self.fields["blood_group"].initial = student.blood_group
-            self.fields["course"].initial = student.course
-
-    def clean_student_id(self):
-        student_id = self.cleaned_data.get('student_id')
-        if Student.objects.filter(student_id=student_id).exclude(id=self.student.id).exists():
-            raise forms.ValidationError("A student with this Roll No. already exists.")
-        return student_id
+            self.fields["course"].initial = student.course_id
@@ -0,0 +1,55 @@
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from academics import standings
+from academics.models import Course
+from core import generations
+from core.cache import is_process_local
+from institution.models import Institution
+from student import results
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the dashboard and grades page of every active student of an institution, "
+        "so results day is served from the cache. Run it once grades are final; pages stay "
+        "cached until the institution's next grade change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('institution', help='Institution name or id.')
+        parser.add_argument('--page', action='append', choices=results.PAGES, default=[],
+                            help='Only this page (repeatable; default: all).')
+        parser.add_argument('--refresh-standings', action='store_true',
+                            help="Recompute the institution's standings first (after bulk imports).")
+        parser.add_argument('--chunk-size', type=int, default=results.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if is_process_local(caches['default']):
+            raise CommandError(
+                "The default cache is private to this process, so pre-rendered pages would never "
+                "reach the web workers. Set EDUSYNC_MEMCACHED (see settings.CACHES) first."
+            )
+
+        ref = options['institution']
+        lookup = {'pk': int(ref)} if ref.isdigit() else {'name': ref}
+        try:
+            institution = Institution.objects.get(**lookup)
+        except Institution.DoesNotExist:
+            raise CommandError(f"Institution {ref!r} does not exist")
+
+        start = time.perf_counter()
+        if options['refresh_standings']:
+            course_ids = Course.objects.filter(institution=institution).values_list('id', flat=True)
+            written = standings.refresh(course_ids)
+            # refresh() writes rows in bulk and sends no signals.
+            generations.bump(institution.pk, generations.GRADES)
+            self.stdout.write(f"  {written} standings refreshed")
+
+        pages = tuple(options['page']) or results.PAGES
+        written = results.prerender(institution, pages, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{institution.name}: {written} pages rendered in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from institution.models import Institution
+from student import rollover
+from student.models import RolloverRun
+
+
+def _pair(value):
+    old, sep, new = value.partition('=')
+    if not sep or not old.strip() or not new.strip():
+        raise ValueError(f"expected OLD=NEW, got {value!r}")
+    return old.strip(), new.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Promote an institution's active students to the next academic year, graduate final-year "
+        "students and reassign courses. Use --dry-run to preview and --undo RUN_ID to revert."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('institution', nargs='?', help='Institution name or id.')
+        parser.add_argument('--promote', action='append', default=[], metavar='FROM=TO',
+                            help='Move students in academic year FROM to TO (repeatable).')
+        parser.add_argument('--graduate', action='append', default=[], metavar='YEAR',
+                            help='Deactivate students in this academic year (repeatable).')
+        parser.add_argument('--course', action='append', default=[], metavar='OLD=NEW',
+                            help='Move promoted students from course code OLD to NEW (repeatable).')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change and exit.')
+        parser.add_argument('--undo', type=int, metavar='RUN_ID', help='Revert the latest rollover of its institution.')
+        parser.add_argument('--chunk-size', type=int, default=rollover.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['undo']:
+            return self.undo(options['undo'])
+
+        ref = options['institution']
+        if not ref:
+            raise CommandError('An institution is required.')
+        lookup = {'pk': int(ref)} if ref.isdigit() else {'name': ref}
+        try:
+            institution = Institution.objects.get(**lookup)
+        except Institution.DoesNotExist:
+            raise CommandError(f"Institution {ref!r} does not exist")
+
+        try:
+            rules = rollover.RolloverRules(
+                promote=dict(_pair(v) for v in options['promote']),
+                graduate=options['graduate'],
+                courses=dict(_pair(v) for v in options['course']),
+            )
+            diff = rollover.plan(institution, rules)
+        except (ValueError, rollover.RolloverError) as e:
+            raise CommandError(str(e))
+
+        total = sum(row['students'] for row in diff)
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{institution.name}: {total} students affected"))
+        for row in diff:
+            course = ''
+            if row['course'] != row['new_course']:
+                course = f"  course {row['course']} -> {row['new_course']}"
+            self.stdout.write(
+                f"  {row['academic_year'] or '(blank)'} -> {row['new_academic_year']}: "
+                f"{row['students']}{course}"
+            )
+        if options['dry_run'] or not total:
+            return
+
+        start = time.perf_counter()
+
+        def progress(scanned, span, changed):
+            self.stdout.write(f"  {scanned * 100 // span:3d}%  {changed} students updated")
+
+        run = rollover.rollover(institution, rules, chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollover #{run.pk}: {run.students_changed} students updated in "
+            f"{time.perf_counter() - start:.1f}s. Undo with --undo {run.pk}"
+        ))
+
+    def undo(self, run_id):
+        try:
+            run = RolloverRun.objects.select_related('institution').get(pk=run_id)
+        except RolloverRun.DoesNotExist:
+            raise CommandError(f"Rollover #{run_id} does not exist")
+        start = time.perf_counter()
+        try:
+            rollover.undo(run, progress=lambda done, total: self.stdout.write(f"  batch {done}/{total}"))
+        except rollover.RolloverError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollover #{run.pk} undone ({run.students_changed} students) in {time.perf_counter() - start:.1f}s"
+        ))
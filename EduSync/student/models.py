@@ -23,3 +23,29 @@ class Student(models.Model):
     
     def __str__(self):
         return f"{self.student_id} - {self.user.get_full_name()}"
+
+
+class RolloverRun(models.Model):
+    """One academic-year rollover of an institution (see student/rollover.py)."""
+    institution = models.ForeignKey(Institution, on_delete=models.CASCADE)
+    rules = models.JSONField()
+    students_changed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    undone_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Rollover #{self.pk} - {self.institution}"
+
+
+class RolloverBatch(models.Model):
+    """
+    Undo log for one chunk of a rollover: the previous academic_year,
+    status and course of every student the chunk changed, grouped by
+    that previous state as {"academic_year", "status", "course_id", "ids"}.
+    """
+    run = models.ForeignKey(RolloverRun, on_delete=models.CASCADE, related_name='batches')
+    previous = models.JSONField()
+
+    def __str__(self):
+        return f"{self.run} batch {self.pk}"
@@ -0,0 +1,124 @@
+"""
+Results-day pages.
+
+When results are published every student opens ``student_dashboard`` and
+``student_grades`` within minutes. The student-specific part of both pages
+is rendered once and cached under the institution's ``grades`` generation
+(core/generations.py), and the ``courses`` and ``roster`` generations too,
+since course names and the student's details appear on them. The cached
+body is then served until the next grade change. The surrounding page
+(navigation, CSRF token) is still rendered per request.
+
+``prerender()`` (``manage.py publish_results``) fills the cache for every
+active student of an institution ahead of time, with the standings of a
+whole chunk of students in one query. A page the batch missed, or one
+invalidated since, is rendered on first request. Concurrent requests for
+it wait for that one render (``single_flight``) instead of all querying
+``Grade``. The batch only reaches the web workers through a shared default
+cache (memcached via EDUSYNC_MEMCACHED), so the command refuses to run
+with a per-process one.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from academics.models import CourseStanding
+from academics.transcript import build_transcript
+from core import generations
+from core.cache import single_flight
+
+from .models import Student
+
+DASHBOARD = 'dashboard'
+GRADES = 'grades'
+PAGES = (DASHBOARD, GRADES)
+NAMESPACES = (generations.GRADES, generations.COURSES, generations.ROSTER)
+
+CACHE_TIMEOUT = 60 * 60 * 24
+CHUNK_SIZE = 500
+
+TEMPLATES = {
+    DASHBOARD: 'student/includes/dashboard_body.html',
+    GRADES: 'student/includes/grades_body.html',
+}
+
+
+def _prefix(institution_id):
+    return generations.make_key(institution_id, NAMESPACES, 'results')
+
+
+def page_key(student, page, prefix=None):
+    return f'{prefix or _prefix(student.institution_id)}:{page}:{student.pk}'
+
+
+def _standings(student_ids):
+    by_student = defaultdict(list)
+    standings = (
+        CourseStanding.objects.filter(student_id__in=student_ids)
+        .select_related('course').order_by('course__code')
+    )
+    for standing in standings:
+        by_student[standing.student_id].append(standing)
+    return by_student
+
+
+def _context(student, page, standings=None):
+    if page == DASHBOARD:
+        if standings is None:
+            standings = _standings([student.pk])[student.pk]
+        return {'student': student, 'standings': standings}
+    # From the database: the page is cached under the same generations, so a
+    # separately cached transcript would only add a second copy to go stale.
+    transcript = build_transcript(student.pk)
+    return {
+        'student': student,
+        'transcript': transcript,
+        'grades': [row for term in transcript['terms'] for row in term['rows']],
+    }
+
+
+def render_page(student, page, standings=None):
+    """The body of ``page`` for ``student`` (uncached)."""
+    return render_to_string(TEMPLATES[page], _context(student, page, standings))
+
+
+def get_page(student, page):
+    """The cached body of ``page``, rendered once on a miss however many requests wait for it."""
+    key = page_key(student, page)
+    body = generations.get(key, NAMESPACES)
+    if body is None:
+        body = single_flight(key, lambda: render_page(student, page), CACHE_TIMEOUT)
+    return mark_safe(body)
+
+
+def prerender(institution, pages=PAGES, chunk_size=CHUNK_SIZE):
+    """Render and cache ``pages`` for every active student of ``institution``. Returns pages written."""
+    students = (
+        Student.objects.filter(institution=institution, status='active')
+        .select_related('user').order_by('pk')
+    )
+    written = 0
+    chunk = []
+    for student in students.iterator(chunk_size=chunk_size):
+        chunk.append(student)
+        if len(chunk) >= chunk_size:
+            written += _prerender_chunk(chunk, pages)
+            chunk = []
+    if chunk:
+        written += _prerender_chunk(chunk, pages)
+    return written
+
+
+def _prerender_chunk(students, pages):
+    # Read before rendering: a grade saved meanwhile bumps the generation,
+    # so anything rendered from older rows lands under a superseded key.
+    prefix = _prefix(students[0].institution_id)
+    standings = _standings([student.pk for student in students]) if DASHBOARD in pages else {}
+    entries = {}
+    for student in students:
+        for page in pages:
+            entries[page_key(student, page, prefix)] = render_page(student, page, standings.get(student.pk, []))
+    cache.set_many(entries, CACHE_TIMEOUT)
+    return len(entries)
@@ -0,0 +1,196 @@
+"""
+Academic-year rollover.
+
+Promotes active students of one institution to their next ``academic_year``,
+graduates (deactivates) final-year students and optionally moves promoted
+students from one course to another, all according to a set of rules::
+
+    RolloverRules(
+        promote={'Year 1': 'Year 2', 'Year 2': 'Year 3'},
+        graduate=['Year 3'],
+        courses={'CS101': 'CS201'},
+    )
+
+Students are processed in primary-key ranges of ``CHUNK_SIZE``. Each chunk
+is one transaction: read the previous values of the affected rows into a
+``RolloverBatch`` (the undo log), then a single set-based UPDATE that
+applies every rule at once through CASE expressions, so "Year 1 -> Year 2"
+and "Year 2 -> Year 3" never promote anybody twice.
+"""
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, CharField, Count, F, Max, Min, Value, When
+from django.utils import timezone
+
+from academics import standings
+from academics.models import Course
+from core import generations
+
+from .models import RolloverBatch, RolloverRun, Student
+
+CHUNK_SIZE = 5000
+GRADUATED = 'graduated'
+
+
+class RolloverError(Exception):
+    pass
+
+
+class RolloverRules:
+    def __init__(self, promote=None, graduate=(), courses=None):
+        self.promote = dict(promote or {})
+        self.graduate = set(graduate)
+        self.courses = dict(courses or {})
+        overlap = self.graduate & set(self.promote)
+        if overlap:
+            raise RolloverError(f"Years both promoted and graduated: {', '.join(sorted(overlap))}")
+        if not self.promote and not self.graduate:
+            raise RolloverError('No promotion or graduation rules given.')
+
+    @property
+    def years(self):
+        return set(self.promote) | self.graduate
+
+    def as_dict(self):
+        return {'promote': self.promote, 'graduate': sorted(self.graduate), 'courses': self.courses}
+
+
+def _course_ids(institution, codes):
+    """``{old_course_id: new_course_id}`` for the rules' ``{old_code: new_code}``."""
+    wanted = set(codes) | set(codes.values())
+    ids = dict(Course.objects.filter(institution=institution, code__in=wanted).values_list('code', 'id'))
+    missing = wanted - set(ids)
+    if missing:
+        raise RolloverError(f"Unknown course code(s): {', '.join(sorted(missing))}")
+    return {ids[old]: ids[new] for old, new in codes.items()}
+
+
+def _affected(institution, rules):
+    return Student.objects.filter(institution=institution, status='active', academic_year__in=rules.years)
+
+
+def plan(institution, rules):
+    """
+    Dry-run diff: one entry per (year, course) group of affected students,
+    with what the rollover would change. Nothing is written.
+    """
+    course_map = _course_ids(institution, rules.courses)
+    codes = dict(Course.objects.filter(institution=institution).values_list('id', 'code'))
+    groups = (
+        _affected(institution, rules)
+        .values('academic_year', 'course_id')
+        .annotate(students=Count('id'))
+        .order_by('academic_year', 'course_id')
+    )
+    diff = []
+    for group in groups:
+        year, course_id = group['academic_year'], group['course_id']
+        promoted = year in rules.promote
+        new_course_id = course_map.get(course_id, course_id) if promoted else course_id
+        diff.append({
+            'academic_year': year,
+            'new_academic_year': rules.promote[year] if promoted else GRADUATED,
+            'course': codes.get(course_id),
+            'new_course': codes.get(new_course_id),
+            'students': group['students'],
+        })
+    return diff
+
+
+def _assignments(rules, course_map):
+    """UPDATE assignments; every CASE reads the pre-update row."""
+    assignments = {}
+    # status and course are listed before academic_year: MySQL evaluates
+    # SET clauses left to right, so they must not see the new year.
+    if rules.graduate:
+        assignments['status'] = Case(
+            When(academic_year__in=rules.graduate, then=Value('inactive')),
+            default=F('status'),
+            output_field=CharField(),
+        )
+    if course_map:
+        assignments['course_id'] = Case(
+            *[
+                When(academic_year__in=list(rules.promote), course_id=old, then=Value(new))
+                for old, new in course_map.items()
+            ],
+            default=F('course_id'),
+            output_field=BigIntegerField(),
+        )
+    if rules.promote:
+        assignments['academic_year'] = Case(
+            *[When(academic_year=old, then=Value(new)) for old, new in rules.promote.items()],
+            default=F('academic_year'),
+            output_field=CharField(),
+        )
+    return assignments
+
+
+def rollover(institution, rules, chunk_size=CHUNK_SIZE, progress=None):
+    """Apply ``rules``; returns the ``RolloverRun`` holding the undo log."""
+    course_map = _course_ids(institution, rules.courses)
+    affected = _affected(institution, rules)
+    bounds = affected.aggregate(low=Min('id'), high=Max('id'))
+    run = RolloverRun.objects.create(institution=institution, rules=rules.as_dict())
+    assignments = _assignments(rules, course_map)
+
+    changed = 0
+    if bounds['low'] is not None:
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            chunk = affected.filter(id__gte=start, id__lt=start + chunk_size)
+            with transaction.atomic():
+                rows = list(chunk.select_for_update().values_list('id', 'academic_year', 'status', 'course_id'))
+                if not rows:
+                    continue
+                previous = {}
+                for pk, year, status, course_id in rows:
+                    previous.setdefault((year, status, course_id), []).append(pk)
+                RolloverBatch.objects.create(run=run, previous=[
+                    {'academic_year': year, 'status': status, 'course_id': course_id, 'ids': ids}
+                    for (year, status, course_id), ids in previous.items()
+                ])
+                changed += chunk.update(**assignments)
+            if progress:
+                progress(min(start + chunk_size - 1, bounds['high']) - bounds['low'] + 1,
+                         bounds['high'] - bounds['low'] + 1, changed)
+
+    run.students_changed = changed
+    run.completed_at = timezone.now()
+    run.save(update_fields=['students_changed', 'completed_at'])
+    _refresh_cohorts(institution)
+    return run
+
+
+def undo(run, progress=None):
+    """Put every student touched by ``run`` back to their previous year, status and course."""
+    if run.undone_at is not None:
+        raise RolloverError(f"Rollover #{run.pk} was already undone at {run.undone_at:%Y-%m-%d %H:%M}.")
+    # Runs are undone newest first: a later run's undo log holds this run's
+    # results, and undoing that run afterwards would put them back.
+    later = RolloverRun.objects.filter(institution_id=run.institution_id, pk__gt=run.pk, undone_at__isnull=True)
+    later = list(later.order_by('pk').values_list('pk', flat=True))
+    if later:
+        raise RolloverError(
+            f"Rollover #{run.pk} is not the latest for its institution; undo "
+            f"{', '.join(f'#{pk}' for pk in reversed(later))} first."
+        )
+    batches = run.batches.order_by('-id')
+    total = batches.count()
+    for done, batch in enumerate(batches.iterator(), start=1):
+        with transaction.atomic():
+            for group in batch.previous:
+                Student.objects.filter(id__in=group['ids']).update(
+                    academic_year=group['academic_year'],
+                    status=group['status'],
+                    course_id=group['course_id'],
+                )
+        if progress:
+            progress(done, total)
+    run.undone_at = timezone.now()
+    run.save(update_fields=['undone_at'])
+    _refresh_cohorts(run.institution)
+
+
+def _refresh_cohorts(institution):
+    # QuerySet.update() sends no signals; cohort standings follow academic_year.
+    standings.refresh(Course.objects.filter(institution=institution).values_list('id', flat=True))
+    generations.bump(institution.pk, generations.ROSTER, generations.GRADES)
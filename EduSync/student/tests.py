@@ -1,3 +1,164 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from academics import transcript
+from academics.models import Course, CourseStanding, Enrollment, Grade
+from accounts.models import UserProfile
+from accounts.signup import register_institution
+from core import generations
+
+from . import bulk, results, rollover
+from .models import Student
+
+
+class StudentBulkActionTests(TransactionTestCase):
+    """Runs with real commits: standings are refreshed in on_commit callbacks."""
+
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.client.force_login(admin)
+        self.institution = admin.userprofile.institution
+        self.course = Course.objects.create(institution=self.institution, code='CS101', name='Intro', capacity=1)
+        self.students = []
+        for i in range(3):
+            user = User.objects.create_user(f'student{i}', password='pw')
+            UserProfile.objects.create(user=user, role='student', institution=self.institution)
+            student = Student.objects.create(user=user, institution=self.institution, student_id=f'S{i}', academic_year='Year 3')
+            Grade.objects.create(student=student, course=self.course, grade='A', marks=90 - i)
+            self.students.append(student)
+        Enrollment.objects.create(student=self.students[0], course=self.course, status=Enrollment.ENROLLED, requested_at=timezone.now())
+        Enrollment.objects.create(student=self.students[2], course=self.course, status=Enrollment.WAITLISTED, requested_at=timezone.now())
+        Course.objects.filter(pk=self.course.pk).update(seats_taken=1)
+
+    def post(self, **data):
+        return self.client.post(reverse('student_bulk_action'), data)
+
+    def test_deactivate_keeps_records(self):
+        self.post(action='deactivate', ids=[self.students[0].pk, self.students[1].pk])
+        self.assertEqual(Student.objects.filter(status='inactive').count(), 2)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 2)
+        self.assertEqual(Grade.objects.count(), 3)
+
+    def test_deactivating_a_status_filtered_scope_invalidates_the_roster(self):
+        before = generations.current(self.institution.pk, generations.ROSTER)
+        changed = bulk.deactivate(Student.objects.filter(institution=self.institution, status='active'))
+        self.assertEqual(changed, 3)
+        self.assertNotEqual(generations.current(self.institution.pk, generations.ROSTER), before)
+
+    def test_delete_cascades_and_releases_seats(self):
+        self.post(action='delete', ids=[self.students[0].pk, self.students[1].pk])
+        self.assertEqual(list(Student.objects.values_list('student_id', flat=True)), ['S2'])
+        self.assertFalse(User.objects.filter(username__in=['student0', 'student1']).exists())
+        self.assertEqual(UserProfile.objects.filter(role='student').count(), 1)
+        self.assertEqual(Grade.objects.count(), 1)
+        # the freed seat went to the waitlist, and S2 now ranks first alone
+        self.assertEqual(Enrollment.objects.get().status, Enrollment.ENROLLED)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.seats_taken, 1)
+        standing = CourseStanding.objects.get()
+        self.assertEqual((standing.student, standing.rank, standing.course_size), (self.students[2], 1, 1))
+
+    def test_filtered_scope_requires_a_filter(self):
+        self.post(action='delete', scope='filtered')
+        self.assertEqual(Student.objects.count(), 3)
+        self.post(action='delete', scope='filtered', academic_year='Year 3')
+        self.assertEqual(Student.objects.count(), 0)
+
+    def test_other_institutions_students_are_untouched(self):
+        other = register_institution('Other High', 'other', 'admin@other.edu', 's3cret!pw').userprofile.institution
+        user = User.objects.create_user('outsider', password='pw')
+        outsider = Student.objects.create(user=user, institution=other, student_id='X1')
+        self.post(action='delete', ids=[outsider.pk])
+        self.assertTrue(Student.objects.filter(pk=outsider.pk).exists())
+
+
+class StudentResultsPageTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        self.course = Course.objects.create(institution=self.institution, code='CS101', name='Intro')
+        user = User.objects.create_user('student0', password='pw')
+        UserProfile.objects.create(user=user, role='student', institution=self.institution)
+        self.student = Student.objects.create(user=user, institution=self.institution, student_id='S0')
+        self.grade = Grade.objects.create(student=self.student, course=self.course, grade='B', marks=72)
+        self.client.force_login(user)
+
+    def get(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name))
+        tables = ' '.join(query['sql'] for query in queries)
+        return response, tables
+
+    def test_publish_refuses_a_per_process_cache(self):
+        with self.assertRaisesMessage(CommandError, 'private to this process'):
+            call_command('publish_results', str(self.institution.pk), stdout=StringIO())
+
+    def test_published_pages_are_served_without_grade_queries(self):
+        # A file-based cache stands in for memcached: shared between processes.
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            call_command('publish_results', str(self.institution.pk), stdout=StringIO())
+            for name in ('student_dashboard', 'student_grades'):
+                response, sql = self.get(name)
+                self.assertContains(response, 'CS101')
+                self.assertNotIn('academics_grade', sql)
+                self.assertNotIn('academics_coursestanding', sql)
+
+    def test_grade_change_replaces_the_cached_page(self):
+        response, _ = self.get('student_grades')
+        self.assertContains(response, '72.0')
+        self.grade.marks = 95
+        self.grade.save()
+        response, _ = self.get('student_grades')
+        self.assertContains(response, '95.0')
+        self.assertNotContains(response, '72.0')
+
+    def test_page_ignores_an_outdated_cached_transcript(self):
+        # What another worker may have cached before the grade changed.
+        key = generations.make_key(self.institution.pk, transcript.NAMESPACES, f'transcript:{self.student.pk}')
+        stale = transcript.build_transcript(self.student.pk)
+        stale['terms'][0]['rows'][0]['marks'] = 10.0
+        cache.set(key, stale)
+        self.assertIn('72.0', results.render_page(self.student, results.GRADES))
+
+
+class RolloverTests(TransactionTestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        self.cs101 = Course.objects.create(institution=self.institution, code='CS101', name='Intro')
+        self.cs201 = Course.objects.create(institution=self.institution, code='CS201', name='Data Structures')
+        user = User.objects.create_user('student0', password='pw')
+        self.student = Student.objects.create(
+            user=user, institution=self.institution, course=self.cs101, student_id='S0', academic_year='Year 1',
+        )
+
+    def test_promotion_moves_course_and_undo_restores_it(self):
+        rules = rollover.RolloverRules(promote={'Year 1': 'Year 2'}, courses={'CS101': 'CS201'})
+        run = rollover.rollover(self.institution, rules)
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.academic_year, self.student.course), ('Year 2', self.cs201))
+        rollover.undo(run)
+        self.student.refresh_from_db()
+        self.assertEqual((self.student.academic_year, self.student.course), ('Year 1', self.cs101))
+
+    def test_only_the_latest_run_can_be_undone(self):
+        first = rollover.rollover(self.institution, rollover.RolloverRules(promote={'Year 1': 'Year 2'}))
+        second = rollover.rollover(self.institution, rollover.RolloverRules(promote={'Year 2': 'Year 3'}))
+        with self.assertRaisesMessage(rollover.RolloverError, f'undo #{second.pk} first'):
+            rollover.undo(first)
+        rollover.undo(second)
+        rollover.undo(first)
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.academic_year, 'Year 1')
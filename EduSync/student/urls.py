@@ -4,7 +4,10 @@ from . import views
 urlpatterns = [
     path('dashboard/', views.student_dashboard, name='student_dashboard'),
     path('grades/', views.student_grades, name='student_grades'),
+    path('transcript/', views.student_transcript, name='student_transcript'),
+    path('transcript/<int:student_id>/', views.student_transcript, name='student_transcript_admin'),
     path('list/', views.student_list, name='student_list'),
+    path('bulk/', views.student_bulk_action, name='student_bulk_action'),
     path('add/', views.student_create, name='student_create'),
     path('edit/<int:student_id>/', views.student_edit, name='student_edit'),
     path('delete/<int:student_id>/', views.student_delete, name='student_delete'),
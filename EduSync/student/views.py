@@ -3,21 +3,17 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import Student
-from academics.models import Grade
+from academics.transcript import get_transcript
+from core import generations
 from institution.models import Institution
+from accounts import identifiers
 from accounts.models import UserProfile
 from django.db import transaction, IntegrityError
+from django.template.defaultfilters import pluralize
+from . import bulk, results
 from .forms import StudentCreateForm, StudentEditForm
 
-
-def _unique_username(base):
-    from django.contrib.auth.models import User
-    username = base
-    suffix = 1
-    while User.objects.filter(username=username).exists():
-        username = f"{base}{suffix}"
-        suffix += 1
-    return username
+DUPLICATE_ROLL_NO = 'A student with this Roll No. already exists.'
 
 
 def _get_institution_admin(request):
@@ -39,37 +35,111 @@ def _get_institution_admin(request):
 
 @login_required(login_url='login')
 def student_dashboard(request):
-    try:
-        student = Student.objects.get(user=request.user)
-        grades = Grade.objects.filter(student=student)
-        context = {
-            'student': student,
-            'grades': grades,
-        }
-        return render(request, 'student/dashboard.html', context)
-    except Student.DoesNotExist:
+    student = Student.objects.select_related('user').filter(user=request.user).first()
+    if student is None:
         messages.error(request, 'Student not found.')
         return redirect('dashboard')
+    return render(request, 'student/dashboard.html', {
+        'student': student,
+        'body': results.get_page(student, results.DASHBOARD),
+    })
 
 @login_required(login_url='login')
 def student_grades(request):
-    try:
-        student = Student.objects.get(user=request.user)
-        grades = Grade.objects.filter(student=student).select_related('course')
-        context = {'grades': grades, 'student': student}
-        return render(request, 'student/grades.html', context)
-    except Student.DoesNotExist:
+    student = Student.objects.select_related('user').filter(user=request.user).first()
+    if student is None:
         return render(request, 'student/grades.html', {'error': 'Student profile not found'})
+    return render(request, 'student/grades.html', {
+        'student': student,
+        'body': results.get_page(student, results.GRADES),
+    })
+
+
+@login_required(login_url='login')
+def student_transcript(request, student_id=None):
+    """A student's own transcript, or any student's for their institution admin. ?print=1 for the printable page."""
+    if student_id is None:
+        student = Student.objects.select_related('user', 'institution').filter(user=request.user).first()
+        if student is None:
+            return render(request, 'student/transcript.html', {'error': 'Student profile not found'})
+    else:
+        institution, error = _get_institution_admin(request)
+        if error:
+            return render(request, 'student/transcript.html', {'error': error})
+        student = get_object_or_404(
+            Student.objects.select_related('user', 'institution'), id=student_id, institution=institution
+        )
+
+    template = 'student/transcript_print.html' if request.GET.get('print') else 'student/transcript.html'
+    return render(request, template, {
+        'student': student,
+        'transcript': get_transcript(student),
+        'admin_view': student_id is not None,
+    })
 
 
 @login_required(login_url='login')
+@generations.cache_page(generations.ROSTER, generations.COURSES)
 def student_list(request):
     institution, error = _get_institution_admin(request)
     if error:
         return render(request, 'student/student_list.html', {'error': error})
 
-    students = Student.objects.filter(institution=institution).select_related('user', 'course')
-    return render(request, 'student/student_list.html', {'students': students})
+    filters = _list_filters(request.GET)
+    students = Student.objects.filter(institution=institution, **filters).select_related('user', 'course')
+    years = (
+        Student.objects.filter(institution=institution).exclude(academic_year='')
+        .values_list('academic_year', flat=True).distinct().order_by('academic_year')
+    )
+    return render(request, 'student/student_list.html', {
+        'students': students,
+        'years': years,
+        'filters': filters,
+    })
+
+
+def _list_filters(params):
+    """The student_list filters present in ``params`` (GET, or echoed in a bulk POST)."""
+    filters = {}
+    if params.get('academic_year'):
+        filters['academic_year'] = params['academic_year']
+    if params.get('status') in dict(Student.STATUS_CHOICES):
+        filters['status'] = params['status']
+    return filters
+
+
+@login_required(login_url='login')
+def student_bulk_action(request):
+    institution, error = _get_institution_admin(request)
+    if error:
+        return render(request, 'student/student_list.html', {'error': error})
+    if request.method != 'POST':
+        return redirect('student_list')
+
+    students = Student.objects.filter(institution=institution)
+    if request.POST.get('scope') == 'filtered':
+        filters = _list_filters(request.POST)
+        if not filters:
+            messages.error(request, 'Choose an academic year or status before acting on every matching student.')
+            return redirect('student_list')
+        students = students.filter(**filters)
+    else:
+        ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+        if not ids:
+            messages.error(request, 'No students selected.')
+            return redirect('student_list')
+        students = students.filter(id__in=ids)
+
+    action = request.POST.get('action')
+    if action == 'deactivate':
+        count = bulk.deactivate(students)
+        messages.success(request, f'{count} student{pluralize(count)} deactivated.')
+    elif action == 'delete':
+        count = bulk.delete(students)
+        messages.success(request, f'{count} student{pluralize(count)} deleted.')
+    else:
+        messages.error(request, 'Unknown bulk action.')
+    return redirect('student_list')
 
 
 @login_required(login_url='login')
@@ -88,8 +158,8 @@ def student_create(request):
                     parts = full_name.split(None, 1)
                     first_name = parts[0] if parts else full_name
                     last_name = parts[1] if len(parts) > 1 else ""
-                    student_id = form.cleaned_data['student_id']
-                    username = _unique_username(f"student_{student_id}")
+                    student_id = form.cleaned_data['student_id'] or identifiers.roll_numbers(institution)[0]
+                    username = identifiers.username(institution, 'student')
                     password = student_id
 
                     user = User.objects.create_user(username=username, password=password)
@@ -114,12 +184,15 @@ def student_create(request):
                     UserProfile.objects.create(
                         user=student.user,
                         role='student',
-                        institution=institution.name
+                        institution=institution
                     )
                 messages.success(request, 'Student added successfully.')
                 return redirect('student_list')
             except IntegrityError as e:
-                messages.error(request, f'Database error: One of the unique fields (like Roll No) might already exist. ({e})')
+                if Student.objects.filter(student_id=form.cleaned_data['student_id']).exists():
+                    form.add_error('student_id', DUPLICATE_ROLL_NO)
+                else:
+                    messages.error(request, f'Database error: One of the unique fields (like Roll No) might already exist. ({e})')
             except Exception as e:
                 messages.error(request, f'An unexpected error occurred: {e}')
     else:
@@ -143,7 +216,6 @@ def student_edit(request, student_id):
             parts = full_name.split(None, 1)
             student.user.first_name = parts[0] if parts else full_name
             student.user.last_name = parts[1] if len(parts) > 1 else ''
-            student.user.save()
 
             student.student_id = form.cleaned_data['student_id']
             student.academic_year = form.cleaned_data.get('academic_year', '')
@@ -154,10 +226,16 @@ def student_edit(request, student_id):
             student.parent_phone = form.cleaned_data.get('parent_phone', '')
             student.blood_group = form.cleaned_data.get('blood_group', '')
             student.course = form.cleaned_data.get('course')
-            student.save()
-
-            messages.success(request, 'Student updated successfully.')
-            return redirect('student_list')
+            try:
+                with transaction.atomic():
+                    student.user.save()
+                    student.save()
+            except IntegrityError:
+                # student_id is the only unique field the form edits
+                form.add_error('student_id', DUPLICATE_ROLL_NO)
+            else:
+                messages.success(request, 'Student updated successfully.')
+                return redirect('student_list')
     else:
         form = StudentEditForm(student=student, institution=institution)
 
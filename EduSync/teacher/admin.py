@@ -6,3 +6,8 @@ class TeacherAdmin(admin.ModelAdmin):
     list_display = ('employee_id', 'user', 'department', 'institution')
     list_filter = ('department', 'institution')
     search_fields = ('employee_id', 'user__username')
+    list_select_related = ('user', 'institution')
+
+    def get_queryset(self, request):
+        # __str__ uses user.get_full_name(); also used by autocomplete results.
+        return super().get_queryset(request).select_related('user')
@@ -0,0 +1,40 @@
+"""
+Bulk actions on an institution's teachers (teacher_list).
+
+Teachers have no status field, so ``deactivate()`` only disables their
+logins; course assignments are kept. ``delete()`` removes them with
+set-based DELETEs in one transaction (see accounts/bulk.py), including
+their ``Course.teachers`` rows and the teacher facet counts those rows fed.
+"""
+from django.db import transaction
+
+from accounts.bulk import batches, deactivate_users, delete_users, raw_delete
+from academics.models import Course, CourseFacet
+from core import generations
+
+from .models import Teacher
+
+
+def deactivate(teachers):
+    """Disable the logins of ``teachers``. Returns the count changed."""
+    with transaction.atomic():
+        rows = list(teachers.values_list('institution_id', 'user_id'))
+        changed = deactivate_users(user_id for _, user_id in rows)
+        if changed:
+            generations.bump(rows[0][0], generations.ROSTER)
+    return changed
+
+
+def delete(teachers):
+    """Delete ``teachers``, their accounts and their course assignments."""
+    with transaction.atomic():
+        rows = list(teachers.select_for_update().values_list('id', 'user_id', 'institution_id'))
+        for batch in batches(rows):
+            ids = [pk for pk, _, _ in batch]
+            raw_delete(Course.teachers.through.objects.filter(teacher_id__in=ids))
+            raw_delete(CourseFacet.objects.filter(facet=CourseFacet.TEACHER, value__in=[str(pk) for pk in ids]))
+            raw_delete(Teacher.objects.filter(id__in=ids))
+        delete_users(user_id for _, user_id, _ in rows)
+        if rows:
+            generations.bump(rows[0][2], generations.ROSTER, generations.COURSES)
+    return len(rows)
@@ -1,12 +1,17 @@
 from django import forms
 from academics.models import Course
+from academics.widgets import CourseSearchSelect
 
 
 from .models import Teacher
 
 class TeacherCreateForm(forms.Form):
     name = forms.CharField(max_length=150, label="Teacher Name")
-    employee_id = forms.CharField(max_length=20)
+    # Left blank, the next employee ID is assigned (accounts/identifiers.py).
+    employee_id = forms.CharField(
+        max_length=20, required=False,
+        widget=forms.TextInput(attrs={'placeholder': 'Assigned automatically if blank'}),
+    )
     department = forms.CharField(max_length=100)
     qualification = forms.CharField(max_length=200)
     gender = forms.ChoiceField(choices=Teacher.GENDER_CHOICES)
@@ -19,19 +24,13 @@ class TeacherCreateForm(forms.Form):
     courses = forms.ModelMultipleChoiceField(
         queryset=Course.objects.none(),
         required=False,
-        widget=forms.CheckboxSelectMultiple,
     )
 
     def __init__(self, *args, institution=None, **kwargs):
         super().__init__(*args, **kwargs)
         if institution is not None:
             self.fields["courses"].queryset = Course.objects.filter(institution=institution)
-
-    def clean_employee_id(self):
-        employee_id = self.cleaned_data.get('employee_id')
-        if Teacher.objects.filter(employee_id=employee_id).exists():
-            raise forms.ValidationError("A teacher with this Employee ID already exists.")
-        return employee_id
+            self.fields["courses"].widget = CourseSearchSelect(institution.pk, multiple=True)
 
 
 class TeacherEditForm(forms.Form):
@@ -49,7 +48,6 @@ class TeacherEditForm(forms.Form):
     courses = forms.ModelMultipleChoiceField(
         queryset=Course.objects.none(),
         required=False,
-        widget=forms.CheckboxSelectMultiple,
     )
 
     def __init__(self, *args, teacher=None, institution=None, **kwargs):
@@ -57,6 +55,7 @@ class TeacherEditForm(forms.Form):
         self.teacher = teacher
         if institution is not None:
             self.fields["courses"].queryset = Course.objects.filter(institution=institution)
+            self.fields["courses"].widget = CourseSearchSelect(institution.pk, multiple=True)
         if teacher is not None:
             self.fields["name"].initial = teacher.user.get_full_name() or teacher.user.username
             self.fields["employee_id"].initial = teacher.employee_id
@@ -68,10 +67,4 @@ class TeacherEditForm(forms.Form):
             self.fields["address"].initial = teacher.address
             self.fields["salary"].initial = teacher.salary
             self.fields["contract_type"].initial = teacher.contract_type
-            self.fields["courses"].initial = Course.objects.filter(teachers=teacher)
-
-    def clean_employee_id(self):
-        employee_id = self.cleaned_data.get('employee_id')
-        if Teacher.objects.filter(employee_id=employee_id).exclude(id=self.teacher.id).exists():
-            raise forms.ValidationError("A teacher with this Employee ID already exists.")
-        return employee_id
+            self.fields["courses"].initial = list(teacher.course_set.values_list('id', flat=True))
@@ -1,3 +1,53 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from academics import facets
+from academics.models import Course, CourseFacet
+from accounts.signup import register_institution
+from core import generations
+
+from . import bulk
+from .models import Teacher
+
+
+def facet_counts(institution_id):
+    return sorted(CourseFacet.objects.filter(institution_id=institution_id).values_list('facet', 'value', 'count'))
+
+
+class TeacherBulkActionTests(TestCase):
+    def setUp(self):
+        admin = register_institution('Lincoln High', 'lincoln', 'admin@lincoln.edu', 's3cret!pw')
+        self.institution = admin.userprofile.institution
+        self.teachers = [
+            Teacher.objects.create(
+                user=User.objects.create_user(f'teacher{i}', password='pw'), institution=self.institution,
+                employee_id=f'E{i}', department='Science', qualification='MSc',
+            )
+            for i in range(3)
+        ]
+        self.course = Course.objects.create(institution=self.institution, code='CS101', name='Intro')
+        self.course.teachers.set(self.teachers)
+
+    def roster(self):
+        return generations.current(self.institution.pk, generations.ROSTER)
+
+    def test_deactivate_disables_logins_and_keeps_assignments(self):
+        before = self.roster()
+        with self.captureOnCommitCallbacks(execute=True):
+            changed = bulk.deactivate(Teacher.objects.filter(institution=self.institution, user__is_active=True))
+        self.assertEqual(changed, 3)
+        self.assertFalse(User.objects.filter(teacher__isnull=False, is_active=True).exists())
+        self.assertEqual(self.course.teachers.count(), 3)
+        self.assertNotEqual(self.roster(), before)
+
+    def test_delete_removes_assignments_and_teacher_facets(self):
+        before = self.roster()
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted = bulk.delete(Teacher.objects.filter(pk__in=[t.pk for t in self.teachers[:2]]))
+        self.assertEqual(deleted, 2)
+        self.assertEqual(list(self.course.teachers.all()), [self.teachers[2]])
+        self.assertFalse(User.objects.filter(username__in=['teacher0', 'teacher1']).exists())
+        counts = facet_counts(self.institution.pk)
+        facets.rebuild(self.institution.pk)
+        self.assertEqual(counts, facet_counts(self.institution.pk))
+        self.assertNotEqual(self.roster(), before)
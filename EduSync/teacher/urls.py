@@ -5,6 +5,7 @@ urlpatterns = [
     path('dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
     path('students/', views.teacher_students, name='teacher_students'),
     path('list/', views.teacher_list, name='teacher_list'),
+    path('bulk/', views.teacher_bulk_action, name='teacher_bulk_action'),
     path('add/', views.teacher_create, name='teacher_create'),
     path('edit/<int:teacher_id>/', views.teacher_edit, name='teacher_edit'),
     path('delete/<int:teacher_id>/', views.teacher_delete, name='teacher_delete'),
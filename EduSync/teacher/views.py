@@ -3,23 +3,20 @@ from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import Teacher
+from academics import assignments
 from academics.models import Course
 
 from student.models import Student
+from core import generations
 from institution.models import Institution
+from accounts import identifiers
 from accounts.models import UserProfile
 from django.db import transaction, IntegrityError
+from django.template.defaultfilters import pluralize
+from . import bulk
 from .forms import TeacherCreateForm, TeacherEditForm
 
-
-def _unique_username(base):
-    from django.contrib.auth.models import User
-    username = base
-    suffix = 1
-    while User.objects.filter(username=username).exists():
-        username = f"{base}{suffix}"
-        suffix += 1
-    return username
+DUPLICATE_EMPLOYEE_ID = 'A teacher with this Employee ID already exists.'
 
 
 def _get_institution_admin(request):
@@ -68,6 +65,7 @@ def teacher_students(request):
 
 
 @login_required(login_url='login')
+@generations.cache_page(generations.ROSTER)
 def teacher_list(request):
     institution, error = _get_institution_admin(request)
     if error:
@@ -77,6 +75,32 @@ def teacher_list(request):
     return render(request, 'teacher/teacher_list.html', {'teachers': teachers})
 
 
+@login_required(login_url='login')
+def teacher_bulk_action(request):
+    institution, error = _get_institution_admin(request)
+    if error:
+        return render(request, 'teacher/teacher_list.html', {'error': error})
+    if request.method != 'POST':
+        return redirect('teacher_list')
+
+    ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+    if not ids:
+        messages.error(request, 'No teachers selected.')
+        return redirect('teacher_list')
+    teachers = Teacher.objects.filter(institution=institution, id__in=ids)
+
+    action = request.POST.get('action')
+    if action == 'deactivate':
+        count = bulk.deactivate(teachers)
+        messages.success(request, f'{count} teacher{pluralize(count)} deactivated.')
+    elif action == 'delete':
+        count = bulk.delete(teachers)
+        messages.success(request, f'{count} teacher{pluralize(count)} deleted.')
+    else:
+        messages.error(request, 'Unknown bulk action.')
+    return redirect('teacher_list')
+
+
 @login_required(login_url='login')
 def teacher_create(request):
     institution, error = _get_institution_admin(request)
@@ -93,8 +117,8 @@ def teacher_create(request):
                     parts = full_name.split(None, 1)
                     first_name = parts[0] if parts else full_name
                     last_name = parts[1] if len(parts) > 1 else ""
-                    employee_id = form.cleaned_data['employee_id']
-                    username = _unique_username(f"teacher_{employee_id}")
+                    employee_id = form.cleaned_data['employee_id'] or identifiers.employee_ids(institution)[0]
+                    username = identifiers.username(institution, 'teacher')
                     password = employee_id
 
                     user = User.objects.create_user(username=username, password=password)
@@ -119,18 +143,20 @@ def teacher_create(request):
 
                     courses = form.cleaned_data.get('courses')
                     if courses:
-                        for course in courses:
-                            course.teachers.add(teacher)
+                        assignments.sync(institution, [(course.pk, teacher.pk) for course in courses], teacher=teacher)
 
                     UserProfile.objects.create(
                         user=teacher.user,
                         role='teacher',
-                        institution=institution.name
+                        institution=institution
                     )
                 messages.success(request, 'Teacher added successfully.')
                 return redirect('teacher_list')
             except IntegrityError as e:
-                messages.error(request, f'Database error: One of the unique fields (like Employee ID) might already exist. ({e})')
+                if Teacher.objects.filter(employee_id=form.cleaned_data['employee_id']).exists():
+                    form.add_error('employee_id', DUPLICATE_EMPLOYEE_ID)
+                else:
+                    messages.error(request, f'Database error: One of the unique fields (like Employee ID) might already exist. ({e})')
             except Exception as e:
                 messages.error(request, f'An unexpected error occurred: {e}')
     else:
@@ -154,7 +180,6 @@ def teacher_edit(request, teacher_id):
             parts = full_name.split(None, 1)
             teacher.user.first_name = parts[0] if parts else full_name
             teacher.user.last_name = parts[1] if len(parts) > 1 else ''
-            teacher.user.save()
 
             teacher.employee_id = form.cleaned_data['employee_id']
             teacher.department = form.cleaned_data['department']
@@ -168,17 +193,20 @@ def teacher_edit(request, teacher_id):
 
             if form.cleaned_data.get('photo'):
                 teacher.photo = form.cleaned_data.get('photo')
-            teacher.save()
-
-            selected_courses = set(form.cleaned_data.get('courses', []))
-            current_courses = set(Course.objects.filter(teachers=teacher))
-
-            for course in current_courses - selected_courses:
-                course.teachers.remove(teacher)
-            for course in selected_courses - current_courses:
-                course.teachers.add(teacher)
-
-            return redirect('teacher_list')
+            try:
+                with transaction.atomic():
+                    teacher.user.save()
+                    teacher.save()
+                    assignments.sync(
+                        institution,
+                        [(course.pk, teacher.pk) for course in form.cleaned_data.get('courses', [])],
+                        teacher=teacher,
+                    )
+            except IntegrityError:
+                # employee_id is the only unique field the form edits
+                form.add_error('employee_id', DUPLICATE_EMPLOYEE_ID)
+            else:
+                return redirect('teacher_list')
     else:
         form = TeacherEditForm(teacher=teacher, institution=institution)
 